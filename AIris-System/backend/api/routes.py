@@ -2,26 +2,38 @@
 API Routes for AIris Backend
 """
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Query, Request
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable
 import json
 import base64
 import cv2
 import numpy as np
 import time
 import asyncio
+import itertools
 import os
 from io import BytesIO
 
 from services.camera_service import CameraService
+from services.camera_manager import DEFAULT_CAMERA_ID, CameraManager
+from services.file_source import PLAYBACK_FAST
+from services.frame_bus import POLICY_QUEUE
+from services.stream_hub import StreamHub
+from services.stream_controller import StreamController, scaled_size
 from services.model_service import ModelService
 from services.activity_guide_service import ActivityGuideService
 from services.scene_description_service import SceneDescriptionService
+from services.scene_events import EVENT_RECORDING, SceneEventLog, SceneMonitor
 from services.tts_service import TTSService
 from services.stt_service import STTService
 from services.email_service import get_email_service
+from utils.responses import FastJSONResponse, negotiated_response, wants_msgpack
+from utils.single_flight import SingleFlight
+from utils.stream_protocol import (
+    FORMAT_BINARY, MJPEG_BOUNDARY, STREAM_FORMATS, describe_protocol, mjpeg_part, pack_frame
+)
 from models.schemas import (
     TaskRequest, TaskResponse, GuidanceResponse, 
     SceneDescriptionRequest, SceneDescriptionResponse,
@@ -31,17 +43,70 @@ from models.schemas import (
 router = APIRouter(prefix="/api/v1", tags=["airis"])
 
 # Services will be initialized in main.py and passed here
-_camera_service: CameraService = None
+_camera_manager: CameraManager = None
 _model_service: ModelService = None
 _activity_guide_service: ActivityGuideService = None
 _scene_description_service: SceneDescriptionService = None
 _tts_service: TTSService = None
 _stt_service: STTService = None
 
-def set_global_services(camera: CameraService, model: ModelService):
+# Concurrent polls of a pipeline (e.g. several tabs) for the same newest frame share one run,
+# keyed by (pipeline, camera_id, mode, frame seq)
+_pipeline_flights = SingleFlight("process-frame")
+
+# Last run of each polled pipeline, keyed by (pipeline, camera_id, mode): (captured, result),
+# so each pipeline processes each frame of each camera at most once
+_pipeline_results: Dict[Tuple[str, str, str], Tuple[Any, Dict[str, Any]]] = {}
+
+# How long a pipeline waits for a frame it hasn't processed yet
+FRAME_WAIT_TIMEOUT_SEC = 1.0
+
+# Version tags for pipeline-rendered frames in the encoded frame cache
+_annotation_versions = itertools.count(1)
+
+# Adaptive controllers of the open /camera/stream connections: id(websocket) -> (camera_id, controller)
+_stream_controllers: Dict[int, Tuple[str, StreamController]] = {}
+
+# Frames a stream connection may hold while its client is slow (older ones are dropped)
+STREAM_OUTBOX_SIZE = 2
+
+# Camera viewers (/camera/stream, /camera/mjpeg) share one producer per view through the hub
+_stream_hub = StreamHub()
+
+# Response modes of the activity guide endpoints: "frame" renders and encodes the annotated frame,
+# "metadata" skips both and returns boxes, track ids and hand landmarks for the client to overlay
+MODE_FRAME = "frame"
+MODE_METADATA = "metadata"
+RESPONSE_MODES = (MODE_FRAME, MODE_METADATA)
+
+# Max rate at which /activity-guide/ws pushes annotated frames (guidance is pushed on every change)
+ACTIVITY_WS_PREVIEW_FPS = float(os.environ.get("ACTIVITY_WS_PREVIEW_FPS", "10"))
+
+# The activity guide pipeline is stateful; runs from HTTP polls and WebSocket loops take turns
+_activity_pipeline_lock = asyncio.Lock()
+
+# Scene description results as events (/scene-description/events), and the server-side loop
+# that produces them while recording; polls and the loop take turns on the pipeline
+_scene_event_log = SceneEventLog()
+_scene_monitor: Optional[SceneMonitor] = None
+_scene_pipeline_lock = asyncio.Lock()
+
+# While the monitor analyzes a camera, polls of that camera only render the recording status,
+# so they never wait behind a caption for the pipeline lock
+_scene_status_lock = asyncio.Lock()
+
+# Comment lines sent on idle event streams so proxies don't time them out
+SCENE_EVENTS_KEEPALIVE_SEC = 15.0
+
+# /camera/mjpeg overlays (no overlay: the raw camera view)
+MJPEG_OVERLAYS = ("activity", "scene")
+MJPEG_MAX_FPS = float(os.environ.get("MJPEG_MAX_FPS", "15"))
+MJPEG_MAILBOX_SIZE = 1
+
+def set_global_services(cameras: CameraManager, model: ModelService):
     """Set global services from main.py"""
-    global _camera_service, _model_service, _scene_description_service, _activity_guide_service
-    _camera_service = camera
+    global _camera_manager, _model_service, _scene_description_service, _activity_guide_service
+    _camera_manager = cameras
     _model_service = model
     
     # Eagerly initialize services that need Groq so we see any errors at startup
@@ -50,11 +115,40 @@ def set_global_services(camera: CameraService, model: ModelService):
     _activity_guide_service = ActivityGuideService(_model_service)
     print("📦 AI services initialized.\n")
 
-def get_camera_service() -> CameraService:
-    global _camera_service
-    if _camera_service is None:
-        _camera_service = CameraService()
-    return _camera_service
+async def shutdown_services():
+    """Stop the background work of the services created here (called on app shutdown,
+    before the models are released)"""
+    if _scene_monitor is not None:
+        await _scene_monitor.stop()
+    if _activity_guide_service is not None:
+        await _activity_guide_service.cleanup()
+
+def get_camera_manager() -> CameraManager:
+    global _camera_manager
+    if _camera_manager is None:
+        _camera_manager = CameraManager()
+    return _camera_manager
+
+def get_camera_service(camera_id: Optional[str] = None) -> CameraService:
+    """Get a camera source by id (the default camera when omitted)"""
+    try:
+        return get_camera_manager().get(camera_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown camera: {camera_id}")
+
+def get_pipeline_camera(camera_id: Optional[str] = None) -> CameraService:
+    """Get the camera the activity guide and scene description pipelines run on.
+    
+    Each pipeline is a single stateful instance (YOLO tracker, motion gate, guidance state,
+    scene recording), so they only run on the default camera; other ids are rejected rather
+    than mixing their frames into that state.
+    """
+    if camera_id is not None and camera_id != DEFAULT_CAMERA_ID:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The activity guide and scene description pipelines only run on the '{DEFAULT_CAMERA_ID}' camera"
+        )
+    return get_camera_service(camera_id)
 
 def get_model_service() -> ModelService:
     global _model_service
@@ -78,6 +172,19 @@ def get_scene_description_service() -> SceneDescriptionService:
         _scene_description_service = SceneDescriptionService(_model_service)
     return _scene_description_service
 
+def get_scene_monitor() -> SceneMonitor:
+    global _scene_monitor
+    if _scene_monitor is None:
+        _scene_monitor = SceneMonitor(get_scene_description_service(), _scene_event_log, _scene_pipeline_lock)
+    return _scene_monitor
+
+def is_scene_monitored(camera_service: CameraService) -> bool:
+    """True while the scene monitor is analyzing this camera's frames"""
+    return (
+        _scene_monitor is not None and _scene_monitor.is_running
+        and _scene_monitor.camera_id == camera_service.camera_id
+    )
+
 def get_tts_service() -> TTSService:
     global _tts_service
     if _tts_service is None:
@@ -90,21 +197,70 @@ def get_stt_service() -> STTService:
         _stt_service = STTService()
     return _stt_service
 
+async def run_polled_pipeline(name: str, camera_service: CameraService, mode: str, lock: asyncio.Lock,
+                              process: Callable[[Any], Awaitable[Dict[str, Any]]]) -> Tuple[Any, Dict[str, Any]]:
+    """Run a polled pipeline on the newest frame of a camera. Returns (captured, result).
+    
+    Polls that arrive while a run for the same newest frame is in flight wait for it and share
+    its result. A run that finds the newest frame already processed (e.g. it was queued behind
+    the lock while that frame came and went) returns the previous result, so there's at most
+    one inference per new frame however many clients poll. `process(captured)` runs under `lock`.
+    """
+    latest = camera_service.get_latest()
+    if latest is None or latest.image is None:
+        raise HTTPException(status_code=404, detail="No frame available")
+    result_key = (name, camera_service.camera_id, mode)
+    
+    async def run():
+        async with lock:
+            captured = camera_service.get_latest() or latest
+            last = _pipeline_results.get(result_key)
+            if last is not None and last[0].seq >= captured.seq:
+                return last
+            result = await process(captured)
+            _pipeline_results[result_key] = (captured, result)
+            return captured, result
+    
+    return await _pipeline_flights.do((*result_key, latest.seq), run)
+
+def close_camera_pipelines(camera_id: str):
+    """Forget the pipeline results and close the stream channels of a camera that is being removed"""
+    for key in [k for k in _pipeline_results if k[1] == camera_id]:
+        del _pipeline_results[key]
+    _stream_hub.close_camera(camera_id)
+
 # ==================== Camera Endpoints ====================
 class CameraConfigRequest(BaseModel):
-    source_type: str  # "webcam" or "esp32"
+    source_type: str  # "webcam", "esp32" or "file"
     ip_address: Optional[str] = None
+    # Replay settings for source_type "file": an MP4 or a directory of JPEGs
+    file_path: Optional[str] = None  # Relative to CAMERA_REPLAY_DIR (paths outside it are rejected)
+    playback_mode: str = "realtime"  # "realtime", "fixed" or "fast"
+    playback_fps: Optional[float] = None  # Used by "fixed" (defaults to the file's FPS)
+    loop: bool = False
 
 class ESP32WiFiProvisionRequest(BaseModel):
     ssid: str
     password: str = ""
 
 @router.post("/camera/config")
-async def set_camera_config(config: CameraConfigRequest):
-    """Set camera configuration"""
-    camera_service = get_camera_service()
-    await camera_service.set_config(config.source_type, config.ip_address)
-    return {"status": "success", "message": "Camera configuration updated"}
+async def set_camera_config(config: CameraConfigRequest, camera_id: Optional[str] = None):
+    """Set camera configuration (adds the camera source if camera_id is new)"""
+    try:
+        camera_service = get_camera_manager().get_or_create(camera_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        await camera_service.set_config(
+            config.source_type, config.ip_address,
+            file_path=config.file_path,
+            playback_mode=config.playback_mode,
+            playback_fps=config.playback_fps,
+            loop=config.loop
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "message": "Camera configuration updated", "camera_id": camera_service.camera_id}
 
 @router.post("/camera/esp32/provision-wifi")
 async def provision_esp32_wifi(request: ESP32WiFiProvisionRequest):
@@ -148,107 +304,263 @@ async def provision_esp32_wifi(request: ESP32WiFiProvisionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/camera/start")
-async def start_camera():
+async def start_camera(camera_id: Optional[str] = None):
     """Start the camera feed"""
+    camera_service = get_camera_service(camera_id)
     try:
-        camera_service = get_camera_service()
         success = await camera_service.start()
         if success:
-            return {"status": "success", "message": "Camera started"}
+            return {"status": "success", "message": "Camera started", "camera_id": camera_service.camera_id}
         else:
             raise HTTPException(status_code=500, detail="Failed to start camera")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/camera/stop")
-async def stop_camera():
+async def stop_camera(camera_id: Optional[str] = None):
     """Stop the camera feed"""
+    camera_service = get_camera_service(camera_id)
     try:
-        camera_service = get_camera_service()
         await camera_service.stop()
-        return {"status": "success", "message": "Camera stopped"}
+        return {"status": "success", "message": "Camera stopped", "camera_id": camera_service.camera_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/camera/status")
-async def get_camera_status():
+async def get_camera_status(camera_id: Optional[str] = None):
     """Get camera status"""
-    camera_service = get_camera_service()
-    return {
+    camera_service = get_camera_service(camera_id)
+    return FastJSONResponse({
+        "camera_id": camera_service.camera_id,
+        "source_type": camera_service.source_type,
         "is_running": camera_service.is_running(),
-        "is_available": camera_service.is_available()
-    }
+        "is_available": camera_service.is_available(),
+        "frame_seq": camera_service.get_frame_seq(),
+        "frame_bus": camera_service.frame_bus.get_stats(),
+        "encode_cache": camera_service.encoded_frames.get_stats(),
+        "link": camera_service.get_link_stats(),
+        "devices": camera_service.device_registry.get_stats(),
+        "discovery": camera_service.last_discovery,
+        "playback": camera_service.playback_stats if camera_service.source_type == "file" else None,
+        "streams": [
+            controller.get_stats()
+            for stream_camera_id, controller in _stream_controllers.values()
+            if stream_camera_id == camera_service.camera_id
+        ],
+        "hub": _stream_hub.get_stats(camera_service.camera_id),
+        "process_frame": _pipeline_flights.get_stats()
+    })
+
+@router.get("/cameras")
+async def list_cameras():
+    """List camera sources with per-camera stats"""
+    camera_manager = get_camera_manager()
+    return {"cameras": [camera_manager.get_summary(camera_id) for camera_id in camera_manager.list_ids()]}
+
+@router.delete("/cameras/{camera_id}")
+async def remove_camera(camera_id: str):
+    """Stop and remove a camera source"""
+    camera_manager = get_camera_manager()
+    if not camera_manager.has(camera_id):
+        raise HTTPException(status_code=404, detail=f"Unknown camera: {camera_id}")
+    close_camera_pipelines(camera_id)
+    try:
+        await camera_manager.remove(camera_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "message": f"Camera {camera_id} removed"}
 
 @router.get("/camera/frame")
-async def get_camera_frame():
+async def get_camera_frame(camera_id: Optional[str] = None):
     """Get a single frame from the camera"""
-    camera_service = get_camera_service()
-    frame = await camera_service.get_frame()
-    if frame is None:
+    camera_service = get_camera_service(camera_id)
+    captured = camera_service.get_latest()
+    encoded = camera_service.encode_frame(captured) if captured is not None else None
+    if encoded is None:
         raise HTTPException(status_code=404, detail="No frame available")
     
-    # Encode frame as JPEG
-    _, buffer = cv2.imencode('.jpg', frame)
-    frame_bytes = buffer.tobytes()
+    return Response(content=encoded.jpeg, media_type="image/jpeg")
+
+def _mjpeg_renderer(camera_service: CameraService, overlay: Optional[str]):
+    """Per-frame render-and-encode step of an MJPEG channel"""
+    async def render_raw(captured):
+        return camera_service.encode_frame(captured)
+    
+    # Overlays only draw the pipelines' latest results: running the stateful pipelines here
+    # would advance tracking and guidance outside the clients' own polls
+    async def render_activity(captured):
+        frame = captured.image
+        if frame is None:
+            return None
+        annotated_frame = get_activity_guide_service().render_overlay(frame)
+        return camera_service.encode_frame(
+            captured, image=annotated_frame, annotation=("activity", next(_annotation_versions)), quality=90
+        )
+    
+    async def render_scene(captured):
+        frame = captured.image
+        if frame is None:
+            return None
+        annotated_frame = get_scene_description_service().render_status(frame)["annotated_frame"]
+        return camera_service.encode_frame(
+            captured, image=annotated_frame, annotation=("scene", next(_annotation_versions)), quality=90
+        )
+    
+    render = {"activity": render_activity, "scene": render_scene}.get(overlay, render_raw)
+    
+    async def render_part(captured):
+        encoded = await render(captured)
+        return mjpeg_part(encoded.jpeg) if encoded is not None else None
+    return render_part
+
+@router.get("/camera/mjpeg")
+async def camera_mjpeg(request: Request, camera_id: Optional[str] = None, annotated: Optional[str] = None):
+    """Live camera view as multipart/x-mixed-replace MJPEG (plays in <img> tags, VLC, etc.).
+    
+    All viewers of a view share one producer, so each frame is read, rendered and encoded once
+    however many viewers there are. ?annotated=activity|scene draws that pipeline's latest
+    detections or recording status on the live frames (the stream doesn't run the pipeline).
+    """
+    if annotated is not None and annotated not in MJPEG_OVERLAYS:
+        raise HTTPException(status_code=400, detail=f"Unknown overlay: {annotated}")
+    camera_service = get_pipeline_camera(camera_id) if annotated else get_camera_service(camera_id)
+    
+    async def stream():
+        channel = _stream_hub.channel(
+            ("mjpeg", camera_service.camera_id, annotated),
+            f"mjpeg:{camera_service.camera_id}:{annotated or 'raw'}",
+            camera_service, _mjpeg_renderer(camera_service, annotated), MJPEG_MAX_FPS
+        )
+        mailbox = channel.subscribe("mjpeg-viewer", maxsize=MJPEG_MAILBOX_SIZE)
+        try:
+            while not mailbox.closed and not await request.is_disconnected():
+                part = await mailbox.get(timeout=FRAME_WAIT_TIMEOUT_SEC)
+                if part is not None:
+                    yield part
+        finally:
+            channel.unsubscribe(mailbox)
     
     return StreamingResponse(
-        BytesIO(frame_bytes),
-        media_type="image/jpeg"
+        stream(),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        headers={"Cache-Control": "no-cache, private", "Pragma": "no-cache"}
+    )
+
+def get_stream_channel(camera_service: CameraService, variant: Tuple[Optional[int], float], max_fps: float):
+    """Hub channel of raw camera frames encoded at one (quality, scale); payloads are (captured, encoded)"""
+    quality, scale = variant
+    
+    async def render(captured):
+        if quality is None:
+            # Full quality and size: ESP32 frames are forwarded as the camera sent them
+            encoded = camera_service.encode_frame(captured)
+        else:
+            width, height = captured.dimensions
+            encoded = camera_service.encode_frame(
+                captured, quality=quality, size=scaled_size(width, height, scale)
+            )
+        return (captured, encoded) if encoded is not None else None
+    
+    return _stream_hub.channel(
+        ("stream", camera_service.camera_id, variant),
+        f"stream:{camera_service.camera_id}:q{quality or 'src'}@{scale}",
+        camera_service, render, max_fps
     )
 
 @router.websocket("/camera/stream")
-async def camera_stream(websocket: WebSocket):
-    """WebSocket endpoint for streaming camera frames with optimized frame rate"""
+async def camera_stream(websocket: WebSocket, camera_id: Optional[str] = None,
+                        stream_format: str = Query("json", alias="format")):
+    """WebSocket endpoint for streaming camera frames with optimized frame rate.
+    
+    ?format=json (default) sends base64 JPEGs in JSON text messages; ?format=binary sends
+    binary messages with a fixed header and the raw JPEG (see utils/stream_protocol.py).
+    """
+    camera_manager = get_camera_manager()
+    if not camera_manager.has(camera_id):
+        await websocket.close(code=1008, reason=f"Unknown camera: {camera_id}")
+        return
+    if stream_format not in STREAM_FORMATS:
+        await websocket.close(code=1008, reason=f"Unknown stream format: {stream_format}")
+        return
     await websocket.accept()
-    camera_service = get_camera_service()
+    camera_service = camera_manager.get(camera_id)
+    binary = stream_format == FORMAT_BINARY
     
-    # Adaptive frame rate based on source type
-    frame_interval = 0.033  # Default ~30 FPS for webcam (1/30 seconds)
+    # Upper bounds for this connection; the controller adapts FPS, quality and scale below them
+    max_fps = 30  # ~30 FPS for webcam
     if camera_service.source_type == "esp32":
-        frame_interval = 0.05  # ~20 FPS for ESP32 (more stable, reduces network load)
+        max_fps = 20  # ~20 FPS for ESP32 (more stable, reduces network load)
+    controller = StreamController(max_fps=max_fps, max_quality=camera_service.get_preview_quality())
+    _stream_controllers[id(websocket)] = (camera_service.camera_id, controller)
     
-    last_frame_sent_time = 0
+    # Frames come from the hub channel for this client's current (quality, scale), shared with
+    # every other client in the same state; the mailbox drops the oldest frame when we fall behind
+    channel = mailbox = None
     
-    try:
+    def join_channel():
+        nonlocal channel, mailbox
+        if channel is not None:
+            channel.unsubscribe(mailbox)
+        channel = get_stream_channel(camera_service, controller.variant, max_fps)
+        mailbox = channel.subscribe("camera-stream", maxsize=STREAM_OUTBOX_SIZE, fps=controller.fps)
+    
+    async def send():
+        last_frame_time = 0.0
         while True:
-            current_time = time.time()
-            
-            # Frame rate control: Ensure minimum time between frames
-            # This prevents encoding/sending frames too quickly, saving CPU and bandwidth
-            time_since_last_frame = current_time - last_frame_sent_time
-            if time_since_last_frame < frame_interval:
-                # Calculate exact sleep time needed to maintain target frame rate
-                sleep_time = frame_interval - time_since_last_frame
+            # Frame rate control at the controller's current FPS
+            sleep_time = controller.frame_interval - (time.time() - last_frame_time)
+            if sleep_time > 0:
                 await asyncio.sleep(sleep_time)
-                # After sleeping, update current time and proceed
-                current_time = time.time()
             
-            # Get frame from camera service
-            frame = await camera_service.get_frame()
-            if frame is None:
+            item = await mailbox.get(timeout=FRAME_WAIT_TIMEOUT_SEC)
+            if mailbox.closed:
+                await websocket.close(code=1001, reason="Camera removed")
+                return
+            if item is None:
                 await websocket.send_json({"error": "No frame available"})
-                await asyncio.sleep(0.1)  # Wait a bit before retrying
+                continue
+            captured, encoded = item
+            last_frame_time = time.time()
+            if controller.is_stale(captured.timestamp):
                 continue
             
-            # Encode frame as JPEG with quality based on source
-            # Lower quality for ESP32 = smaller file size = faster transmission = smoother playback
-            jpeg_quality = 90 if camera_service.source_type == "webcam" else 75
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
-            frame_bytes = buffer.tobytes()
-            frame_base64 = base64.b64encode(frame_bytes).decode()
-            
-            # Send frame to client
-            await websocket.send_json({
-                "type": "frame",
-                "data": frame_base64,
-                "timestamp": camera_service.get_timestamp()
-            })
-            
-            # Update timestamp after successful send
-            last_frame_sent_time = time.time()
+            if controller.pop_changed():
+                await websocket.send_json({"type": "stream_params", **controller.get_params()})
+                if controller.variant != channel.key[2]:
+                    join_channel()
+                mailbox.fps = controller.fps
             
-            # Small yield to allow other async tasks to run
-            await asyncio.sleep(0.001)
+            # Send frame to client; slow sends are the client's backpressure
+            send_start = time.time()
+            if binary:
+                await websocket.send_bytes(pack_frame(
+                    encoded.jpeg, captured.seq, captured.timestamp, encoded.width, encoded.height
+                ))
+            else:
+                await websocket.send_json({
+                    "type": "frame",
+                    "data": encoded.base64,
+                    "timestamp": captured.timestamp,
+                    "seq": captured.seq
+                })
+            controller.record_send(time.time() - send_start, len(encoded.jpeg), mailbox.depth)
+    
+    async def receive():
+        # Nothing is expected from the client; this notices the disconnect while waiting for frames
+        while True:
+            await websocket.receive_text()
+    
+    tasks = []
+    try:
+        if binary:
+            # Tell the client how to parse the binary frames that follow
+            await websocket.send_json({"type": "hello", "format": FORMAT_BINARY, "protocol": describe_protocol()})
+        
+        join_channel()
+        tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
     except WebSocketDisconnect:
         print("Client disconnected from camera stream")
     except Exception as e:
@@ -259,9 +571,66 @@ async def camera_stream(websocket: WebSocket):
             await websocket.close()
         except:
             pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        _stream_controllers.pop(id(websocket), None)
+        if channel is not None:
+            channel.unsubscribe(mailbox)
 
 # ==================== Activity Guide Endpoints ====================
 
+def encode_activity_frame(camera_service: CameraService, captured, result: Dict[str, Any]):
+    """Encode the annotated frame of an activity guide result (the raw frame if annotation failed)"""
+    frame = captured.image
+    processed_frame = result.get("annotated_frame", frame)
+    if processed_frame is None:
+        processed_frame = frame
+    
+    annotation_version = result.setdefault("annotation_version", next(_annotation_versions))
+    try:
+        encoded = camera_service.encode_frame(
+            captured, image=processed_frame, annotation=("activity", annotation_version), quality=90
+        )
+    except Exception as e:
+        print(f"Error encoding frame: {e}")
+        encoded = None
+    if encoded is None:
+        # Fallback: encode original frame
+        encoded = camera_service.encode_frame(captured, image=frame, quality=90)
+    return encoded
+
+def _round_box(box) -> Optional[List[int]]:
+    return [int(round(float(v))) for v in box] if box is not None else None
+
+def activity_metadata(captured, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Structured detections of an activity guide result (metadata mode)"""
+    width, height = captured.dimensions
+    return {
+        "seq": captured.seq,
+        "timestamp": captured.timestamp,
+        "frame_size": [width, height],
+        "detections": result.get("detections", []),
+        "hands": result.get("hands", []),
+        "inference_skipped": result.get("inference_skipped", False)
+    }
+
+def activity_guidance_state(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Guidance and detections of an activity guide result, with boxes rounded to whole
+    pixels so sub-pixel jitter doesn't count as a change"""
+    return {
+        "guidance": result.get("guidance"),
+        "stage": result.get("stage"),
+        "instruction": result.get("instruction"),
+        "detected_objects": [
+            {"name": obj["name"], "box": _round_box(obj["box"])}
+            for obj in result.get("detected_objects", [])
+        ],
+        "hand_detected": result.get("hand_detected", False),
+        "object_location": _round_box(result.get("object_location")),
+        "hand_location": _round_box(result.get("hand_location"))
+    }
+
 @router.post("/activity-guide/start-task", response_model=TaskResponse)
 async def start_task(request: TaskRequest):
     """Start a new activity guide task"""
@@ -276,41 +645,42 @@ async def start_task(request: TaskRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/activity-guide/process-frame")
-async def process_activity_frame():
-    """Process a frame for activity guide mode"""
+async def process_activity_frame(request: Request, camera_id: Optional[str] = None, mode: str = MODE_FRAME):
+    """Process a frame for activity guide mode.
+    
+    ?mode=metadata returns detections, track ids and hand landmarks instead of the
+    annotated frame, so nothing is rendered or encoded on the server.
+    With "Accept: application/msgpack" the response is msgpack and "frame" holds the raw JPEG bytes.
+    """
+    if mode not in RESPONSE_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown mode: {mode}")
     try:
-        camera_service = get_camera_service()
         activity_guide_service = get_activity_guide_service()
-        frame = await camera_service.get_frame()
-        if frame is None:
-            raise HTTPException(status_code=404, detail="No frame available")
+        camera_service = get_pipeline_camera(camera_id)
+        render = mode == MODE_FRAME
         
-        result = await activity_guide_service.process_frame(frame)
+        async def process(captured):
+            return await activity_guide_service.process_frame(captured.image, views=captured.views, render=render)
         
-        # Encode processed frame (always process, even when idle, to show YOLO boxes)
-        processed_frame = result.get("annotated_frame", frame)
-        if processed_frame is None:
-            processed_frame = frame
-        
-        try:
-            _, buffer = cv2.imencode('.jpg', processed_frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
-            frame_bytes = buffer.tobytes()
-            frame_base64 = base64.b64encode(frame_bytes).decode()
-        except Exception as e:
-            print(f"Error encoding frame: {e}")
-            # Fallback: encode original frame
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
-            frame_bytes = buffer.tobytes()
-            frame_base64 = base64.b64encode(frame_bytes).decode()
+        captured, result = await run_polled_pipeline(
+            "activity-guide", camera_service, mode, _activity_pipeline_lock, process
+        )
         
-        return {
-            "frame": frame_base64,
+        response = {
             "guidance": result.get("guidance"),
             "stage": result.get("stage"),
             "instruction": result.get("instruction"),
             "detected_objects": result.get("detected_objects", []),
             "hand_detected": result.get("hand_detected", False)
         }
+        if not render:
+            response.update(activity_metadata(captured, result))
+            return negotiated_response(request, response)
+        
+        # Encode processed frame (always process, even when idle, to show YOLO boxes)
+        encoded = encode_activity_frame(camera_service, captured, result)
+        frame_data = encoded.jpeg if wants_msgpack(request) else encoded.base64
+        return negotiated_response(request, {"frame": frame_data, **response})
     except HTTPException:
         raise
     except Exception as e:
@@ -319,6 +689,120 @@ async def process_activity_frame():
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error processing frame: {str(e)}")
 
+@router.websocket("/activity-guide/ws")
+async def activity_guide_ws(websocket: WebSocket, camera_id: Optional[str] = None,
+                            stream_format: str = Query("json", alias="format"), mode: str = MODE_FRAME):
+    """Server-push activity guide: replaces polling /activity-guide/process-frame.
+    
+    The server runs the pipeline on the newest frame as fast as inference allows. It pushes
+    {"type": "guidance", ...} whenever the guidance or detections change, and the annotated
+    frame at most ACTIVITY_WS_PREVIEW_FPS times a second ({"type": "frame", ...} messages, or
+    binary messages with ?format=binary, same layout as /camera/stream).
+    
+    With ?mode=metadata nothing is rendered or encoded: each inference is pushed as
+    {"type": "detections", ...} for the client to overlay on its /camera/stream preview.
+    """
+    camera_manager = get_camera_manager()
+    if not camera_manager.has(camera_id):
+        await websocket.close(code=1008, reason=f"Unknown camera: {camera_id}")
+        return
+    if stream_format not in STREAM_FORMATS:
+        await websocket.close(code=1008, reason=f"Unknown stream format: {stream_format}")
+        return
+    if mode not in RESPONSE_MODES:
+        await websocket.close(code=1008, reason=f"Unknown mode: {mode}")
+        return
+    try:
+        get_pipeline_camera(camera_id)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    await websocket.accept()
+    camera_service = camera_manager.get(camera_id)
+    activity_guide_service = get_activity_guide_service()
+    render = mode == MODE_FRAME
+    if camera_service.source_type == "file" and camera_service.playback_mode == PLAYBACK_FAST:
+        # Fast replays wait for queue subscribers, so this connection processes every frame
+        subscription = camera_service.subscribe("activity-guide-ws", policy=POLICY_QUEUE, maxsize=2)
+    else:
+        subscription = camera_service.subscribe("activity-guide-ws")
+    binary = stream_format == FORMAT_BINARY
+    preview_interval = 1.0 / ACTIVITY_WS_PREVIEW_FPS
+    
+    async def run_pipeline():
+        last_state = None
+        last_frame_sent = 0.0
+        while True:
+            # Newest frame not processed yet; frames that arrived during inference are skipped
+            # (except during fast replays, see above)
+            captured = await subscription.next(timeout=FRAME_WAIT_TIMEOUT_SEC)
+            frame = captured.image if captured is not None else None
+            if frame is None:
+                await websocket.send_json({"type": "error", "error": "No frame available"})
+                continue
+            
+            async with _activity_pipeline_lock:
+                result = await activity_guide_service.process_frame(frame, views=captured.views, render=render)
+            
+            state = activity_guidance_state(result)
+            if state != last_state:
+                last_state = state
+                await websocket.send_json({
+                    "type": "guidance", "seq": captured.seq, "timestamp": captured.timestamp, **state
+                })
+            
+            if not render:
+                # Skipped inferences repeat the previous detections; the client keeps its overlay
+                if not result.get("inference_skipped"):
+                    await websocket.send_json({"type": "detections", **activity_metadata(captured, result)})
+                continue
+            if time.time() - last_frame_sent < preview_interval:
+                continue
+            encoded = encode_activity_frame(camera_service, captured, result)
+            if encoded is None:
+                continue
+            last_frame_sent = time.time()
+            if binary:
+                await websocket.send_bytes(pack_frame(
+                    encoded.jpeg, captured.seq, captured.timestamp, encoded.width, encoded.height
+                ))
+            else:
+                await websocket.send_json({
+                    "type": "frame",
+                    "data": encoded.base64,
+                    "timestamp": captured.timestamp,
+                    "seq": captured.seq
+                })
+    
+    async def receive():
+        # Nothing is expected from the client; this notices the disconnect while inference runs
+        while True:
+            await websocket.receive_text()
+    
+    tasks = []
+    try:
+        if binary:
+            await websocket.send_json({"type": "hello", "format": FORMAT_BINARY, "protocol": describe_protocol()})
+        
+        tasks = [asyncio.create_task(run_pipeline()), asyncio.create_task(receive())]
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        print("Client disconnected from activity guide stream")
+    except Exception as e:
+        print(f"Error in activity guide stream: {e}")
+        import traceback
+        traceback.print_exc()
+        try:
+            await websocket.close()
+        except:
+            pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
+
 @router.post("/activity-guide/feedback")
 async def submit_feedback(request: FeedbackRequest):
     """Submit feedback for activity guide"""
@@ -362,49 +846,140 @@ async def set_camera_orientation(request: CameraOrientationRequest):
 # ==================== Scene Description Endpoints ====================
 
 @router.post("/scene-description/start-recording")
-async def start_recording():
-    """Start scene description recording"""
+async def start_recording(camera_id: Optional[str] = None):
+    """Start scene description recording.
+    
+    Analysis then runs server-side on the camera (set SCENE_MONITOR_ENABLED=false to rely on
+    clients polling /scene-description/process-frame instead); results are pushed to
+    /scene-description/events. The response's last_event_id is the event just before the
+    recording's start event; open the events stream from it to miss nothing.
+    """
+    camera_service = get_pipeline_camera(camera_id)
     try:
         scene_description_service = get_scene_description_service()
         result = await scene_description_service.start_recording()
-        return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if result.get("status") == "success":
+        result["last_event_id"] = _scene_event_log.last_id
+        _scene_event_log.publish(EVENT_RECORDING, {
+            "is_recording": True, "camera_id": camera_service.camera_id, "log_filename": result.get("log_filename")
+        })
+        if os.environ.get("SCENE_MONITOR_ENABLED", "true").lower() != "false":
+            await get_scene_monitor().start(camera_service)
+    return result
 
 @router.post("/scene-description/stop-recording")
 async def stop_recording():
     """Stop scene description recording and save log"""
     try:
         scene_description_service = get_scene_description_service()
-        result = await scene_description_service.stop_recording()
-        return result
+        if _scene_monitor is not None:
+            # Waits for the frame being analyzed, so its descriptions are published and logged
+            await _scene_monitor.stop()
+        async with _scene_pipeline_lock:
+            result = await scene_description_service.stop_recording()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if result.get("status") == "success":
+        # Captions that were still in flight when recording stopped
+        _scene_event_log.publish_result({"descriptions": result.get("descriptions", [])})
+        _scene_event_log.publish(EVENT_RECORDING, {"is_recording": False, "log_id": result.get("log_id")})
+    return result
 
 @router.post("/scene-description/process-frame")
-async def process_scene_frame():
-    """Process a frame for scene description mode"""
-    camera_service = get_camera_service()
+async def process_scene_frame(request: Request, camera_id: Optional[str] = None):
+    """Process a frame for scene description mode.
+    With "Accept: application/msgpack" the response is msgpack and "frame" holds the raw JPEG bytes."""
     scene_description_service = get_scene_description_service()
-    frame = await camera_service.get_frame()
-    if frame is None:
-        raise HTTPException(status_code=404, detail="No frame available")
+    camera_service = get_pipeline_camera(camera_id)
     
-    result = await scene_description_service.process_frame(frame)
+    if is_scene_monitored(camera_service):
+        async def render_status(captured):
+            return scene_description_service.render_status(captured.image)
+        
+        captured, result = await run_polled_pipeline(
+            "scene-description", camera_service, "status", _scene_status_lock, render_status
+        )
+    else:
+        async def process(captured):
+            result = await scene_description_service.process_frame(captured.image, views=captured.views)
+            _scene_event_log.publish_result(result)
+            return result
+        
+        captured, result = await run_polled_pipeline(
+            "scene-description", camera_service, MODE_FRAME, _scene_pipeline_lock, process
+        )
     
     # Encode processed frame
-    processed_frame = result.get("annotated_frame", frame)
-    _, buffer = cv2.imencode('.jpg', processed_frame)
-    frame_bytes = buffer.tobytes()
-    frame_base64 = base64.b64encode(frame_bytes).decode()
+    processed_frame = result.get("annotated_frame", captured.image)
+    annotation_version = result.setdefault("annotation_version", next(_annotation_versions))
+    encoded = camera_service.encode_frame(
+        captured, image=processed_frame, annotation=("scene", annotation_version), quality=90
+    )
+    if encoded is None:
+        raise HTTPException(status_code=500, detail="Failed to encode frame")
     
-    return {
-        "frame": frame_base64,
+    return negotiated_response(request, {
+        "frame": encoded.jpeg if wants_msgpack(request) else encoded.base64,
         "description": result.get("description"),
         "summary": result.get("summary"),
         "safety_alert": result.get("safety_alert", False),
         "is_recording": result.get("is_recording", False)
-    }
+    })
+
+def _format_sse(event_type: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+@router.get("/scene-description/events")
+async def scene_description_events(request: Request, last_event_id: Optional[int] = None):
+    """Server-sent events with scene descriptions, summaries, risk changes, alerts and
+    recording start/stop.
+    
+    Reconnecting clients get the events they missed from the Last-Event-ID header (or the
+    last_event_id query parameter) as long as they're still buffered; a "gap" event says when
+    some were already dropped. The first message is an unnumbered "status" snapshot.
+    """
+    header_id = request.headers.get("last-event-id")
+    if header_id is not None:
+        try:
+            last_event_id = int(header_id)
+        except ValueError:
+            last_event_id = None
+    
+    async def event_stream():
+        scene_description_service = get_scene_description_service()
+        yield "retry: 3000\n\n"
+        yield _format_sse("status", {
+            "is_recording": scene_description_service.is_recording,
+            "risk_score": scene_description_service.current_risk_score,
+            "last_event_id": _scene_event_log.last_id,
+            "monitor": _scene_monitor.get_stats() if _scene_monitor is not None else None,
+            "captioning": scene_description_service.caption_worker.get_stats()
+        })
+        if _scene_event_log.missed(last_event_id):
+            yield _format_sse("gap", {"last_event_id": last_event_id})
+        
+        sent_id = _scene_event_log.last_id if last_event_id is None else min(last_event_id, _scene_event_log.last_id)
+        events = _scene_event_log.events_after(last_event_id)
+        while True:
+            for event in events:
+                yield _format_sse(event["type"], {"time": event["time"], **event["data"]}, event["id"])
+                sent_id = event["id"]
+            if await request.is_disconnected():
+                break
+            events = await _scene_event_log.wait(sent_id, timeout=SCENE_EVENTS_KEEPALIVE_SEC)
+            if not events:
+                yield ": keepalive\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/scene-description/logs")
 async def get_recording_logs():
@@ -0,0 +1,103 @@
+"""
+Serialization micro-benchmark for the process-frame responses
+
+Compares FastAPI's default path (jsonable_encoder + json.dumps), orjson and msgpack
+on a payload shaped like /activity-guide/process-frame.
+
+Usage: python benchmark_serialization.py [--iterations 2000]
+"""
+
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from utils.frame_cache import EncodedFrame
+from utils.responses import MSGPACK_AVAILABLE, ORJSON_AVAILABLE, dumps_json, dumps_msgpack
+
+
+def build_payload(jpeg: bytes, as_bytes: bool = False, numpy_boxes: bool = False) -> dict:
+    rng = np.random.default_rng(0)
+    boxes = rng.uniform(0, 640, size=(8, 4)).astype(np.float32)
+    landmarks = rng.uniform(0, 1, size=(2, 21, 3)).astype(np.float32)
+    names = ["cup", "bottle", "cell phone", "book", "remote", "keyboard", "mouse", "chair"]
+    return {
+        "frame": jpeg if as_bytes else EncodedFrame(jpeg).base64,
+        "guidance": {"instruction": "Move your hand slightly to the left.", "stage": "GUIDING_TO_PICKUP"},
+        "stage": "GUIDING_TO_PICKUP",
+        "instruction": "Move your hand slightly to the left.",
+        "detected_objects": [
+            {"name": name, "box": box if numpy_boxes else box.tolist()}
+            for name, box in zip(names, boxes)
+        ],
+        "hand_detected": True,
+        "detections": [
+            {"name": name, "class_id": i, "confidence": 0.87, "box": box if numpy_boxes else box.tolist(), "track_id": i}
+            for i, (name, box) in enumerate(zip(names, boxes))
+        ],
+        "hands": [
+            {"box": [100, 120, 220, 260], "landmarks": hand if numpy_boxes else hand.tolist()}
+            for hand in landmarks
+        ]
+    }
+
+
+def fastapi_default(content) -> bytes:
+    # What FastAPI does for a returned dict: jsonable_encoder, then JSONResponse.render
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def bench(name: str, fn, content, iterations: int):
+    fn(content)  # Warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = fn(content)
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed / iterations * 1e6
+    print(f"  {name:<38} {per_call_us:9.1f} µs/response  {len(body) / 1024:7.1f} KB")
+    return per_call_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+    
+    # A noisy frame compresses about as badly as a real camera frame
+    frame = np.random.default_rng(1).integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    frame = cv2.GaussianBlur(frame, (7, 7), 0)
+    jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+    
+    print(f"📊 Serialization benchmark ({args.iterations} iterations, {len(jpeg) / 1024:.1f} KB JPEG)")
+    print(f"   orjson: {'yes' if ORJSON_AVAILABLE else 'no (stdlib json fallback)'}, msgpack: {'yes' if MSGPACK_AVAILABLE else 'no'}")
+    
+    for with_frame in (True, False):
+        print(f"\n{'With base64 frame' if with_frame else 'Metadata only (?mode=metadata)'}:")
+        payload = build_payload(jpeg)
+        if not with_frame:
+            payload.pop("frame")
+        baseline = bench("FastAPI default (jsonable_encoder)", fastapi_default, payload, args.iterations)
+        fast = bench("dumps_json (lists)", dumps_json, payload, args.iterations)
+        
+        numpy_payload = build_payload(jpeg, numpy_boxes=True)
+        if not with_frame:
+            numpy_payload.pop("frame")
+        bench("dumps_json (numpy arrays, no tolist)", dumps_json, numpy_payload, args.iterations)
+        
+        if MSGPACK_AVAILABLE:
+            binary_payload = build_payload(jpeg, as_bytes=True)
+            if not with_frame:
+                binary_payload.pop("frame")
+            bench("dumps_msgpack (raw JPEG bytes)", dumps_msgpack, binary_payload, args.iterations)
+        print(f"  → dumps_json is {baseline / fast:.1f}x faster than the default encoder")
+
+
+if __name__ == "__main__":
+    main()
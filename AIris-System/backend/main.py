@@ -15,8 +15,9 @@ from dotenv import load_dotenv
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
-from api.routes import router, set_global_services
-from services.camera_service import CameraService
+from api.routes import router, set_global_services, shutdown_services
+from services.camera_manager import CameraManager
+from services.device_registry import get_device_registry
 from services.model_service import ModelService
 from services.email_service import get_email_service
 
@@ -51,7 +52,7 @@ else:
     print(f"   Checked paths: {[str(p) for p in env_paths]}")
 
 # Global services
-camera_service = CameraService()
+camera_manager = CameraManager()
 model_service = ModelService()
 scheduler = AsyncIOScheduler()
 
@@ -83,7 +84,11 @@ async def lifespan(app: FastAPI):
     print("Initializing AIris backend...")
     await model_service.initialize()
     # Set global services in routes module
-    set_global_services(camera_service, model_service)
+    set_global_services(camera_manager, model_service)
+    
+    # Enumerate cameras once and keep the cache fresh in the background (used by /health)
+    device_registry = get_device_registry()
+    await device_registry.start()
     
     # Initialize email service
     email_service = get_email_service()
@@ -126,7 +131,9 @@ async def lifespan(app: FastAPI):
     # Shutdown
     print("Shutting down AIris backend...")
     scheduler.shutdown(wait=False)
-    await camera_service.cleanup()
+    await device_registry.stop()
+    await camera_manager.cleanup()
+    await shutdown_services()
     await model_service.cleanup()
 
 app = FastAPI(
@@ -156,8 +163,10 @@ async def root():
 async def health_check():
     return {
         "status": "healthy",
-        "camera_available": camera_service.is_available(),
-        "models_loaded": model_service.are_models_loaded()
+        "camera_available": camera_manager.get().is_available(),
+        "cameras": {camera.camera_id: camera.is_running() for camera in camera_manager.cameras()},
+        "models_loaded": model_service.are_models_loaded(),
+        "yolo_backend": model_service.get_yolo_backend()
     }
 
 if __name__ == "__main__":
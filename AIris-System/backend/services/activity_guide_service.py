@@ -5,16 +5,21 @@ Activity Guide Service - Handles activity guide mode logic
 import numpy as np
 import cv2
 import mediapipe as mp
+import asyncio
+import threading
 import time
 import re
 import ast
-from typing import Dict, List, Optional, Tuple, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Any
 from groq import Groq
 import os
 from PIL import ImageFont
 
 from services.model_service import ModelService
 from utils.frame_utils import draw_guidance_on_frame, load_font
+from utils.frame_views import FrameViews
+from utils.motion_gate import MotionGate
 
 class ActivityGuideService:
     def __init__(self, model_service: ModelService):
@@ -49,6 +54,30 @@ class ActivityGuideService:
         self.GUIDANCE_UPDATE_INTERVAL_SEC = 3
         self.POST_SPEECH_DELAY_SEC = 3
         
+        # Change detection in front of YOLO/MediaPipe - unchanged frames reuse the last results
+        self.motion_gate = MotionGate(
+            change_threshold=float(os.environ.get("MOTION_GATE_THRESHOLD", "0.01")),
+            keyframe_interval=int(os.environ.get("MOTION_GATE_KEYFRAME_INTERVAL", "15"))
+        )
+        self.motion_gate.enabled = os.environ.get("MOTION_GATE_ENABLED", "true").lower() != "false"
+        self._last_inference: Optional[Dict[str, Any]] = None
+        
+        # YOLO and MediaPipe run in parallel on a dedicated pool (both release the GIL for most
+        # of their work), so a frame costs about max(YOLO, hands) instead of their sum.
+        # Neither model is thread-safe (the tracker keeps state between frames), so each
+        # is only ever run by one thread at a time.
+        self.INFERENCE_WORKERS = int(os.environ.get("ACTIVITY_INFERENCE_WORKERS", "2"))
+        self.inference_executor = ThreadPoolExecutor(
+            max_workers=self.INFERENCE_WORKERS, thread_name_prefix="activity-inference"
+        )
+        self._yolo_lock = threading.Lock()
+        self._hand_lock = threading.Lock()
+        
+        # Per-stage timings in ms: the last processed frame and a moving average
+        self.last_timings: Dict[str, float] = {}
+        self.avg_timings: Dict[str, float] = {}
+        self.frames_timed = 0
+        
         # Font path
         self.FONT_PATH = os.path.join(os.path.dirname(__file__), '..', 'RobotoCondensed-Regular.ttf')
         if not os.path.exists(self.FONT_PATH):
@@ -286,35 +315,32 @@ class ActivityGuideService:
             "stage": self.guidance_stage
         }
     
-    async def process_frame(self, frame: np.ndarray) -> Dict[str, Any]:
-        """Process a frame for activity guide - always shows YOLO boxes and hand tracking"""
+    async def process_frame(self, frame: np.ndarray, views: Optional[FrameViews] = None,
+                            render: bool = True) -> Dict[str, Any]:
+        """Process a frame for activity guide - always shows YOLO boxes and hand tracking.
+        `views` carries the frame's shared derived views (e.g. the RGB copy for MediaPipe).
+        With render=False nothing is drawn ("annotated_frame" is None); clients overlay the
+        "detections" and "hands" metadata on their own preview instead."""
+        if views is None:
+            views = FrameViews(frame)
         yolo_model = self.model_service.get_yolo_model()
         hand_model = self.model_service.get_hand_model()
+        frame_start = time.perf_counter()
+        timings = {}
         
         if yolo_model is None:
             # Even without YOLO, try to show hand tracking if available
-            annotated_frame = frame.copy()
-            detected_hands = []
-            if hand_model is not None:
-                try:
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    mp_results = hand_model.process(rgb_frame)
-                    if mp_results.multi_hand_landmarks:
-                        for hand_landmarks in mp_results.multi_hand_landmarks:
-                            h, w, _ = frame.shape
-                            coords = [(lm.x, lm.y) for lm in hand_landmarks.landmark]
-                            x_min, y_min = np.min(coords, axis=0)
-                            x_max, y_max = np.max(coords, axis=0)
-                            current_hand_box = [int(x_min * w), int(y_min * h), int(x_max * w), int(y_max * h)]
-                            detected_hands.append({'box': current_hand_box})
-                            mp.solutions.drawing_utils.draw_landmarks(
-                                annotated_frame, hand_landmarks, mp.solutions.hands.HAND_CONNECTIONS
-                            )
-                except Exception as e:
-                    print(f"Error processing hand detection: {e}")
-            
-            custom_font = load_font(self.FONT_PATH, size=24)
-            annotated_frame = draw_guidance_on_frame(annotated_frame, self.current_instruction, custom_font)
+            (hand_landmarks_list, detected_hands), timings["hands_ms"] = await self._run_in_pool(
+                self._detect_hands, frame, hand_model, views
+            )
+            annotated_frame = None
+            if render:
+                annotated_frame = frame.copy()
+                self._draw_hands(annotated_frame, hand_landmarks_list)
+                custom_font = load_font(self.FONT_PATH, size=24)
+                annotated_frame = draw_guidance_on_frame(annotated_frame, self.current_instruction, custom_font)
+            timings["total_ms"] = (time.perf_counter() - frame_start) * 1000
+            self._record_timings(timings)
             
             return {
                 "annotated_frame": annotated_frame,
@@ -322,65 +348,47 @@ class ActivityGuideService:
                 "stage": self.guidance_stage,
                 "instruction": "YOLO model not loaded",
                 "detected_objects": [],
-                "hand_detected": len(detected_hands) > 0
+                "hand_detected": len(detected_hands) > 0,
+                "detections": [],
+                "hands": self._hand_metadata(hand_landmarks_list, detected_hands),
+                "timings": {stage: round(ms, 1) for stage, ms in timings.items()}
             }
         
-        # Run YOLO detection with tracking (always show boxes)
-        # Use the device determined during model initialization (optimized for M1 Mac)
-        device = self.model_service.get_yolo_device()
+        # Skip both models when the scene hasn't changed since the last processed frame.
+        # The previous detections are re-drawn and the tracker state is left untouched.
+        scene_changed = self.motion_gate.should_process(frame, gray=views.gray)
+        cached = self._last_inference
+        reuse = (
+            not scene_changed and cached is not None and
+            cached["confidence"] == self.CONFIDENCE_THRESHOLD and
+            cached["shape"] == frame.shape
+        )
         
-        try:
-            yolo_results = yolo_model.track(
-                frame,
-                persist=True,
-                conf=self.CONFIDENCE_THRESHOLD,
-                verbose=False,
-                device=device,  # Use device determined during initialization (MPS on M1/M2 if available)
-                tracker="botsort.yaml"
+        if reuse:
+            yolo_results = cached["yolo_results"]
+            hand_landmarks_list = cached["hand_landmarks"]
+            detected_hands = cached["detected_hands"]
+            annotated_frame = None
+            if render:
+                annotated_frame = yolo_results[0].plot(line_width=2, img=frame)
+                self._draw_hands(annotated_frame, hand_landmarks_list)
+        else:
+            yolo_results, annotated_frame, hand_landmarks_list, detected_hands = await self._run_models(
+                frame, yolo_model, hand_model, views, timings, render=render
             )
-            # Plot YOLO boxes on frame
-            annotated_frame = yolo_results[0].plot(line_width=2)
-        except Exception as e:
-            print(f"Error running YOLO tracking: {e}")
-            # Fallback: use predict instead of track
-            try:
-                yolo_results = yolo_model.predict(
-                    frame,
-                    conf=self.CONFIDENCE_THRESHOLD,
-                    verbose=False,
-                    device=device
-                )
-                annotated_frame = yolo_results[0].plot(line_width=2)
-            except Exception as e2:
-                print(f"Error with YOLO predict fallback: {e2}")
-                # Last resort: just return the frame
-                annotated_frame = frame.copy()
-        
-        # Detect hands (if hand model is available)
-        detected_hands = []
-        if hand_model is not None:
-            try:
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                mp_results = hand_model.process(rgb_frame)
-                
-                if mp_results.multi_hand_landmarks:
-                    for hand_landmarks in mp_results.multi_hand_landmarks:
-                        h, w, _ = frame.shape
-                        coords = [(lm.x, lm.y) for lm in hand_landmarks.landmark]
-                        x_min, y_min = np.min(coords, axis=0)
-                        x_max, y_max = np.max(coords, axis=0)
-                        current_hand_box = [int(x_min * w), int(y_min * h), int(x_max * w), int(y_max * h)]
-                        detected_hands.append({'box': current_hand_box})
-                        mp.solutions.drawing_utils.draw_landmarks(
-                            annotated_frame, hand_landmarks, mp.solutions.hands.HAND_CONNECTIONS
-                        )
-            except Exception as e:
-                print(f"Error processing hand detection: {e}")
-                detected_hands = []
+            self._last_inference = None
+            if yolo_results is not None:
+                self._last_inference = {
+                    "yolo_results": yolo_results,
+                    "hand_landmarks": hand_landmarks_list,
+                    "detected_hands": detected_hands,
+                    "confidence": self.CONFIDENCE_THRESHOLD,
+                    "shape": frame.shape
+                }
         
         # Get detected objects
         detected_objects = {}
-        if yolo_results[0].boxes is not None and len(yolo_results[0].boxes) > 0:
+        if yolo_results is not None and yolo_results[0].boxes is not None and len(yolo_results[0].boxes) > 0:
             for box, cls in zip(yolo_results[0].boxes.xyxy, yolo_results[0].boxes.cls):
                 obj_name = yolo_model.names[int(cls)]
                 detected_objects[obj_name] = box.cpu().numpy().tolist()
@@ -394,7 +402,9 @@ class ActivityGuideService:
         )
         
         if should_update:
+            guidance_start = time.perf_counter()
             await self._update_guidance(frame, detected_objects, detected_hands, yolo_model)
+            timings["guidance_ms"] = (time.perf_counter() - guidance_start) * 1000
         
         # Check if hand has reached object and trigger confirmation (similar to Merged_System)
         # This check runs every frame to immediately detect when stage changes to confirmation
@@ -408,20 +418,11 @@ class ActivityGuideService:
                 self._update_instruction(confirmation_text)
                 self.guidance_stage = 'AWAITING_FEEDBACK'
         
-        # Draw target object box (highlight in yellow/cyan)
-        if self.found_object_location and self.guidance_stage == 'GUIDING_TO_PICKUP':
-            box = self.found_object_location
-            cv2.rectangle(
-                annotated_frame,
-                (int(box[0]), int(box[1])),
-                (int(box[2]), int(box[3])),
-                (0, 255, 255),  # Yellow in BGR
-                3
-            )
+        if render:
+            annotated_frame = self._draw_task_overlay(annotated_frame)
         
-        # Draw guidance text on frame
-        custom_font = load_font(self.FONT_PATH, size=24)
-        annotated_frame = draw_guidance_on_frame(annotated_frame, self.current_instruction, custom_font)
+        timings["total_ms"] = (time.perf_counter() - frame_start) * 1000
+        self._record_timings(timings)
         
         return {
             "annotated_frame": annotated_frame,
@@ -437,9 +438,165 @@ class ActivityGuideService:
             ],
             "hand_detected": len(detected_hands) > 0,
             "object_location": self.found_object_location,
-            "hand_location": detected_hands[0]['box'] if detected_hands else None
+            "hand_location": detected_hands[0]['box'] if detected_hands else None,
+            "inference_skipped": reuse,
+            "detections": self._detection_metadata(yolo_results, yolo_model),
+            "hands": self._hand_metadata(hand_landmarks_list, detected_hands),
+            "timings": {stage: round(ms, 1) for stage, ms in timings.items()}
         }
     
+    def render_overlay(self, frame: np.ndarray) -> np.ndarray:
+        """Draw the latest detections and guidance on a frame without running the pipeline
+        (no inference, tracking, motion gate or guidance updates), e.g. for preview streams"""
+        cached = self._last_inference
+        if cached is not None and cached["shape"] == frame.shape:
+            annotated_frame = cached["yolo_results"][0].plot(line_width=2, img=frame)
+            self._draw_hands(annotated_frame, cached["hand_landmarks"])
+        else:
+            annotated_frame = frame.copy()
+        return self._draw_task_overlay(annotated_frame)
+    
+    def _draw_task_overlay(self, annotated_frame: np.ndarray) -> np.ndarray:
+        """Draw the target object box and the guidance text"""
+        # Draw target object box (highlight in yellow/cyan)
+        if self.found_object_location and self.guidance_stage == 'GUIDING_TO_PICKUP':
+            box = self.found_object_location
+            cv2.rectangle(
+                annotated_frame,
+                (int(box[0]), int(box[1])),
+                (int(box[2]), int(box[3])),
+                (0, 255, 255),  # Yellow in BGR
+                3
+            )
+        
+        # Draw guidance text on frame
+        custom_font = load_font(self.FONT_PATH, size=24)
+        return draw_guidance_on_frame(annotated_frame, self.current_instruction, custom_font)
+    
+    async def _run_in_pool(self, fn: Callable, *args) -> Tuple[Any, float]:
+        """Run fn(*args) on the inference pool. Returns (result, duration in ms)."""
+        def timed():
+            start = time.perf_counter()
+            result = fn(*args)
+            return result, (time.perf_counter() - start) * 1000
+        return await asyncio.get_running_loop().run_in_executor(self.inference_executor, timed)
+    
+    def _record_timings(self, timings: Dict[str, float]):
+        self.last_timings = timings
+        for stage, ms in timings.items():
+            average = self.avg_timings.get(stage)
+            self.avg_timings[stage] = ms if average is None else 0.8 * average + 0.2 * ms
+        self.frames_timed += 1
+    
+    async def _run_models(self, frame: np.ndarray, yolo_model, hand_model, views: FrameViews,
+                          timings: Dict[str, float], render: bool = True) -> Tuple[Any, Optional[np.ndarray], List, List]:
+        """Run YOLO tracking and hand detection on a frame, in parallel on the inference pool.
+        Stage durations are added to `timings`.
+        Returns (yolo_results or None, annotated_frame (None unless render), hand_landmarks_list, detected_hands)."""
+        inference_start = time.perf_counter()
+        (yolo_results, timings["yolo_ms"]), ((hand_landmarks_list, detected_hands), timings["hands_ms"]) = await asyncio.gather(
+            self._run_in_pool(self._run_yolo, frame, yolo_model),
+            self._run_in_pool(self._detect_hands, frame, hand_model, views)
+        )
+        timings["inference_ms"] = (time.perf_counter() - inference_start) * 1000
+        
+        annotated_frame = None
+        if render:
+            render_start = time.perf_counter()
+            # Plot YOLO boxes on frame (last resort: just the frame)
+            annotated_frame = yolo_results[0].plot(line_width=2) if yolo_results is not None else frame.copy()
+            self._draw_hands(annotated_frame, hand_landmarks_list)
+            timings["render_ms"] = (time.perf_counter() - render_start) * 1000
+        return yolo_results, annotated_frame, hand_landmarks_list, detected_hands
+    
+    def _run_yolo(self, frame: np.ndarray, yolo_model):
+        """Run YOLO detection with tracking (predict if tracking fails) on the inference pool.
+        Returns the results or None."""
+        # Use the device determined during model initialization (optimized for M1 Mac)
+        device = self.model_service.get_yolo_device()
+        
+        with self._yolo_lock:
+            try:
+                return yolo_model.track(
+                    frame,
+                    persist=True,
+                    conf=self.CONFIDENCE_THRESHOLD,
+                    verbose=False,
+                    device=device,  # Use device determined during initialization (MPS on M1/M2 if available)
+                    tracker="botsort.yaml"
+                )
+            except Exception as e:
+                print(f"Error running YOLO tracking: {e}")
+                # Fallback: use predict instead of track
+                try:
+                    return yolo_model.predict(
+                        frame,
+                        conf=self.CONFIDENCE_THRESHOLD,
+                        verbose=False,
+                        device=device
+                    )
+                except Exception as e2:
+                    print(f"Error with YOLO predict fallback: {e2}")
+                    return None
+    
+    def _detect_hands(self, frame: np.ndarray, hand_model, views: FrameViews) -> Tuple[List, List]:
+        """Run MediaPipe hands. Returns (hand_landmarks_list, detected_hands with boxes)."""
+        if hand_model is None:
+            return [], []
+        try:
+            with self._hand_lock:
+                mp_results = hand_model.process(views.rgb)
+            
+            hand_landmarks_list = list(mp_results.multi_hand_landmarks or [])
+            detected_hands = []
+            h, w, _ = frame.shape
+            for hand_landmarks in hand_landmarks_list:
+                coords = [(lm.x, lm.y) for lm in hand_landmarks.landmark]
+                x_min, y_min = np.min(coords, axis=0)
+                x_max, y_max = np.max(coords, axis=0)
+                current_hand_box = [int(x_min * w), int(y_min * h), int(x_max * w), int(y_max * h)]
+                detected_hands.append({'box': current_hand_box})
+            return hand_landmarks_list, detected_hands
+        except Exception as e:
+            print(f"Error processing hand detection: {e}")
+            return [], []
+    
+    def _detection_metadata(self, yolo_results, yolo_model) -> List[Dict[str, Any]]:
+        """YOLO boxes as plain data: name, class id, confidence, xyxy box and track id (None if untracked)"""
+        if yolo_results is None or yolo_results[0].boxes is None or len(yolo_results[0].boxes) == 0:
+            return []
+        boxes = yolo_results[0].boxes
+        xyxy = boxes.xyxy.cpu().numpy()
+        classes = boxes.cls.cpu().numpy().astype(int)
+        confidences = boxes.conf.cpu().numpy()
+        track_ids = boxes.id.cpu().numpy().astype(int).tolist() if boxes.id is not None else [None] * len(classes)
+        return [
+            {
+                "name": yolo_model.names[int(cls)],
+                "class_id": int(cls),
+                "confidence": round(float(conf), 3),
+                "box": [round(float(v), 1) for v in box],
+                "track_id": track_id
+            }
+            for box, cls, conf, track_id in zip(xyxy, classes, confidences, track_ids)
+        ]
+    
+    def _hand_metadata(self, hand_landmarks_list: List, detected_hands: List) -> List[Dict[str, Any]]:
+        """Hands as plain data: pixel box and the 21 landmarks as normalized [x, y, z]"""
+        return [
+            {
+                "box": hand["box"],
+                "landmarks": [[round(lm.x, 4), round(lm.y, 4), round(lm.z, 4)] for lm in hand_landmarks.landmark]
+            }
+            for hand_landmarks, hand in zip(hand_landmarks_list, detected_hands)
+        ]
+    
+    def _draw_hands(self, annotated_frame: np.ndarray, hand_landmarks_list: List):
+        for hand_landmarks in hand_landmarks_list:
+            mp.solutions.drawing_utils.draw_landmarks(
+                annotated_frame, hand_landmarks, mp.solutions.hands.HAND_CONNECTIONS
+            )
+    
     async def _update_guidance(self, frame: np.ndarray, detected_objects: Dict, detected_hands: List, yolo_model):
         """Update guidance based on current state"""
         primary_target = self.target_objects[0] if self.target_objects else None
@@ -914,9 +1071,21 @@ class ActivityGuideService:
             "current_instruction": self.current_instruction,
             "target_objects": self.target_objects,
             "instruction_history": self.instruction_history[-10:],  # Last 10 instructions
-            "camera_facing_towards_user": self.camera_facing_towards_user
+            "camera_facing_towards_user": self.camera_facing_towards_user,
+            "motion_gate": self.motion_gate.get_stats(),
+            "timings": {
+                "last": {stage: round(ms, 1) for stage, ms in self.last_timings.items()},
+                "average": {stage: round(ms, 1) for stage, ms in self.avg_timings.items()},
+                "frames": self.frames_timed,
+                "inference_workers": self.INFERENCE_WORKERS
+            }
         }
     
+    async def cleanup(self):
+        """Shut down the inference pool, waiting for the models to finish the frame in progress"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: self.inference_executor.shutdown(wait=True, cancel_futures=True))
+    
     def reset(self):
         """Reset activity guide state"""
         self.guidance_stage = "IDLE"
@@ -928,6 +1097,8 @@ class ActivityGuideService:
         self.task_done_displayed = False
         self.object_last_seen_time = None
         self.object_disappeared_notified = False
+        self.motion_gate.reset()
+        self._last_inference = None
         
         # Reset feedback tracking and adaptive thresholds
         self.failed_attempts = 0
@@ -0,0 +1,89 @@
+"""
+Camera Manager - Hosts any number of named camera sources
+"""
+
+import asyncio
+import re
+from typing import Any, Dict, List, Optional
+
+from services.camera_service import CameraService
+
+DEFAULT_CAMERA_ID = "default"
+
+
+class CameraManager:
+    """Registry of independent camera sources, each with its own capture thread and frame bus.
+    
+    The "default" camera always exists so single-camera clients keep working
+    without passing a camera_id.
+    """
+    
+    def __init__(self, default_camera: Optional[CameraService] = None):
+        self._cameras: Dict[str, CameraService] = {
+            DEFAULT_CAMERA_ID: default_camera or CameraService(DEFAULT_CAMERA_ID)
+        }
+    
+    @staticmethod
+    def _normalize_id(camera_id: Optional[str]) -> str:
+        return camera_id or DEFAULT_CAMERA_ID
+    
+    def get(self, camera_id: Optional[str] = None) -> CameraService:
+        """Get an existing camera source. Raises KeyError if it doesn't exist."""
+        camera_id = self._normalize_id(camera_id)
+        camera = self._cameras.get(camera_id)
+        if camera is None:
+            raise KeyError(f"Unknown camera: {camera_id}")
+        return camera
+    
+    def get_or_create(self, camera_id: Optional[str] = None) -> CameraService:
+        """Get a camera source, creating it (stopped, webcam by default) if needed"""
+        camera_id = self._normalize_id(camera_id)
+        camera = self._cameras.get(camera_id)
+        if camera is None:
+            if not re.fullmatch(r"[A-Za-z0-9_.-]{1,64}", camera_id):
+                raise ValueError("camera_id may only contain letters, digits, '.', '_' and '-'")
+            camera = CameraService(camera_id)
+            self._cameras[camera_id] = camera
+            print(f"📷 Added camera source '{camera_id}'")
+        return camera
+    
+    def has(self, camera_id: Optional[str]) -> bool:
+        return self._normalize_id(camera_id) in self._cameras
+    
+    def list_ids(self) -> List[str]:
+        return list(self._cameras.keys())
+    
+    def cameras(self) -> List[CameraService]:
+        return list(self._cameras.values())
+    
+    async def remove(self, camera_id: str):
+        """Stop a camera source and forget it. The default camera can't be removed."""
+        if camera_id == DEFAULT_CAMERA_ID:
+            raise ValueError("The default camera can't be removed")
+        camera = self._cameras.pop(camera_id, None)
+        if camera is None:
+            raise KeyError(f"Unknown camera: {camera_id}")
+        await camera.cleanup()
+        print(f"📷 Removed camera source '{camera_id}'")
+    
+    def get_summary(self, camera_id: Optional[str] = None) -> Dict[str, Any]:
+        """Short per-camera status for listings"""
+        camera = self.get(camera_id)
+        link = camera.get_link_stats()
+        return {
+            "camera_id": camera.camera_id,
+            "source_type": camera.source_type,
+            "ip_address": camera.ip_address or None,
+            "device_index": camera.device_index,
+            "is_running": camera.is_running(),
+            "frame_seq": camera.get_frame_seq(),
+            "effective_fps": link["effective_fps"],
+            "subscribers": len(camera.frame_bus.get_stats()["subscribers"])
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {camera_id: self.get_summary(camera_id) for camera_id in self.list_ids()}
+    
+    async def cleanup(self):
+        """Stop every camera source"""
+        await asyncio.gather(*(camera.cleanup() for camera in self.cameras()), return_exceptions=True)
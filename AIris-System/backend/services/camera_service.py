@@ -4,29 +4,235 @@ Camera Service - Handles camera operations
 
 import cv2
 import asyncio
-from typing import Optional
-import time
+import threading
+import numpy as np
+import json
+import os
 from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+import time
+
+from services.device_registry import DeviceRegistry, get_device_registry
+from services.file_source import (
+    FileFrameSource, PLAYBACK_FIXED, PLAYBACK_MODES, PLAYBACK_REALTIME
+)
+from services.frame_bus import FrameBus, FrameSubscription, POLICY_LATEST
+from services.mjpeg_client import MJPEGStreamClient
+from utils.frame_cache import EncodedFrame, EncodedFrameCache
+from utils.frame_views import FrameViews
+from utils.stream_protocol import jpeg_dimensions
+
+
+class CapturedFrame:
+    """A captured frame tagged with its capture sequence number.
+    
+    Sources that deliver JPEG (the ESP32 MJPEG stream) keep the camera's original bytes in
+    `jpeg` and only decode `image` the first time a consumer asks for it.
+    """
+    
+    def __init__(self, seq: int, timestamp: float, image: Optional[np.ndarray] = None,
+                 jpeg: Optional[bytes] = None, media_timestamp: Optional[float] = None):
+        self.seq = seq
+        self.timestamp = timestamp
+        # Original timestamp for replayed (file) frames, None for live sources
+        self.media_timestamp = media_timestamp
+        self.jpeg = jpeg
+        self._image = image
+        self._decode_lock = threading.Lock()
+        self._views: Optional[FrameViews] = None
+    
+    @property
+    def image(self) -> Optional[np.ndarray]:
+        """Decoded BGR frame (None if the JPEG could not be decoded)"""
+        if self._image is None and self.jpeg is not None:
+            with self._decode_lock:
+                if self._image is None:
+                    self._image = cv2.imdecode(np.frombuffer(self.jpeg, np.uint8), cv2.IMREAD_COLOR)
+        return self._image
+    
+    @property
+    def views(self) -> FrameViews:
+        """Derived views (rgb, gray, letterbox_640, square_384, resized), each computed once"""
+        if self._views is None:
+            with self._decode_lock:
+                if self._views is None:
+                    self._views = FrameViews(lambda: self.image)
+        return self._views
+    
+    @property
+    def dimensions(self) -> Tuple[int, int]:
+        """(width, height) without decoding JPEG frames; (0, 0) if unknown"""
+        if self._image is not None:
+            return self._image.shape[1], self._image.shape[0]
+        if self.jpeg is not None:
+            return jpeg_dimensions(self.jpeg) or (0, 0)
+        return 0, 0
+    
+    @property
+    def is_decoded(self) -> bool:
+        return self._image is not None
+    
+    def __repr__(self) -> str:
+        return f"CapturedFrame(seq={self.seq}, timestamp={self.timestamp}, jpeg={self.jpeg is not None})"
+
+
+class LinkMetrics:
+    """Rolling capture-link statistics (effective FPS, inter-frame jitter, throughput, reconnects)"""
+    
+    def __init__(self, window_sec: float = 5.0):
+        self.window_sec = window_sec
+        self._samples: deque = deque()  # (timestamp, bytes)
+        self._lock = threading.Lock()
+        self.state = "stopped"  # "stopped", "connecting", "streaming" or "reconnecting"
+        self.reconnects = 0
+        self.stalls = 0
+        self.last_error: Optional[str] = None
+        self.connected_since: Optional[float] = None
+    
+    def record_frame(self, timestamp: float, num_bytes: int = 0):
+        """Record a received frame (called from the capture thread)"""
+        with self._lock:
+            self._samples.append((timestamp, num_bytes))
+            cutoff = timestamp - self.window_sec
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+    
+    def set_state(self, state: str, error: Optional[str] = None):
+        self.state = state
+        if error is not None:
+            self.last_error = error
+        if state == "streaming":
+            self.connected_since = time.time()
+        else:
+            self.connected_since = None
+    
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+        self.state = "stopped"
+        self.reconnects = 0
+        self.stalls = 0
+        self.last_error = None
+        self.connected_since = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Summarise the rolling window"""
+        with self._lock:
+            samples = list(self._samples)
+        
+        fps = 0.0
+        jitter_ms = 0.0
+        bytes_per_sec = 0.0
+        if len(samples) >= 2:
+            span = samples[-1][0] - samples[0][0]
+            if span > 0:
+                fps = (len(samples) - 1) / span
+                bytes_per_sec = sum(b for _, b in samples[1:]) / span
+            intervals = np.diff([t for t, _ in samples])
+            jitter_ms = float(np.std(intervals) * 1000)
+        
+        return {
+            "state": self.state,
+            "effective_fps": round(fps, 2),
+            "jitter_ms": round(jitter_ms, 2),
+            "bytes_per_sec": int(bytes_per_sec),
+            "reconnects": self.reconnects,
+            "stalls": self.stalls,
+            "last_error": self.last_error,
+            "connected_for_sec": round(time.time() - self.connected_since, 1) if self.connected_since else 0.0
+        }
+
 
 class CameraService:
-    def __init__(self):
+    def __init__(self, camera_id: str = "default"):
+        self.camera_id = camera_id
         self.vid_cap: Optional[cv2.VideoCapture] = None
         self.is_running_flag = False
-        self.last_frame = None
         self.last_timestamp = None
-        self.source_type = "webcam"  # "webcam" or "esp32"
+        self.source_type = "webcam"  # "webcam", "esp32" or "file"
         self.ip_address = ""
-        # Frame buffer for ESP32 to smooth out frame rate
-        self.frame_buffer = deque(maxlen=2)  # Keep last 2 frames
+        
+        # File replay settings (source_type "file")
+        self.file_path: Optional[str] = None
+        self.playback_mode = PLAYBACK_REALTIME
+        self.playback_fps: Optional[float] = None
+        self.playback_loop = False
+        self.playback_stats: Dict[str, Any] = {}
+        # Replays are only read from under this directory (file_path comes from API clients)
+        self.REPLAY_DIR = os.path.realpath(os.environ.get(
+            "CAMERA_REPLAY_DIR", os.path.join(os.path.dirname(__file__), '..', 'recordings')
+        ))
+        
+        # Capture thread state - one reader per source, consumers only read the latest slot
+        self._capture_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._frame_lock = threading.Lock()
+        self._latest: Optional[CapturedFrame] = None
+        self._seq = 0
+        
+        # Fan-out of captured frames to pipelines and stream clients
+        self.frame_bus = FrameBus()
+        
+        # JPEG encodes shared by every endpoint that serves this camera's frames
+        self.encoded_frames = EncodedFrameCache()
+        
+        # ESP32 MJPEG client state (owned by the capture thread)
+        self._first_frame_event = threading.Event()
+        self._esp32_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._esp32_task: Optional[asyncio.Task] = None
+        self.ESP32_CONNECT_TIMEOUT_SEC = 5.0
+        
+        # ESP32 reconnect supervisor: exponential backoff and stall detection
+        self.RECONNECT_BACKOFF_MIN_SEC = 0.5
+        self.RECONNECT_BACKOFF_MAX_SEC = 10.0
+        self.STALL_TIMEOUT_SEC = 3.0
+        
+        # Link health, reported by /camera/status
+        self.link_metrics = LinkMetrics()
+        
+        # Cached device enumeration - availability checks never open the camera
+        self.device_registry: DeviceRegistry = get_device_registry()
+        self.device_index: Optional[int] = None
+        
+        # Webcam discovery: candidates are probed in parallel, the last working one first
+        self.WEBCAM_CANDIDATE_INDICES = [0, 1, 2]
+        self.WEBCAM_WARMUP_SEC = 0.5
+        state_path = os.environ.get(
+            "CAMERA_STATE_PATH", os.path.join(os.path.dirname(__file__), '..', 'camera_state.json')
+        )
+        if camera_id != "default":
+            root, ext = os.path.splitext(state_path)
+            state_path = f"{root}_{camera_id}{ext}"
+        self.WEBCAM_STATE_PATH = state_path
+        self.last_discovery: Dict[str, Any] = {}
     
-    async def set_config(self, source_type: str, ip_address: str = ""):
+    async def set_config(self, source_type: str, ip_address: str = "", file_path: Optional[str] = None,
+                         playback_mode: str = PLAYBACK_REALTIME, playback_fps: Optional[float] = None,
+                         loop: bool = False):
         """Set camera configuration"""
+        if source_type == "file":
+            if playback_mode not in PLAYBACK_MODES:
+                raise ValueError(f"playback_mode must be one of {', '.join(PLAYBACK_MODES)}")
+            file_path = self._resolve_replay_path(file_path)
         self.source_type = source_type
         self.ip_address = ip_address
+        self.file_path = file_path
+        self.playback_mode = playback_mode
+        self.playback_fps = playback_fps
+        self.playback_loop = loop
         # If running, we should stop so the next start uses the new config
         if self.is_running():
             await self.stop()
     
+    def _resolve_replay_path(self, file_path: Optional[str]) -> str:
+        """Resolve a replay path (relative paths are under REPLAY_DIR); rejects paths outside REPLAY_DIR"""
+        if not file_path:
+            raise ValueError("file_path is required for a file source")
+        resolved = os.path.realpath(os.path.join(self.REPLAY_DIR, file_path))
+        if os.path.commonpath([resolved, self.REPLAY_DIR]) != self.REPLAY_DIR:
+            raise ValueError(f"file_path must be inside the replay directory ({self.REPLAY_DIR})")
+        return resolved
+    
     async def start(self) -> bool:
         """Start the camera"""
         if self.is_running():
@@ -37,141 +243,459 @@ class CameraService:
                 print("ESP32 IP not set")
                 return False
             
-            # ESP32-CAM stream URL
-            stream_url = f"http://{self.ip_address}:80/stream"
+            # ESP32-CAM stream URL (port 80 unless the address already includes one)
+            host = self.ip_address if ":" in self.ip_address else f"{self.ip_address}:80"
+            stream_url = f"http://{host}/stream"
             print(f"Connecting to ESP32 stream: {stream_url}")
             
-            try:
-                # Run blocking VideoCapture in a thread
-                loop = asyncio.get_event_loop()
-                self.vid_cap = await loop.run_in_executor(None, cv2.VideoCapture, stream_url)
-                
-                if self.vid_cap.isOpened():
-                    # Optimize ESP32 stream settings for better performance
-                    # Set buffer size to 1 to reduce latency (always get latest frame)
-                    self.vid_cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-                    # Set frame width/height if needed (ESP32 typically sends QVGA)
-                    # Don't set these as ESP32 controls the resolution
-                    
-                    # Give it a moment to connect and read first frame
-                    await asyncio.sleep(0.5)
-                    
-                    ret, test_frame = self.vid_cap.read()
-                    if ret and test_frame is not None:
-                        self.is_running_flag = True
-                        self.frame_buffer.clear()
-                        print("Successfully connected to ESP32 stream")
-                        # Start background frame reader for ESP32
-                        asyncio.create_task(self._esp32_frame_reader())
-                        return True
-                    else:
-                        print("Connected to stream but failed to read frame")
-                        self.vid_cap.release()
-                else:
-                    print("Failed to open ESP32 stream")
-            except Exception as e:
-                print(f"Error connecting to ESP32: {e}")
-                if self.vid_cap:
-                    self.vid_cap.release()
+            # The MJPEG client runs on the capture thread's own event loop and publishes
+            # the original JPEG bytes; frames are only decoded by consumers that need pixels
+            self._first_frame_event.clear()
+            self.link_metrics.reset()
+            self._start_capture_thread(target=self._esp32_capture_loop, args=(stream_url,))
             
+            loop = asyncio.get_event_loop()
+            got_frame = await loop.run_in_executor(
+                None, self._first_frame_event.wait, self.ESP32_CONNECT_TIMEOUT_SEC
+            )
+            if got_frame:
+                self.is_running_flag = True
+                print("Successfully connected to ESP32 stream")
+                return True
+            
+            print("Failed to read a frame from ESP32 stream")
+            await self._stop_capture_thread()
             return False
+        
+        elif self.source_type == "file":
+            try:
+                source = FileFrameSource(self.file_path)
+            except (FileNotFoundError, ValueError) as e:
+                print(f"Failed to open replay source: {e}")
+                return False
             
-        else:
-            # Try multiple camera indices (Webcam mode)
-            for camera_index in [0, 1, 2]:
-                print(f"Trying webcam index {camera_index}...")
-                self.vid_cap = cv2.VideoCapture(camera_index)
-                await asyncio.sleep(0.5)  # Give camera time to initialize
-                
-                if self.vid_cap.isOpened():
-                    ret, test_frame = self.vid_cap.read()
-                    if ret and test_frame is not None:
-                        self.is_running_flag = True
-                        print(f"Successfully connected to webcam {camera_index}")
-                        return True
-                    else:
-                        self.vid_cap.release()
+            print(f"Replaying {self.file_path} ({self.playback_mode}, {source.frame_count} frames @ {source.fps:.1f} FPS)")
+            self._first_frame_event.clear()
+            self.link_metrics.reset()
+            self._start_capture_thread(target=self._file_capture_loop, args=(source,))
             
+            loop = asyncio.get_event_loop()
+            got_frame = await loop.run_in_executor(
+                None, self._first_frame_event.wait, self.ESP32_CONNECT_TIMEOUT_SEC
+            )
+            if got_frame:
+                self.is_running_flag = True
+                return True
+            
+            print("Failed to read a frame from replay source")
+            await self._stop_capture_thread()
             return False
+        
+        else:
+            discovered = await self._discover_webcam()
+            if discovered is None:
+                return False
+            
+            camera_index, vid_cap, test_frame = discovered
+            self.vid_cap = vid_cap
+            self.is_running_flag = True
+            self.device_index = camera_index
+            self.device_registry.mark_in_use(camera_index)
+            self._publish(test_frame)
+            print(f"Successfully connected to webcam {camera_index}")
+            self._start_capture_thread()
+            self._save_last_webcam(camera_index)
+            return True
+    
+    def _probe_webcam(self, camera_index: int) -> Optional[Dict[str, Any]]:
+        """Open a webcam and wait for its first frame (blocking - runs in an executor)"""
+        vid_cap = cv2.VideoCapture(camera_index)
+        if not vid_cap.isOpened():
+            vid_cap.release()
+            return None
+        
+        # Some cameras return empty frames while they initialize
+        deadline = time.time() + self.WEBCAM_WARMUP_SEC
+        ret, frame = vid_cap.read()
+        while (not ret or frame is None) and time.time() < deadline:
+            time.sleep(0.05)
+            ret, frame = vid_cap.read()
+        if not ret or frame is None:
+            vid_cap.release()
+            return None
+        
+        height, width = frame.shape[:2]
+        return {
+            "index": camera_index,
+            "cap": vid_cap,
+            "frame": frame,
+            "width": int(vid_cap.get(cv2.CAP_PROP_FRAME_WIDTH) or width),
+            "height": int(vid_cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or height),
+            "fps": float(vid_cap.get(cv2.CAP_PROP_FPS) or 0.0)
+        }
+    
+    def _webcam_candidates(self) -> List[int]:
+        """Candidate webcam indices, from the device registry when it knows any.
+        Devices held by another camera source are skipped."""
+        known = [d.index for d in self.device_registry.get_devices(capture_only=True)]
+        candidates = known or list(self.WEBCAM_CANDIDATE_INDICES)
+        return [i for i in candidates if not self.device_registry.is_in_use(i)]
+    
+    async def _discover_webcam(self) -> Optional[Tuple[int, cv2.VideoCapture, np.ndarray]]:
+        """Find a working webcam without blocking the event loop.
+        
+        The last working device is tried first. Otherwise all candidates are probed
+        concurrently and the best one (by resolution, then FPS) is kept.
+        """
+        loop = asyncio.get_event_loop()
+        started = time.time()
+        candidates = self._webcam_candidates()
+        
+        preferred = self._load_last_webcam()
+        if preferred is not None and not self.device_registry.is_in_use(preferred):
+            print(f"Trying last used webcam {preferred}...")
+            probe = await loop.run_in_executor(None, self._probe_webcam, preferred)
+            if probe is not None:
+                self._record_discovery([probe], probe, started)
+                return probe["index"], probe["cap"], probe["frame"]
+            candidates = [i for i in candidates if i != preferred]
+        
+        if not candidates:
+            return None
+        print(f"Probing webcam indices {candidates}...")
+        results = await asyncio.gather(
+            *(loop.run_in_executor(None, self._probe_webcam, i) for i in candidates),
+            return_exceptions=True
+        )
+        probes = [r for r in results if isinstance(r, dict)]
+        if not probes:
+            self._record_discovery([], None, started)
+            return None
+        
+        best = max(probes, key=lambda p: (p["width"] * p["height"], p["fps"], -p["index"]))
+        for probe in probes:
+            if probe is not best:
+                probe["cap"].release()
+        self._record_discovery(probes, best, started)
+        return best["index"], best["cap"], best["frame"]
+    
+    def _record_discovery(self, probes: List[Dict[str, Any]], chosen: Optional[Dict[str, Any]],
+                          started: float):
+        self.last_discovery = {
+            "chosen": chosen["index"] if chosen else None,
+            "candidates": [
+                {k: p[k] for k in ("index", "width", "height", "fps")} for p in probes
+            ],
+            "duration_ms": round((time.time() - started) * 1000, 1)
+        }
+    
+    def _load_last_webcam(self) -> Optional[int]:
+        """Read the last working webcam index persisted by a previous run"""
+        try:
+            with open(self.WEBCAM_STATE_PATH, 'r') as f:
+                index = json.load(f).get("webcam_index")
+            return int(index) if index is not None else None
+        except (OSError, ValueError, TypeError, AttributeError):
+            return None
+    
+    def _save_last_webcam(self, camera_index: int):
+        try:
+            with open(self.WEBCAM_STATE_PATH, 'w') as f:
+                json.dump({"webcam_index": camera_index, "saved_at": time.time()}, f)
+        except OSError as e:
+            print(f"Could not save webcam state: {e}")
     
     async def stop(self):
         """Stop the camera"""
         self.is_running_flag = False
+        await self._stop_capture_thread()
         if self.vid_cap is not None:
             self.vid_cap.release()
             self.vid_cap = None
-        self.last_frame = None
-        self.frame_buffer.clear()
+        if self.device_index is not None:
+            self.device_registry.release(self.device_index)
+            self.device_index = None
+        with self._frame_lock:
+            self._latest = None
+        self.frame_bus.flush()
+        self.encoded_frames.clear()
     
-    async def _esp32_frame_reader(self):
-        """Background task to continuously read frames from ESP32 stream"""
-        while self.is_running() and self.source_type == "esp32" and self.vid_cap is not None:
+    def _start_capture_thread(self, target=None, args=None):
+        """Start the dedicated capture thread for the current source"""
+        self._stop_event.clear()
+        self._capture_thread = threading.Thread(
+            target=target or self._capture_loop,
+            args=args if args is not None else (self.vid_cap,),
+            name=f"camera-capture-{self.camera_id}-{self.source_type}",
+            daemon=True
+        )
+        self._capture_thread.start()
+    
+    async def _stop_capture_thread(self):
+        """Signal the capture thread to exit and wait for it off the event loop"""
+        self._stop_event.set()
+        # Wake the ESP32 client if it is waiting on the network
+        esp32_loop, esp32_task = self._esp32_loop, self._esp32_task
+        if esp32_loop is not None and esp32_task is not None:
+            try:
+                esp32_loop.call_soon_threadsafe(esp32_task.cancel)
+            except RuntimeError:
+                pass
+        thread = self._capture_thread
+        self._capture_thread = None
+        if thread is not None and thread.is_alive():
+            # The thread may be blocked inside read(); join before releasing the capture
+            await asyncio.get_event_loop().run_in_executor(None, thread.join, 2.0)
+    
+    def _capture_loop(self, vid_cap: cv2.VideoCapture):
+        """Continuously read frames into the latest-frame slot (runs on the capture thread)"""
+        while not self._stop_event.is_set():
             try:
-                # Read frame in executor to avoid blocking
-                ret, frame = await asyncio.get_event_loop().run_in_executor(
-                    None, self.vid_cap.read
-                )
-                if ret and frame is not None:
-                    # Update buffer and last frame (no lock needed for simple append)
-                    self.frame_buffer.append((frame, time.time()))
-                    self.last_frame = frame
-                    self.last_timestamp = time.time()
-                # Small delay to prevent CPU spinning and allow other tasks
-                await asyncio.sleep(0.01)  # ~100 FPS max read rate
+                # read() blocks until the device delivers the next frame, which paces the loop
+                ret, frame = vid_cap.read()
             except Exception as e:
-                print(f"Error reading ESP32 frame: {e}")
-                await asyncio.sleep(0.1)
+                print(f"Error reading {self.source_type} frame: {e}")
+                time.sleep(0.1)
+                continue
+            
+            if ret and frame is not None:
+                self._publish(frame)
+            else:
+                # Avoid spinning when the source momentarily has nothing to deliver
+                time.sleep(0.01)
+    
+    def _file_capture_loop(self, source: FileFrameSource):
+        """Replay a file source with the configured pacing (runs on the capture thread)"""
+        fps = self.playback_fps or source.fps
+        self.playback_stats = {
+            "path": source.path,
+            "mode": self.playback_mode,
+            "loop": self.playback_loop,
+            "fps": round(fps, 2),
+            "frame_count": source.frame_count,
+            "position": 0,
+            "media_timestamp": None,
+            "loops_completed": 0,
+            "paused": False,
+            "finished": False
+        }
+        
+        while not self._stop_event.is_set():
+            wall_start = time.time()
+            media_start = None
+            for count, item in enumerate(source.frames()):
+                if self.playback_mode == PLAYBACK_REALTIME:
+                    if media_start is None:
+                        media_start = item.media_timestamp
+                    due = wall_start + (item.media_timestamp - media_start)
+                elif self.playback_mode == PLAYBACK_FIXED:
+                    due = wall_start + count / fps
+                else:
+                    # As fast as the queue subscribers (e.g. /activity-guide/ws) consume: each frame
+                    # waits until they all have room, so they see every frame and runs repeat exactly.
+                    # Latest-frame consumers (polled endpoints, streams) still skip frames, and with
+                    # no queue subscriber there is nothing to pace to, so the replay pauses (after the
+                    # first frame, which start() waits for and previews show).
+                    while self._first_frame_event.is_set():
+                        paused = not self.frame_bus.has_queue_subscribers()
+                        self.playback_stats["paused"] = paused
+                        if not paused and self.frame_bus.has_room():
+                            break
+                        if self._stop_event.wait(0.05 if paused else 0.002):
+                            return
+                    due = 0
+                
+                # Event.wait doubles as an interruptible sleep
+                delay = due - time.time()
+                if self._stop_event.wait(delay if delay > 0 else 0):
+                    return
+                
+                self._publish(frame=item.image, jpeg=item.jpeg, media_timestamp=item.media_timestamp)
+                self.playback_stats["position"] = item.index
+                self.playback_stats["media_timestamp"] = item.media_timestamp
+            
+            if not self.playback_loop:
+                break
+            self.playback_stats["loops_completed"] += 1
+        
+        self.playback_stats["finished"] = True
+        print(f"Replay of {source.path} finished")
+    
+    def _esp32_capture_loop(self, stream_url: str):
+        """Run the async MJPEG client on this capture thread's own event loop"""
+        loop = asyncio.new_event_loop()
+        self._esp32_loop = loop
+        try:
+            self._esp32_task = loop.create_task(self._esp32_read_stream(stream_url))
+            loop.run_until_complete(self._esp32_task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Error reading ESP32 stream: {e}")
+        finally:
+            self._esp32_task = None
+            self._esp32_loop = None
+            loop.close()
     
-    async def get_frame(self) -> Optional:
-        """Get the latest frame from camera"""
+    async def _esp32_read_stream(self, stream_url: str):
+        """Supervise the ESP32 stream: reconnect with exponential backoff on errors and stalls"""
+        backoff = self.RECONNECT_BACKOFF_MIN_SEC
+        try:
+            while not self._stop_event.is_set():
+                self.link_metrics.set_state("connecting" if self.link_metrics.reconnects == 0 else "reconnecting")
+                attempt_start = time.time()
+                seq_before = self._seq
+                
+                reader = asyncio.ensure_future(self._esp32_consume(MJPEGStreamClient(stream_url)))
+                watchdog = asyncio.ensure_future(self._esp32_stall_watchdog(attempt_start))
+                try:
+                    done, _ = await asyncio.wait({reader, watchdog}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    reader.cancel()
+                    watchdog.cancel()
+                    await asyncio.gather(reader, watchdog, return_exceptions=True)
+                
+                if self._stop_event.is_set():
+                    break
+                
+                if watchdog in done:
+                    self.link_metrics.stalls += 1
+                    error = f"No frame for {self.STALL_TIMEOUT_SEC:.0f}s"
+                elif not reader.cancelled() and reader.exception() is not None:
+                    error = str(reader.exception()) or type(reader.exception()).__name__
+                else:
+                    error = "Stream ended"
+                
+                # Back off from the minimum again once a connection actually delivered frames
+                if self._seq > seq_before:
+                    backoff = self.RECONNECT_BACKOFF_MIN_SEC
+                
+                self.link_metrics.reconnects += 1
+                self.link_metrics.set_state("reconnecting", error=error)
+                print(f"ESP32 stream lost ({error}), reconnecting in {backoff:.1f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.RECONNECT_BACKOFF_MAX_SEC)
+        finally:
+            self.link_metrics.set_state("stopped")
+    
+    async def _esp32_consume(self, client: MJPEGStreamClient):
+        """Publish every JPEG part of one ESP32 stream connection"""
+        async for jpeg in client.frames():
+            if self._stop_event.is_set():
+                break
+            if self.link_metrics.state != "streaming":
+                self.link_metrics.set_state("streaming")
+            self._publish(jpeg=jpeg)
+    
+    async def _esp32_stall_watchdog(self, attempt_start: float):
+        """Return once no frame has arrived for STALL_TIMEOUT_SEC (based on last_timestamp)"""
+        while True:
+            await asyncio.sleep(self.STALL_TIMEOUT_SEC / 4)
+            last_activity = max(self.last_timestamp or 0, attempt_start)
+            if time.time() - last_activity > self.STALL_TIMEOUT_SEC:
+                return
+    
+    def _publish(self, frame: Optional[np.ndarray] = None, jpeg: Optional[bytes] = None,
+                 media_timestamp: Optional[float] = None):
+        """Store a frame in the latest-frame slot with the next sequence number"""
+        timestamp = time.time()
+        with self._frame_lock:
+            self._seq += 1
+            captured = CapturedFrame(seq=self._seq, timestamp=timestamp, image=frame, jpeg=jpeg,
+                                     media_timestamp=media_timestamp)
+            self._latest = captured
+            self.last_timestamp = timestamp
+        self.link_metrics.record_frame(timestamp, len(jpeg) if jpeg is not None else 0)
+        self._first_frame_event.set()
+        self.frame_bus.publish(captured)
+    
+    def subscribe(self, name: str, policy: str = POLICY_LATEST, every_n: int = 1,
+                  maxsize: int = 4) -> FrameSubscription:
+        """Subscribe to captured frames; the current latest frame is delivered first"""
+        subscription = self.frame_bus.subscribe(name, policy=policy, every_n=every_n, maxsize=maxsize)
+        latest = self.get_latest()
+        if latest is not None:
+            subscription.offer(latest)
+        return subscription
+    
+    def get_latest(self) -> Optional[CapturedFrame]:
+        """Get the latest captured frame with its sequence number and timestamp"""
         if not self.is_running():
             return None
+        with self._frame_lock:
+            return self._latest
+    
+    async def get_frame(self) -> Optional[np.ndarray]:
+        """Get the latest frame from camera (non-blocking read of the latest-frame slot).
         
-        # For ESP32, use buffered frames for smoother playback
-        if self.source_type == "esp32":
-            if self.frame_buffer:
-                # Get the most recent frame from buffer
-                frame, timestamp = self.frame_buffer[-1]
-                self.last_frame = frame
-                self.last_timestamp = timestamp
-                return frame
-            # Fallback to direct read if buffer is empty
-            if self.vid_cap:
-                ret, frame = await asyncio.get_event_loop().run_in_executor(
-                    None, self.vid_cap.read
-                )
-                if ret and frame is not None:
-                    self.last_frame = frame
-                    self.last_timestamp = time.time()
-                    return frame
-            return None
-        else:
-            # For webcam, read directly
-            ret, frame = await asyncio.get_event_loop().run_in_executor(
-                None, self.vid_cap.read
-            )
-            if ret and frame is not None:
-                self.last_frame = frame
-                self.last_timestamp = time.time()
-                return frame
-            return None
+        The returned array is shared with other consumers and must not be modified in place.
+        """
+        latest = self.get_latest()
+        return latest.image if latest is not None else None
+    
+    def get_preview_quality(self) -> int:
+        """JPEG quality for raw preview frames (lower for ESP32 = smaller payloads over Wi-Fi)"""
+        return 90 if self.source_type == "webcam" else 75
+    
+    def encode_frame(self, captured: CapturedFrame, image: Optional[np.ndarray] = None,
+                     annotation=None, quality: Optional[int] = None,
+                     size=None) -> Optional[EncodedFrame]:
+        """Get the JPEG for a captured frame (or a pipeline's rendering of it) from the encode cache.
+        
+        Raw frames that arrived as JPEG are served with the camera's original bytes.
+        """
+        if annotation is None and image is None and size is None and quality is None and captured.jpeg is not None:
+            encoded = self.encoded_frames.get(captured.seq, quality="source")
+            if encoded is None:
+                width, height = jpeg_dimensions(captured.jpeg) or (0, 0)
+                encoded = EncodedFrame(captured.jpeg, width=width, height=height)
+                self.encoded_frames.put(captured.seq, encoded, quality="source")
+            return encoded
+        
+        if quality is None:
+            quality = self.get_preview_quality()
+        if image is None:
+            # Only decode/resize on a cache miss; resized raw frames come from the shared views
+            image = captured.image if size is None else (lambda: captured.views.resized(size))
+        return self.encoded_frames.get_or_encode(
+            captured.seq,
+            image,
+            annotation=annotation,
+            quality=quality,
+            size=size
+        )
+    
+    def get_frame_seq(self) -> int:
+        """Get the sequence number of the latest captured frame (0 if none yet)"""
+        with self._frame_lock:
+            return self._latest.seq if self._latest is not None else 0
     
     def is_running(self) -> bool:
         """Check if camera is running"""
+        if self.source_type in ("esp32", "file"):
+            return self.is_running_flag and self._capture_thread is not None and self._capture_thread.is_alive()
         return self.is_running_flag and self.vid_cap is not None and self.vid_cap.isOpened()
     
     def is_available(self) -> bool:
-        """Check if camera is available"""
+        """Check if camera is available (from the device registry cache, never opens the device)"""
         if self.source_type == "esp32":
             # For ESP32, availability depends on IP being set
             return bool(self.ip_address)
+        if self.source_type == "file":
+            return bool(self.file_path) and os.path.exists(self.file_path)
         
-        # Try to open a test capture for webcam
-        test_cap = cv2.VideoCapture(0)
-        if test_cap.isOpened():
-            test_cap.release()
+        if self.is_running():
             return True
-        return False
+        return self.device_registry.is_available()
+    
+    def get_link_stats(self) -> Dict[str, Any]:
+        """Get rolling link-quality metrics for the current source"""
+        stats = self.link_metrics.get_stats()
+        stats["source_type"] = self.source_type
+        stats["seconds_since_last_frame"] = (
+            round(time.time() - self.last_timestamp, 2) if self.last_timestamp else None
+        )
+        return stats
     
     def get_timestamp(self) -> float:
         """Get the timestamp of the last frame"""
@@ -180,4 +704,3 @@ class CameraService:
     async def cleanup(self):
         """Cleanup resources"""
         await self.stop()
-
@@ -0,0 +1,218 @@
+"""
+Caption Worker - Runs BLIP captioning on a dedicated thread off the event loop
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+from PIL import Image
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+from services.model_service import ModelService
+
+BATCH_WAIT_SLACK_MS = 100  # Allowance for frames arriving a little late
+
+
+class CaptionDropped(Exception):
+    """The caption job was dropped before it ran (a newer job pushed it out of the full queue)"""
+
+
+class _CaptionJob:
+    def __init__(self, image: np.ndarray, loop: asyncio.AbstractEventLoop):
+        self.image = image
+        self.loop = loop
+        self.future = loop.create_future()
+        self.cancelled = threading.Event()
+        self.submitted_at = time.time()
+    
+    def resolve(self, caption: str):
+        self.loop.call_soon_threadsafe(self._set, self.future.set_result, caption)
+    
+    def fail(self, error: Exception):
+        self.loop.call_soon_threadsafe(self._set, self.future.set_exception, error)
+    
+    def _set(self, setter, value):
+        if not self.future.done():
+            setter(value)
+
+
+class _StopWhenCancelled(StoppingCriteria):
+    """Ends generation of a batch row once its caller has given up on the job
+    (generate() returns when every row is done)"""
+    
+    def __init__(self, jobs: List[_CaptionJob]):
+        self.jobs = jobs
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        return torch.tensor([job.cancelled.is_set() for job in self.jobs], dtype=torch.bool, device=input_ids.device)
+
+
+class CaptionWorker:
+    """Runs BLIP on its own thread so captioning never blocks the event loop.
+    
+    `await caption(image)` queues a job and waits for its caption. The queue is bounded: when
+    it's full the oldest waiting job is dropped (its caller gets CaptionDropped), since a newer
+    frame is worth more than an old one. A caller that is cancelled while waiting cancels its
+    job; if the job is already generating, generation stops at the next token.
+    
+    Jobs are captioned in batches of up to MAX_BATCH_SIZE with one generate() call: once a job
+    arrives the worker waits up to MAX_BATCH_WAIT_MS for more, so no job waits longer than that
+    for its batch to fill. Jobs submitted together with `caption_batch` always share a batch.
+    Batched decoding gives much better throughput per frame on CPU. MAX_BATCH_SIZE 1 (the
+    default) disables batching.
+    
+    A recording submits one frame every `frame_interval_sec`, so unless CAPTION_MAX_BATCH_WAIT_MS
+    is set, the wait is long enough for the next MAX_BATCH_SIZE - 1 frames to join, capped at
+    `max_wait_ms`. Batches only ever hold frames of one recording: the scene pipeline runs on
+    the default camera only, so there are no other cameras' frames to fill them.
+    """
+    
+    def __init__(self, model_service: ModelService, frame_interval_sec: Optional[float] = None,
+                 max_wait_ms: Optional[float] = None):
+        self.model_service = model_service
+        self.MAX_BATCH_SIZE = max(1, int(os.environ.get("CAPTION_MAX_BATCH_SIZE", "1")))
+        batch_wait = os.environ.get("CAPTION_MAX_BATCH_WAIT_MS")
+        if batch_wait:
+            self.MAX_BATCH_WAIT_MS = float(batch_wait)
+        elif self.MAX_BATCH_SIZE > 1 and frame_interval_sec:
+            wait_ms = (self.MAX_BATCH_SIZE - 1) * frame_interval_sec * 1000 + BATCH_WAIT_SLACK_MS
+            self.MAX_BATCH_WAIT_MS = min(wait_ms, max_wait_ms) if max_wait_ms else wait_ms
+        else:
+            self.MAX_BATCH_WAIT_MS = float(BATCH_WAIT_SLACK_MS)
+        self.QUEUE_SIZE = max(int(os.environ.get("CAPTION_QUEUE_SIZE", "2")), self.MAX_BATCH_SIZE)
+        self.MAX_LENGTH = 50
+        
+        self._jobs: deque = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._busy = False
+        
+        # Stats
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.batches = 0
+        self.last_batch_size = 0
+        self.queue_wait_ms = 0.0
+        self.generate_ms = 0.0
+    
+    async def caption(self, image: np.ndarray) -> str:
+        """Caption an RGB image (BLIP's processor resizes it to 384x384)"""
+        job = _CaptionJob(image, asyncio.get_running_loop())
+        with self._condition:
+            self._ensure_thread()
+            if len(self._jobs) >= self.QUEUE_SIZE:
+                dropped = self._jobs.popleft()
+                self.dropped += 1
+                dropped.fail(CaptionDropped("Caption queue full"))
+            self._jobs.append(job)
+            self.submitted += 1
+            self._condition.notify()
+        
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            job.cancelled.set()
+            raise
+    
+    async def caption_batch(self, images: List[np.ndarray]) -> List[Optional[str]]:
+        """Caption several RGB images in one batch (None for any dropped from the queue)"""
+        captions = await asyncio.gather(*(self.caption(image) for image in images), return_exceptions=True)
+        for caption in captions:
+            if isinstance(caption, BaseException) and not isinstance(caption, CaptionDropped):
+                raise caption
+        return [None if isinstance(caption, CaptionDropped) else caption for caption in captions]
+    
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="caption-worker", daemon=True)
+            self._thread.start()
+    
+    def _next_batch(self) -> List[_CaptionJob]:
+        """Wait for a job, then up to MAX_BATCH_WAIT_MS for the batch to fill"""
+        with self._condition:
+            while not self._jobs:
+                self._condition.wait()
+            deadline = time.time() + self.MAX_BATCH_WAIT_MS / 1000
+            while len(self._jobs) < self.MAX_BATCH_SIZE:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return [self._jobs.popleft() for _ in range(min(len(self._jobs), self.MAX_BATCH_SIZE))]
+    
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            jobs = [job for job in batch if not job.cancelled.is_set()]
+            self.cancelled += len(batch) - len(jobs)
+            if not jobs:
+                continue
+            
+            self._busy = True
+            started = time.time()
+            self.queue_wait_ms = (started - jobs[0].submitted_at) * 1000
+            try:
+                captions = self._generate(jobs)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                print(f"Error generating caption: {e}")
+                for job in jobs:
+                    job.fail(e)
+                continue
+            finally:
+                self._busy = False
+            self.generate_ms = (time.time() - started) * 1000
+            self.batches += 1
+            self.last_batch_size = len(jobs)
+            
+            for job, caption in zip(jobs, captions):
+                if job.cancelled.is_set():
+                    self.cancelled += 1
+                    continue
+                self.completed += 1
+                job.resolve(caption)
+    
+    def _generate(self, jobs: List[_CaptionJob]) -> List[str]:
+        # Loads BLIP on first use, on this thread
+        vision_processor, vision_model, device = self.model_service.get_vision_model()
+        images = [Image.fromarray(job.image) for job in jobs]
+        # Pixel values in the model's dtype (bfloat16 variants)
+        inputs = vision_processor(images=images, return_tensors="pt").to(device, vision_model.dtype)
+        with torch.inference_mode():
+            # Rows that finish early are padded to the longest caption in the batch
+            generated_ids = vision_model.generate(
+                **inputs, max_length=self.MAX_LENGTH,
+                stopping_criteria=StoppingCriteriaList([_StopWhenCancelled(jobs)])
+            )
+        return [caption.strip() for caption in vision_processor.batch_decode(generated_ids, skip_special_tokens=True)]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        captioner = self.model_service.captioner
+        return {
+            "model": captioner.to_dict() if captioner is not None else None,
+            "queued": len(self._jobs),
+            "busy": self._busy,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "max_batch_size": self.MAX_BATCH_SIZE,
+            "max_batch_wait_ms": round(self.MAX_BATCH_WAIT_MS, 1),
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "queue_wait_ms": round(self.queue_wait_ms, 1),
+            "generate_ms": round(self.generate_ms, 1)
+        }
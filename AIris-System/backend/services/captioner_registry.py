@@ -0,0 +1,250 @@
+"""
+Captioner Registry - Selectable image captioning models (BLIP large/base, INT8, bfloat16)
+with latency and memory measured on this host
+
+Benchmark the variants ahead of time (e.g. at image build) so CAPTION_MODEL=auto can choose:
+    python -m services.captioner_registry
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+from PIL import Image
+from transformers import BlipForConditionalGeneration, BlipProcessor
+
+PRECISION_FP32 = "fp32"
+PRECISION_BF16 = "bf16"
+PRECISION_INT8 = "int8"  # Dynamic INT8 quantization of the Linear layers (CPU only)
+
+CAPTIONER_AUTO = "auto"
+DEFAULT_CAPTIONER = "blip-large"
+
+
+class CaptionerSpec:
+    """A captioning model variant.
+    
+    `latency_ms` (one 384x384 caption, max_length 50) and `memory_mb` are None until the variant
+    has been measured on this host. `quality` ranks the variants by caption quality (higher is
+    better).
+    """
+    
+    def __init__(self, name: str, repo_id: str, precision: str, quality: int):
+        self.name = name
+        self.repo_id = repo_id
+        self.precision = precision
+        self.quality = quality
+        self.latency_ms: Optional[float] = None
+        self.memory_mb: Optional[float] = None
+    
+    @property
+    def measured(self) -> bool:
+        return self.latency_ms is not None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "repo_id": self.repo_id,
+            "precision": self.precision,
+            "quality": self.quality,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "memory_mb": round(self.memory_mb, 1) if self.memory_mb is not None else None,
+            "measured": self.measured
+        }
+
+
+BLIP_LARGE = "Salesforce/blip-image-captioning-large"
+BLIP_BASE = "Salesforce/blip-image-captioning-base"
+
+DEFAULT_CAPTIONERS = [
+    CaptionerSpec(DEFAULT_CAPTIONER, BLIP_LARGE, PRECISION_FP32, quality=6),
+    CaptionerSpec("blip-large-bf16", BLIP_LARGE, PRECISION_BF16, quality=5),
+    CaptionerSpec("blip-large-int8", BLIP_LARGE, PRECISION_INT8, quality=4),
+    CaptionerSpec("blip-base", BLIP_BASE, PRECISION_FP32, quality=3),
+    CaptionerSpec("blip-base-bf16", BLIP_BASE, PRECISION_BF16, quality=2),
+    CaptionerSpec("blip-base-int8", BLIP_BASE, PRECISION_INT8, quality=1),
+]
+
+
+def cpu_supports_bf16() -> bool:
+    """True if the CPU has native bfloat16 instructions (AVX512-BF16 or AMX); without them
+    bf16 matmuls are emulated and slower than fp32"""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def model_memory_mb(model: torch.nn.Module) -> float:
+    """Size of a model's weights (including dynamically quantized packed weights)"""
+    total = 0
+    for value in model.state_dict().values():
+        tensors = value if isinstance(value, (tuple, list)) else (value,)
+        total += sum(t.numel() * t.element_size() for t in tensors if isinstance(t, torch.Tensor))
+    return total / 2 ** 20
+
+
+class CaptionerRegistry:
+    """The captioning models to choose from.
+    
+    CAPTION_MODEL names a variant (blip-large by default). With "auto" the CPU picks among the
+    variants measured on this host: the best-quality one whose latency fits the caller's budget
+    (the fastest one if none does), optionally also within CAPTION_MEMORY_BUDGET_MB. Until
+    some variant has been measured, auto falls back to blip-large. Measurements are kept in
+    CAPTION_BENCHMARK_PATH; they're taken by the benchmark command above, or with
+    CAPTION_BENCHMARK_ON_LOAD=true whenever a variant is loaded.
+    """
+    
+    def __init__(self, specs: Optional[List[CaptionerSpec]] = None):
+        self._specs: Dict[str, CaptionerSpec] = {spec.name: spec for spec in (specs or DEFAULT_CAPTIONERS)}
+        self._lock = threading.Lock()
+        
+        # Constants
+        self.BENCHMARK_PATH = os.environ.get(
+            "CAPTION_BENCHMARK_PATH",
+            os.path.join(os.path.dirname(__file__), '..', 'model_cache', 'captioner_benchmarks.json')
+        )
+        memory_budget = os.environ.get("CAPTION_MEMORY_BUDGET_MB")
+        self.MEMORY_BUDGET_MB = float(memory_budget) if memory_budget else None
+        self._load_measurements()
+    
+    def get(self, name: str) -> CaptionerSpec:
+        spec = self._specs.get(name)
+        if spec is None:
+            raise ValueError(f"Unknown captioner: {name} (expected one of {', '.join(self._specs)} or {CAPTIONER_AUTO})")
+        return spec
+    
+    def available(self, device: str) -> List[CaptionerSpec]:
+        """Variants that can run on a device"""
+        specs = []
+        for spec in self._specs.values():
+            if spec.precision == PRECISION_INT8 and device != "cpu":
+                continue  # Dynamic quantization only has CPU kernels
+            if spec.precision == PRECISION_BF16:
+                if device == "cpu" and not cpu_supports_bf16():
+                    continue
+                if device == "cuda" and not torch.cuda.is_bf16_supported():
+                    continue
+                if device == "mps":
+                    continue
+            specs.append(spec)
+        return specs
+    
+    def select(self, device: str, latency_budget_ms: Optional[float] = None,
+               name: Optional[str] = None) -> CaptionerSpec:
+        """The configured variant, or with "auto" the best measured one that fits the budgets"""
+        name = name or os.environ.get("CAPTION_MODEL", DEFAULT_CAPTIONER)
+        if name != CAPTIONER_AUTO:
+            return self.get(name)
+        
+        # Measurements are only kept for the CPU
+        candidates = [spec for spec in self.available(device) if spec.measured] if device == "cpu" else []
+        if not candidates:
+            print(f"No captioner measurements for {device}, using {DEFAULT_CAPTIONER}")
+            return self.get(DEFAULT_CAPTIONER)
+        if self.MEMORY_BUDGET_MB is not None:
+            candidates = [spec for spec in candidates if spec.memory_mb <= self.MEMORY_BUDGET_MB] or candidates
+        if latency_budget_ms is None:
+            fitting = candidates
+        else:
+            fitting = [spec for spec in candidates if spec.latency_ms <= latency_budget_ms]
+        if not fitting:
+            return min(candidates, key=lambda spec: spec.latency_ms)
+        return max(fitting, key=lambda spec: spec.quality)
+    
+    def load(self, spec: CaptionerSpec, device: str) -> Tuple[BlipProcessor, BlipForConditionalGeneration]:
+        """Load a variant onto a device"""
+        processor = BlipProcessor.from_pretrained(spec.repo_id)
+        if spec.precision == PRECISION_BF16:
+            model = BlipForConditionalGeneration.from_pretrained(spec.repo_id, torch_dtype=torch.bfloat16).to(device)
+        else:
+            model = BlipForConditionalGeneration.from_pretrained(spec.repo_id).to(device)
+        if spec.precision == PRECISION_INT8:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.eval()
+        return processor, model
+    
+    def measure(self, spec: CaptionerSpec, processor: BlipProcessor, model: BlipForConditionalGeneration,
+                device: str, max_length: int = 50):
+        """Record the variant's weight size and caption latency on this host (after a warm-up run)"""
+        image = Image.fromarray(np.full((384, 384, 3), 127, dtype=np.uint8))
+        inputs = processor(images=image, return_tensors="pt").to(device, model.dtype)
+        with torch.inference_mode():
+            model.generate(**inputs, max_length=max_length)
+            start = time.perf_counter()
+            model.generate(**inputs, max_length=max_length)
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        with self._lock:
+            spec.latency_ms = latency_ms
+            spec.memory_mb = model_memory_mb(model)
+            if device == "cpu":
+                self._save_measurements()
+        print(f"  Captioner '{spec.name}': {spec.latency_ms:.0f} ms/caption, {spec.memory_mb:.0f} MB")
+    
+    def _load_measurements(self):
+        try:
+            with open(self.BENCHMARK_PATH) as f:
+                measurements = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, measured in measurements.items():
+            spec = self._specs.get(name)
+            if spec is not None:
+                spec.latency_ms = measured["latency_ms"]
+                spec.memory_mb = measured["memory_mb"]
+    
+    def _save_measurements(self):
+        measurements = {
+            spec.name: {"latency_ms": spec.latency_ms, "memory_mb": spec.memory_mb}
+            for spec in self._specs.values() if spec.measured
+        }
+        try:
+            os.makedirs(os.path.dirname(self.BENCHMARK_PATH), exist_ok=True)
+            with open(self.BENCHMARK_PATH, "w") as f:
+                json.dump(measurements, f, indent=2)
+        except OSError as e:
+            print(f"Could not save captioner measurements: {e}")
+    
+    def get_stats(self) -> List[Dict[str, Any]]:
+        return [spec.to_dict() for spec in self._specs.values()]
+
+
+# Singleton instance
+_captioner_registry: Optional[CaptionerRegistry] = None
+
+
+def get_captioner_registry() -> CaptionerRegistry:
+    """Get the singleton captioner registry instance"""
+    global _captioner_registry
+    if _captioner_registry is None:
+        _captioner_registry = CaptionerRegistry()
+    return _captioner_registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the captioner variants on this host's CPU for CAPTION_MODEL=auto")
+    parser.add_argument("--models", nargs="*", help="Variants to measure (default: all that can run on this CPU)")
+    args = parser.parse_args()
+    
+    registry = get_captioner_registry()
+    specs = [registry.get(name) for name in args.models] if args.models else registry.available("cpu")
+    for spec in specs:
+        processor, model = registry.load(spec, "cpu")
+        registry.measure(spec, processor, model, "cpu")
+        del processor, model
+    print(f"✓ Captioner measurements saved to {registry.BENCHMARK_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Detector Backend - Exports the YOLO weights to ONNX Runtime or OpenVINO (FP32 or INT8),
+caches the exported model on disk and loads it through ultralytics
+
+The exported model is a drop-in YOLO object: predict(), track() and the Results they return
+are the same as with the PyTorch weights, so ActivityGuideService.process_frame is unchanged.
+
+Export ahead of time (e.g. at image build):
+    python -m services.detector_backend --backend openvino --int8 --calibration-dir frames/
+"""
+
+import argparse
+import glob
+import os
+import shutil
+from typing import Iterator, List, Optional
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from utils.frame_views import LETTERBOX_SIZE, FrameViews
+
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+BACKEND_OPENVINO = "openvino"
+YOLO_BACKENDS = (BACKEND_TORCH, BACKEND_ONNX, BACKEND_OPENVINO)
+
+CALIBRATION_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class DetectorBackend:
+    """Chooses and prepares the YOLO inference backend.
+    
+    YOLO_BACKEND=torch (default) loads the .pt weights as before. With onnx or openvino the
+    weights are exported once to YOLO_EXPORT_DIR and reused while they're newer than the
+    weights. YOLO_INT8=true quantizes the export, calibrated on the frames in
+    YOLO_CALIBRATION_DIR (frames captured by the deployed camera work best).
+    """
+    
+    def __init__(self, weights_path: str, backend: Optional[str] = None, int8: Optional[bool] = None):
+        self.weights_path = weights_path
+        self.backend = (backend or os.environ.get("YOLO_BACKEND", BACKEND_TORCH)).lower()
+        if self.backend not in YOLO_BACKENDS:
+            raise ValueError(f"Unknown YOLO backend: {self.backend} (expected one of {', '.join(YOLO_BACKENDS)})")
+        self.int8 = int8 if int8 is not None else os.environ.get("YOLO_INT8", "false").lower() == "true"
+        
+        # Constants
+        self.EXPORT_DIR = os.environ.get("YOLO_EXPORT_DIR", os.path.join(os.path.dirname(__file__), '..', 'model_cache'))
+        self.CALIBRATION_DIR = os.environ.get("YOLO_CALIBRATION_DIR", os.path.join(os.path.dirname(__file__), '..', 'calibration_frames'))
+        self.CALIBRATION_SAMPLES = int(os.environ.get("YOLO_CALIBRATION_SAMPLES", "300"))
+        self.IMAGE_SIZE = LETTERBOX_SIZE
+    
+    @property
+    def name(self) -> str:
+        return f"{self.backend}-int8" if self.int8 and self.backend != BACKEND_TORCH else self.backend
+    
+    def artefact_path(self) -> str:
+        """Where the exported model lives (an .onnx file, or an OpenVINO model directory)"""
+        stem = os.path.splitext(os.path.basename(self.weights_path))[0]
+        suffix = "_int8" if self.int8 else ""
+        if self.backend == BACKEND_ONNX:
+            return os.path.join(self.EXPORT_DIR, f"{stem}{suffix}.onnx")
+        # ultralytics recognizes OpenVINO models by the _openvino_model directory suffix
+        return os.path.join(self.EXPORT_DIR, f"{stem}{suffix}_openvino_model")
+    
+    def load(self) -> YOLO:
+        """Load the model, exporting it first if the cache is stale (blocking: call it off the
+        event loop, or export ahead of time)"""
+        if self.backend == BACKEND_TORCH:
+            return YOLO(self.weights_path)
+        path = self.artefact_path()
+        if not self._is_fresh(path):
+            self.export()
+        print(f"YOLO using {self.name} backend: {path}")
+        return YOLO(path, task="detect")
+    
+    def _is_fresh(self, path: str) -> bool:
+        if not os.path.exists(path):
+            return False
+        if not os.path.exists(self.weights_path):
+            return True  # Weights were downloaded elsewhere; trust the cached export
+        return os.path.getmtime(path) >= os.path.getmtime(self.weights_path)
+    
+    def export(self) -> str:
+        """Export (and quantize) the weights into the cache; returns the artefact path"""
+        os.makedirs(self.EXPORT_DIR, exist_ok=True)
+        path = self.artefact_path()
+        print(f"Exporting YOLO weights to {self.name}...")
+        exported = YOLO(self.weights_path).export(format=self.backend, imgsz=self.IMAGE_SIZE, dynamic=False)
+        
+        try:
+            if self.int8:
+                samples = self._calibration_inputs()
+                if self.backend == BACKEND_ONNX:
+                    self._quantize_onnx(exported, path, samples)
+                else:
+                    self._quantize_openvino(exported, path, samples)
+            else:
+                self._move(exported, path)
+        finally:
+            # The intermediate FP32 export, also when calibration or quantization failed
+            if os.path.abspath(exported) != os.path.abspath(path):
+                self._remove(exported)
+        print(f"✓ YOLO {self.name} model cached at {path}")
+        return path
+    
+    def _move(self, source: str, target: str):
+        if os.path.abspath(source) == os.path.abspath(target):
+            return
+        self._remove(target)
+        shutil.move(source, target)
+    
+    def _remove(self, path: str):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+    
+    def _calibration_frames(self) -> Iterator[np.ndarray]:
+        paths = sorted(
+            path for path in glob.glob(os.path.join(self.CALIBRATION_DIR, "**", "*"), recursive=True)
+            if path.lower().endswith(CALIBRATION_EXTENSIONS)
+        )
+        for path in paths[:self.CALIBRATION_SAMPLES]:
+            frame = cv2.imread(path)
+            if frame is not None:
+                yield frame
+    
+    def _calibration_inputs(self) -> List[np.ndarray]:
+        """Calibration frames preprocessed the way ultralytics feeds the exported model:
+        640 letterbox, RGB, NCHW float32 in [0, 1]"""
+        samples = []
+        for frame in self._calibration_frames():
+            letterboxed = FrameViews(frame).letterbox_640
+            rgb = cv2.cvtColor(letterboxed, cv2.COLOR_BGR2RGB)
+            samples.append(np.ascontiguousarray(rgb.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0)
+        if not samples:
+            raise RuntimeError(f"No calibration frames found in {self.CALIBRATION_DIR} (needed for INT8)")
+        print(f"  Calibrating INT8 on {len(samples)} frames from {self.CALIBRATION_DIR}")
+        return samples
+    
+    def _quantize_onnx(self, fp32_path: str, int8_path: str, samples: List[np.ndarray]):
+        import onnx
+        from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+        
+        class FrameReader(CalibrationDataReader):
+            def __init__(self, input_name: str):
+                self._inputs = iter([{input_name: sample} for sample in samples])
+            
+            def get_next(self):
+                return next(self._inputs, None)
+        
+        fp32_model = onnx.load(fp32_path)
+        reader = FrameReader(fp32_model.graph.input[0].name)
+        # Written next to the cache entry first, so a failed run never leaves a fresh-looking model
+        staging_path = int8_path + ".tmp"
+        try:
+            quantize_static(
+                fp32_path, staging_path, reader,
+                quant_format=QuantFormat.QDQ, per_channel=True,
+                activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8
+            )
+            
+            # ultralytics reads class names, stride and image size from the model metadata
+            int8_model = onnx.load(staging_path)
+            del int8_model.metadata_props[:]
+            int8_model.metadata_props.extend(fp32_model.metadata_props)
+            onnx.save(int8_model, staging_path)
+            self._move(staging_path, int8_path)
+        finally:
+            self._remove(staging_path)
+    
+    def _quantize_openvino(self, fp32_dir: str, int8_dir: str, samples: List[np.ndarray]):
+        import nncf
+        import openvino as ov
+        
+        fp32_xml = glob.glob(os.path.join(fp32_dir, "*.xml"))[0]
+        model = ov.Core().read_model(fp32_xml)
+        quantized = nncf.quantize(
+            model, nncf.Dataset(samples),
+            preset=nncf.QuantizationPreset.MIXED, subset_size=len(samples)
+        )
+        
+        staging_dir = int8_dir + ".tmp"
+        try:
+            os.makedirs(staging_dir, exist_ok=True)
+            ov.save_model(quantized, os.path.join(staging_dir, os.path.basename(fp32_xml)))
+            shutil.copy(os.path.join(fp32_dir, "metadata.yaml"), staging_dir)
+            self._move(staging_dir, int8_dir)
+        finally:
+            self._remove(staging_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the YOLO weights for the ONNX Runtime or OpenVINO backend")
+    parser.add_argument("--weights", default=os.environ.get("YOLO_MODEL_PATH", "yolo26s.pt"))
+    parser.add_argument("--backend", choices=[BACKEND_ONNX, BACKEND_OPENVINO], required=True)
+    parser.add_argument("--int8", action="store_true", help="Quantize to INT8 (needs calibration frames)")
+    parser.add_argument("--calibration-dir", help="Folder of sample frames for INT8 calibration")
+    args = parser.parse_args()
+    
+    if args.calibration_dir:
+        os.environ["YOLO_CALIBRATION_DIR"] = args.calibration_dir
+    DetectorBackend(args.weights, backend=args.backend, int8=args.int8).export()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Device Registry - Cached enumeration of local video capture devices
+"""
+
+import asyncio
+import glob
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import cv2
+
+
+class VideoDevice:
+    """A local video capture device"""
+    
+    def __init__(self, index: int, path: Optional[str] = None, name: Optional[str] = None,
+                 is_capture: bool = True):
+        self.index = index
+        self.path = path
+        self.name = name or f"Camera {index}"
+        self.is_capture = is_capture
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "path": self.path,
+            "name": self.name,
+            "is_capture": self.is_capture
+        }
+
+
+class DeviceRegistry:
+    """Keeps a cached list of capture devices so health checks never open a camera.
+    
+    On Linux the devices are read from V4L2 (/dev/video* and /sys/class/video4linux),
+    which is cheap and never touches the device itself. A background task re-enumerates
+    when the TTL expires or when a device node appears/disappears (hotplug). Elsewhere
+    the registry falls back to probing a few indices with OpenCV, but only on the TTL
+    and never while a device is held by a running capture.
+    """
+    
+    def __init__(self, ttl_sec: float = 30.0, hotplug_poll_sec: float = 2.0,
+                 probe_indices: int = 3, dev_dir: str = "/dev",
+                 sysfs_dir: str = "/sys/class/video4linux"):
+        self.ttl_sec = ttl_sec
+        self.hotplug_poll_sec = hotplug_poll_sec
+        self.probe_indices = probe_indices
+        self.dev_dir = dev_dir
+        self.sysfs_dir = sysfs_dir
+        # V4L2 device nodes can be listed without opening them; elsewhere we have to probe
+        self.backend = "v4l2" if sys.platform.startswith("linux") else "opencv"
+        
+        self._devices: List[VideoDevice] = []
+        self._lock = threading.Lock()
+        self._in_use: Set[int] = set()
+        self._signature: Optional[tuple] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        
+        self.last_refresh: float = 0.0
+        self.refresh_count = 0
+        self.hotplug_events = 0
+        self.skipped_probes = 0
+    
+    def _list_nodes(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.dev_dir, "video*")))
+    
+    def _read_sysfs(self, node: str, attribute: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.sysfs_dir, node, attribute)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+    
+    def _enumerate_v4l2(self) -> List[VideoDevice]:
+        """List /dev/video* nodes with names from sysfs (doesn't open the devices)"""
+        devices = []
+        for path in self._list_nodes():
+            node = os.path.basename(path)
+            match = re.fullmatch(r"video(\d+)", node)
+            if not match:
+                continue
+            # UVC cameras expose a metadata node next to the capture node; only
+            # the node with sysfs index 0 delivers frames
+            node_index = self._read_sysfs(node, "index")
+            devices.append(VideoDevice(
+                index=int(match.group(1)),
+                path=path,
+                name=self._read_sysfs(node, "name"),
+                is_capture=node_index in (None, "0")
+            ))
+        return sorted(devices, key=lambda d: d.index)
+    
+    def _probe_opencv(self) -> Optional[List[VideoDevice]]:
+        """Open candidate indices with OpenCV. Returns None if probing was skipped."""
+        with self._lock:
+            if self._in_use:
+                # Opening another capture would fight the running one for the device
+                self.skipped_probes += 1
+                return None
+        
+        devices = []
+        for index in range(self.probe_indices):
+            cap = cv2.VideoCapture(index)
+            try:
+                if cap.isOpened():
+                    devices.append(VideoDevice(index=index))
+            finally:
+                cap.release()
+        return devices
+    
+    def refresh(self, force: bool = False) -> List[VideoDevice]:
+        """Re-enumerate devices (blocking - call from an executor when on the event loop)"""
+        if self.backend == "v4l2":
+            devices = self._enumerate_v4l2()
+        else:
+            if not force and self.last_refresh and time.time() - self.last_refresh < self.ttl_sec:
+                return self.get_devices()
+            devices = self._probe_opencv()
+            if devices is None:
+                return self.get_devices()
+        
+        with self._lock:
+            self._devices = devices
+            self._signature = tuple(self._list_nodes())
+            self.last_refresh = time.time()
+            self.refresh_count += 1
+        return list(devices)
+    
+    def _hotplug_detected(self) -> bool:
+        """Cheap check for added/removed device nodes"""
+        if self.backend != "v4l2":
+            return False
+        signature = tuple(self._list_nodes())
+        with self._lock:
+            changed = self._signature is not None and signature != self._signature
+        if changed:
+            self.hotplug_events += 1
+            print(f"📷 Video devices changed: {', '.join(signature) or 'none'}")
+        return changed
+    
+    async def _refresh_loop(self):
+        """Background refresh on TTL expiry or hotplug"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                stale = time.time() - self.last_refresh >= self.ttl_sec
+                if stale or self._hotplug_detected():
+                    await loop.run_in_executor(None, self.refresh, True)
+            except Exception as e:
+                print(f"Error refreshing video devices: {e}")
+            await asyncio.sleep(self.hotplug_poll_sec)
+    
+    async def start(self):
+        """Enumerate once and start the background refresh task"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.refresh, True)
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+        print(f"📷 Device registry started ({self.backend}): {len(self.get_devices())} device(s)")
+    
+    async def stop(self):
+        """Stop the background refresh task"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+    
+    def mark_in_use(self, index: int):
+        """Record that a capture holds this device (suppresses OpenCV probing)"""
+        with self._lock:
+            self._in_use.add(index)
+    
+    def release(self, index: int):
+        with self._lock:
+            self._in_use.discard(index)
+    
+    def is_in_use(self, index: int) -> bool:
+        with self._lock:
+            return index in self._in_use
+    
+    def get_devices(self, capture_only: bool = False) -> List[VideoDevice]:
+        """Get the cached device list (never touches the hardware)"""
+        if self.backend == "v4l2" and self.last_refresh == 0.0:
+            # Listing V4L2 nodes is cheap, so an un-started registry can still answer
+            self.refresh()
+        with self._lock:
+            devices = list(self._devices)
+        if capture_only:
+            devices = [d for d in devices if d.is_capture]
+        return devices
+    
+    def is_available(self, index: Optional[int] = None) -> bool:
+        """Whether any (or the given) capture device is known to exist"""
+        with self._lock:
+            if index is not None and index in self._in_use:
+                return True
+        devices = self.get_devices(capture_only=True)
+        if index is None:
+            return bool(devices)
+        return any(d.index == index for d in devices)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_use = sorted(self._in_use)
+        return {
+            "backend": self.backend,
+            "devices": [d.to_dict() for d in self.get_devices()],
+            "in_use": in_use,
+            "last_refresh": self.last_refresh,
+            "refresh_count": self.refresh_count,
+            "hotplug_events": self.hotplug_events,
+            "skipped_probes": self.skipped_probes
+        }
+
+
+# Singleton instance
+_device_registry: Optional[DeviceRegistry] = None
+
+
+def get_device_registry() -> DeviceRegistry:
+    """Get the singleton device registry instance"""
+    global _device_registry
+    if _device_registry is None:
+        _device_registry = DeviceRegistry()
+    return _device_registry
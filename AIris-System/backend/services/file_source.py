@@ -0,0 +1,125 @@
+"""
+File Source - Replays a video file or an image directory as a camera source
+"""
+
+import os
+from typing import Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".m4v", ".webm")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Playback modes
+PLAYBACK_REALTIME = "realtime"  # Pace frames by their original timestamps
+PLAYBACK_FIXED = "fixed"        # Pace frames at a fixed FPS
+PLAYBACK_FAST = "fast"          # As fast as the queue subscribers consume them
+
+PLAYBACK_MODES = (PLAYBACK_REALTIME, PLAYBACK_FIXED, PLAYBACK_FAST)
+
+# Image mtimes closer together than this (over 120 FPS) come from copying the files, not from
+# the recorder, and aren't usable as capture times
+MIN_IMAGE_INTERVAL_SEC = 1 / 120
+
+
+class FileFrame:
+    """One frame read from a file source"""
+    
+    __slots__ = ("index", "media_timestamp", "image", "jpeg")
+    
+    def __init__(self, index: int, media_timestamp: float, image: Optional[np.ndarray] = None,
+                 jpeg: Optional[bytes] = None):
+        self.index = index
+        self.media_timestamp = media_timestamp
+        self.image = image
+        self.jpeg = jpeg
+
+
+class FileFrameSource:
+    """Reads frames with their original timestamps from an MP4 (or other video) file or
+    from a directory of images.
+    
+    Video timestamps are the stream position in seconds. Image sequences use the files'
+    modification times (as written by the recorder), falling back to `default_fps`
+    spacing when consecutive mtimes aren't at least MIN_IMAGE_INTERVAL_SEC apart (e.g. the
+    files were copied). JPEG images are passed through undecoded, like ESP32 frames.
+    """
+    
+    def __init__(self, path: str, default_fps: float = 10.0):
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"Replay source not found: {path}")
+        self.path = path
+        self.default_fps = default_fps
+        self.is_directory = os.path.isdir(path)
+        self.images: List[str] = []
+        
+        if self.is_directory:
+            self.images = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            if not self.images:
+                raise ValueError(f"No images found in {path}")
+            self.frame_count = len(self.images)
+            self._timestamps = self._image_timestamps()
+            duration = self._timestamps[-1] - self._timestamps[0]
+            self.fps = (self.frame_count - 1) / duration if duration > 0 else default_fps
+        else:
+            if not path.lower().endswith(VIDEO_EXTENSIONS):
+                raise ValueError(f"Unsupported replay file type: {path}")
+            cap = cv2.VideoCapture(path)
+            try:
+                if not cap.isOpened():
+                    raise ValueError(f"Could not open video: {path}")
+                self.fps = cap.get(cv2.CAP_PROP_FPS) or default_fps
+                self.frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            finally:
+                cap.release()
+    
+    def _image_timestamps(self) -> List[float]:
+        """Original capture times of an image sequence"""
+        mtimes = [os.path.getmtime(p) for p in self.images]
+        intervals = [b - a for a, b in zip(mtimes, mtimes[1:])]
+        if intervals and min(intervals) >= MIN_IMAGE_INTERVAL_SEC:
+            return mtimes
+        return [i / self.default_fps for i in range(len(self.images))]
+    
+    def frames(self) -> Iterator[FileFrame]:
+        """Yield every frame once, in order"""
+        if self.is_directory:
+            yield from self._image_frames()
+        else:
+            yield from self._video_frames()
+    
+    def _image_frames(self) -> Iterator[FileFrame]:
+        for index, (image_path, timestamp) in enumerate(zip(self.images, self._timestamps)):
+            if image_path.lower().endswith((".jpg", ".jpeg")):
+                try:
+                    with open(image_path, 'rb') as f:
+                        jpeg = f.read()
+                except OSError as e:
+                    print(f"Skipping unreadable frame {image_path}: {e}")
+                    continue
+                yield FileFrame(index, timestamp, jpeg=jpeg)
+                continue
+            image = cv2.imread(image_path, cv2.IMREAD_COLOR)
+            if image is None:
+                print(f"Skipping unreadable frame {image_path}")
+                continue
+            yield FileFrame(index, timestamp, image=image)
+    
+    def _video_frames(self) -> Iterator[FileFrame]:
+        cap = cv2.VideoCapture(self.path)
+        try:
+            index = 0
+            while True:
+                ret, frame = cap.read()
+                if not ret or frame is None:
+                    break
+                position_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+                timestamp = position_ms / 1000.0 if position_ms > 0 or index == 0 else index / self.fps
+                yield FileFrame(index, timestamp, image=frame)
+                index += 1
+        finally:
+            cap.release()
@@ -0,0 +1,259 @@
+"""
+Frame Bus - Fans captured frames out to independent subscribers
+"""
+
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+# Delivery policies
+POLICY_LATEST = "latest"        # Keep only the newest undelivered frame
+POLICY_EVERY_NTH = "every_nth"  # Keep only every Nth published frame (latest-only among those)
+POLICY_QUEUE = "queue"          # Bounded FIFO, oldest frames are dropped when full
+
+POLICIES = (POLICY_LATEST, POLICY_EVERY_NTH, POLICY_QUEUE)
+
+
+class FrameSubscription:
+    """Async iterator over frames published on a FrameBus.
+    
+    Yields captured frames (with seq, timestamp and image) and delivers each
+    sequence number at most once.
+    """
+    
+    def __init__(self, bus: "FrameBus", name: str, policy: str = POLICY_LATEST,
+                 every_n: int = 1, maxsize: int = 4):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown frame bus policy: {policy}")
+        self.bus = bus
+        self.name = name
+        self.policy = policy
+        self.every_n = max(1, int(every_n))
+        self._loop = asyncio.get_running_loop()
+        self._pending: deque = deque(maxlen=max(1, int(maxsize)) if policy == POLICY_QUEUE else 1)
+        self._event = asyncio.Event()
+        self._closed = False
+        self._last_seq = 0
+        self._offered = 0  # Frames counted by the every-Nth policy (publisher thread)
+        
+        # Frames handed over by the publisher thread vs. frames that reached offer(); each is
+        # written by one thread only, so the publisher can read the backlog without a lock
+        self._scheduled = 0
+        self._received = 0
+        
+        # Latest-only policies: the newest frame waiting for the one pending delivery callback
+        self._slot = None
+        self._slot_scheduled = False
+        self._slot_lock = threading.Lock()
+        self._coalesced = 0  # Frames replaced in the slot (publisher thread)
+        
+        # Stats
+        self.delivered = 0
+        self.dropped = 0           # Frames replaced or evicted before the consumer got to them
+        self.skipped = 0           # Frames filtered out by the every-Nth policy
+        self.duplicates_skipped = 0  # Frames with a sequence number that was already seen
+    
+    def offer(self, frame):
+        """Hand a frame to this subscription (must run on the subscriber's event loop)"""
+        if self._closed:
+            return
+        if frame.seq <= self._last_seq or any(p.seq >= frame.seq for p in self._pending):
+            self.duplicates_skipped += 1
+            return
+        
+        if len(self._pending) == self._pending.maxlen:
+            # deque(maxlen) drops the oldest entry on append
+            self.dropped += 1
+        self._pending.append(frame)
+        self._event.set()
+    
+    def _receive(self, frame):
+        self._received += 1
+        self.offer(frame)
+    
+    def _receive_slot(self):
+        with self._slot_lock:
+            frame, self._slot = self._slot, None
+            self._slot_scheduled = False
+        if frame is not None:
+            self.offer(frame)
+    
+    def _flush(self):
+        """Discard undelivered frames (e.g. after the camera stops)"""
+        with self._slot_lock:
+            self._slot = None
+        self._pending.clear()
+    
+    def _offer_threadsafe(self, frame):
+        """Schedule offer() on the subscriber's loop from any thread.
+        
+        Queue subscriptions get one callback per frame. The other policies only keep the newest
+        frame, so frames wait in a slot and at most one callback is pending, which delivers
+        whatever is newest by the time it runs.
+        """
+        if self._closed:
+            return
+        if self.policy == POLICY_QUEUE:
+            self._scheduled += 1
+            self._call_soon(self._receive, frame)
+            return
+        
+        if self.policy == POLICY_EVERY_NTH:
+            self._offered += 1
+            if self._offered % self.every_n != 0:
+                self.skipped += 1
+                return
+        with self._slot_lock:
+            if self._slot is not None:
+                self._coalesced += 1
+            self._slot = frame
+            if self._slot_scheduled:
+                return
+            self._slot_scheduled = True
+        self._call_soon(self._receive_slot)
+    
+    def _call_soon(self, callback, *args):
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # Loop already closed (shutdown) - nothing left to deliver to
+            self._closed = True
+    
+    async def next(self, timeout: Optional[float] = None):
+        """Wait for the next undelivered frame. Returns None on timeout or when closed."""
+        while not self._pending:
+            if self._closed:
+                return None
+            self._event.clear()
+            try:
+                if timeout is None:
+                    await self._event.wait()
+                else:
+                    await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        
+        frame = self._pending.popleft()
+        self._last_seq = frame.seq
+        self.delivered += 1
+        return frame
+    
+    def has_room(self) -> bool:
+        """True when one more frame can be handed over without dropping an undelivered one
+        (only meaningful for the queue policy; the others always keep just the newest)"""
+        backlog = (self._scheduled - self._received) + len(self._pending)
+        return self._closed or backlog < self._pending.maxlen
+    
+    def close(self):
+        """Stop receiving frames and detach from the bus"""
+        self._closed = True
+        self._flush()
+        self._event.set()
+        self.bus.unsubscribe(self)
+    
+    @property
+    def closed(self) -> bool:
+        return self._closed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get delivery statistics for this subscription"""
+        return {
+            "name": self.name,
+            "policy": self.policy,
+            "every_n": self.every_n,
+            "last_seq": self._last_seq,
+            "pending": len(self._pending),
+            "delivered": self.delivered,
+            "dropped": self.dropped + self._coalesced,
+            "skipped": self.skipped,
+            "duplicates_skipped": self.duplicates_skipped
+        }
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        frame = await self.next()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FrameBus:
+    """Publish/subscribe fan-out of captured frames.
+    
+    publish() may be called from any thread (typically the camera capture thread);
+    frames are delivered on each subscriber's own event loop.
+    """
+    
+    def __init__(self):
+        self._subscribers: List[FrameSubscription] = []
+        self._lock = threading.Lock()
+        self.published = 0
+    
+    def subscribe(self, name: str, policy: str = POLICY_LATEST, every_n: int = 1,
+                  maxsize: int = 4) -> FrameSubscription:
+        """Create a subscription (must be called from a running event loop)"""
+        subscription = FrameSubscription(self, name, policy=policy, every_n=every_n, maxsize=maxsize)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: FrameSubscription):
+        """Remove a subscription from the bus"""
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+    
+    def publish(self, frame):
+        """Deliver a frame to every subscriber"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscription in subscribers:
+            subscription._offer_threadsafe(frame)
+    
+    def has_room(self) -> bool:
+        """True when every queue subscriber can take another frame without dropping one.
+        Publishers that can wait (file replay) check this to pace themselves to those subscribers."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return all(s.has_room() for s in subscribers if s.policy == POLICY_QUEUE)
+    
+    def has_queue_subscribers(self) -> bool:
+        """True when some subscriber takes every frame (queue policy)"""
+        with self._lock:
+            return any(s.policy == POLICY_QUEUE for s in self._subscribers)
+    
+    def flush(self):
+        """Discard frames that subscribers haven't consumed yet"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        for subscription in subscribers:
+            if subscription._loop is current_loop:
+                subscription._flush()
+                continue
+            try:
+                subscription._loop.call_soon_threadsafe(subscription._flush)
+            except RuntimeError:
+                pass
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get bus-wide and per-subscriber statistics"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "published": self.published,
+            "subscribers": [s.get_stats() for s in subscribers]
+        }
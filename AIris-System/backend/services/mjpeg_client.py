@@ -0,0 +1,162 @@
+"""
+MJPEG Client - Async multipart/x-mixed-replace reader for the ESP32-CAM stream
+"""
+
+import re
+import aiohttp
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+# JPEG start/end of image markers, used when a part has no Content-Length header
+JPEG_SOI = b"\xff\xd8"
+JPEG_EOI = b"\xff\xd9"
+
+# Upper bound on buffered bytes while looking for a part boundary (guards against garbage streams)
+MAX_BUFFER_BYTES = 8 * 1024 * 1024
+
+
+class MJPEGStreamError(Exception):
+    """Raised when the MJPEG stream can't be opened or is malformed"""
+
+
+class MJPEGStreamClient:
+    """Reads an MJPEG (multipart/x-mixed-replace) HTTP stream and yields the raw JPEG bytes
+    of every part, without decoding them.
+    """
+    
+    def __init__(self, url: str, connect_timeout: float = 5.0, read_timeout: float = 5.0,
+                 chunk_size: int = 16384):
+        self.url = url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.chunk_size = chunk_size
+        self.bytes_received = 0
+    
+    @staticmethod
+    def _parse_boundary(content_type: str) -> Optional[bytes]:
+        """Extract the multipart boundary from a Content-Type header"""
+        match = re.search(r'boundary="?([^";]+)"?', content_type or "", re.IGNORECASE)
+        if not match:
+            return None
+        boundary = match.group(1).strip()
+        # Some servers (including older ESP32 firmware) already prefix the boundary with "--"
+        if boundary.startswith("--"):
+            boundary = boundary[2:]
+        return boundary.encode()
+    
+    @staticmethod
+    def _parse_headers(raw: bytes) -> Dict[str, str]:
+        """Parse part headers into a lower-cased dict"""
+        headers = {}
+        for line in raw.split(b"\r\n"):
+            if b":" in line:
+                key, value = line.split(b":", 1)
+                headers[key.strip().lower().decode(errors="ignore")] = value.strip().decode(errors="ignore")
+        return headers
+    
+    async def frames(self) -> AsyncIterator[bytes]:
+        """Connect and yield JPEG bytes for each part until the stream ends or errors"""
+        timeout = aiohttp.ClientTimeout(total=None, connect=self.connect_timeout,
+                                        sock_read=self.read_timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(self.url) as response:
+                if response.status != 200:
+                    raise MJPEGStreamError(f"Stream returned HTTP {response.status}")
+                
+                boundary = self._parse_boundary(response.headers.get("Content-Type", ""))
+                parser = (
+                    _MultipartParser(boundary) if boundary is not None else _JPEGMarkerParser()
+                )
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    self.bytes_received += len(chunk)
+                    for jpeg in parser.feed(chunk):
+                        yield jpeg
+
+
+class _MultipartParser:
+    """Incremental parser for multipart/x-mixed-replace bodies"""
+    
+    def __init__(self, boundary: bytes):
+        self.delimiter = b"--" + boundary
+        self.buffer = bytearray()
+        self.headers: Optional[Dict[str, str]] = None
+    
+    def feed(self, chunk: bytes):
+        """Add bytes to the buffer and return every complete JPEG part"""
+        self.buffer.extend(chunk)
+        parts = []
+        while True:
+            part, consumed = self._next_part()
+            if consumed == 0:
+                break
+            del self.buffer[:consumed]
+            if part:
+                parts.append(part)
+        
+        if len(self.buffer) > MAX_BUFFER_BYTES:
+            raise MJPEGStreamError("MJPEG part exceeded maximum buffer size")
+        return parts
+    
+    def _next_part(self) -> Tuple[Optional[bytes], int]:
+        """Try to extract one part from the buffer. Returns (jpeg, bytes_consumed)."""
+        buf = self.buffer
+        if self.headers is None:
+            start = buf.find(self.delimiter)
+            if start < 0:
+                # Keep a tail in case the delimiter is split across chunks
+                keep = len(self.delimiter)
+                return None, max(0, len(buf) - keep)
+            header_end = buf.find(b"\r\n\r\n", start)
+            if header_end < 0:
+                # Discard anything before the delimiter while waiting for the headers
+                return None, start
+            header_block = bytes(buf[start + len(self.delimiter):header_end])
+            self.headers = self._strip_and_parse(header_block)
+            return None, header_end + 4
+        
+        length = self.headers.get("content-length")
+        if length and length.isdigit():
+            size = int(length)
+            if len(buf) < size:
+                return None, 0
+            jpeg = bytes(buf[:size])
+            self.headers = None
+            return jpeg, size
+        
+        # No Content-Length - the part ends at the next delimiter
+        end = buf.find(self.delimiter)
+        if end < 0:
+            return None, 0
+        jpeg = bytes(buf[:end]).rstrip(b"\r\n")
+        self.headers = None
+        return jpeg, end
+    
+    @staticmethod
+    def _strip_and_parse(header_block: bytes) -> Dict[str, str]:
+        return MJPEGStreamClient._parse_headers(header_block.strip(b"\r\n"))
+
+
+class _JPEGMarkerParser:
+    """Fallback parser that splits a byte stream on JPEG SOI/EOI markers"""
+    
+    def __init__(self):
+        self.buffer = bytearray()
+    
+    def feed(self, chunk: bytes):
+        self.buffer.extend(chunk)
+        parts = []
+        while True:
+            start = self.buffer.find(JPEG_SOI)
+            if start < 0:
+                # Keep the last byte in case a marker is split across chunks
+                del self.buffer[:-1]
+                break
+            end = self.buffer.find(JPEG_EOI, start + 2)
+            if end < 0:
+                del self.buffer[:start]
+                break
+            parts.append(bytes(self.buffer[start:end + 2]))
+            del self.buffer[:end + 2]
+        
+        if len(self.buffer) > MAX_BUFFER_BYTES:
+            raise MJPEGStreamError("MJPEG frame exceeded maximum buffer size")
+        return parts
@@ -3,6 +3,8 @@ Model Service - Handles loading and managing ML models
 """
 
 import os
+import asyncio
+import threading
 import torch
 from ultralytics import YOLO
 import mediapipe as mp
@@ -11,6 +13,9 @@ from typing import Optional, Tuple
 import yaml
 import cv2
 
+from services.captioner_registry import CaptionerSpec, get_captioner_registry
+from services.detector_backend import BACKEND_TORCH, DetectorBackend
+
 class ModelService:
     def __init__(self):
         self.yolo_model: Optional[YOLO] = None
@@ -18,7 +23,11 @@ class ModelService:
         self.vision_processor: Optional[BlipProcessor] = None
         self.vision_model: Optional[BlipForConditionalGeneration] = None
         self.device: str = "cpu"
+        self._vision_lock = threading.Lock()
+        self.captioner: Optional[CaptionerSpec] = None  # Variant behind vision_model
+        self.caption_latency_budget_ms: Optional[float] = None  # Used by CAPTION_MODEL=auto
         self.yolo_device: str = "cpu"  # Device for YOLO inference
+        self.yolo_backend: str = BACKEND_TORCH  # "torch", "onnx" or "openvino" (+ "-int8")
         self.prompts: dict = {}
         self.models_loaded = False
         
@@ -72,14 +81,29 @@ class ModelService:
             self.prompts = {}
     
     async def _load_yolo_model(self):
-        """Load YOLO object detection model - optimized for macOS ARM (M1/M2)"""
+        """Load YOLO object detection model - optimized for macOS ARM (M1/M2).
+        YOLO_BACKEND=onnx / openvino runs an exported (optionally INT8) model on the CPU instead."""
+        model_path = os.path.join(os.path.dirname(__file__), '..', self.YOLO_MODEL_PATH)
+        if not os.path.exists(model_path):
+            # Try to download or use default
+            model_path = 'yolo26s.pt'
+        
         try:
-            model_path = os.path.join(os.path.dirname(__file__), '..', self.YOLO_MODEL_PATH)
-            if os.path.exists(model_path):
-                self.yolo_model = YOLO(model_path)
-            else:
-                # Try to download or use default
-                self.yolo_model = YOLO('yolo26s.pt')
+            backend = DetectorBackend(model_path)
+            if backend.backend != BACKEND_TORCH:
+                # A stale cache means exporting (and calibrating) first, which takes minutes
+                self.yolo_model = await asyncio.get_running_loop().run_in_executor(None, self._load_exported_yolo, backend)
+                self.yolo_device = 'cpu'
+                self.yolo_backend = backend.name
+                print(f"YOLO model loaded and verified (using {backend.name} on CPU)")
+                return
+        except Exception as e:
+            print(f"Error loading YOLO {os.environ.get('YOLO_BACKEND')} backend: {e}")
+            print("Falling back to the PyTorch backend")
+        
+        try:
+            self.yolo_model = YOLO(model_path)
+            self.yolo_backend = BACKEND_TORCH
             
             # Verify model is actually loaded by doing a test inference
             import numpy as np
@@ -121,6 +145,13 @@ class ModelService:
             self.yolo_model = None
             self.yolo_device = 'cpu'
     
+    def _load_exported_yolo(self, backend: DetectorBackend) -> YOLO:
+        """Load (exporting if needed) and verify an exported YOLO model; runs on a worker thread"""
+        import numpy as np
+        model = backend.load()
+        _ = model.predict(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False, device='cpu')
+        return model
+    
     async def _load_hand_model(self):
         """Load MediaPipe hand detection model with aggressive M1 Mac compatibility fixes"""
         import io
@@ -310,20 +341,36 @@ class ModelService:
             return "cpu"
     
     async def load_vision_model(self) -> Tuple[BlipProcessor, BlipForConditionalGeneration, str]:
-        """Load BLIP vision model (lazy loading)"""
-        if self.vision_model is not None:
+        """Load BLIP vision model (lazy loading) without blocking the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_vision_model)
+    
+    def set_caption_budget(self, latency_ms: float):
+        """Set the per-caption latency the captioner has to fit (takes effect when it's loaded)"""
+        self.caption_latency_budget_ms = latency_ms
+    
+    def get_vision_model(self) -> Tuple[BlipProcessor, BlipForConditionalGeneration, str]:
+        """Get the BLIP vision model, loading it on first use (blocking - call it off the event loop).
+        The variant comes from the captioner registry (CAPTION_MODEL, blip-large by default)."""
+        with self._vision_lock:
+            if self.vision_model is not None:
+                return self.vision_processor, self.vision_model, self.device
+            
+            print("Initializing BLIP vision model...")
+            self.device = self._get_device()
+            registry = get_captioner_registry()
+            captioner = registry.select(self.device, self.caption_latency_budget_ms)
+            
+            print(f"BLIP using device: {self.device}, captioner: {captioner.name}")
+            self.vision_processor, self.vision_model = registry.load(captioner, self.device)
+            self.captioner = captioner
+            
+            if os.environ.get("CAPTION_BENCHMARK_ON_LOAD", "false").lower() == "true":
+                registry.measure(captioner, self.vision_processor, self.vision_model, self.device)
+                budget = self.caption_latency_budget_ms
+                if budget is not None and captioner.latency_ms > budget:
+                    print(f"⚠️ Captioner '{captioner.name}' takes {captioner.latency_ms:.0f} ms, over the {budget:.0f} ms budget")
+            
             return self.vision_processor, self.vision_model, self.device
-        
-        print("Initializing BLIP vision model...")
-        self.device = self._get_device()
-        
-        print(f"BLIP using device: {self.device}")
-        self.vision_processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-large")
-        self.vision_model = BlipForConditionalGeneration.from_pretrained(
-            "Salesforce/blip-image-captioning-large"
-        ).to(self.device)
-        
-        return self.vision_processor, self.vision_model, self.device
     
     def get_yolo_model(self) -> Optional[YOLO]:
         """Get YOLO model"""
@@ -337,6 +384,10 @@ class ModelService:
         """Get the device YOLO should use for inference"""
         return getattr(self, 'yolo_device', 'cpu')
     
+    def get_yolo_backend(self) -> str:
+        """Get the YOLO inference backend in use"""
+        return self.yolo_backend
+    
     def get_prompts(self) -> dict:
         """Get prompts configuration"""
         return self.prompts
@@ -353,6 +404,7 @@ class ModelService:
             del self.vision_processor
             self.vision_model = None
             self.vision_processor = None
+            self.captioner = None
         
         if self.hand_model is not None:
             self.hand_model.close()
@@ -12,13 +12,13 @@ import asyncio
 import re
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Tuple
-from PIL import Image
-import torch
 from groq import Groq
 
 from services.model_service import ModelService
+from services.caption_worker import CaptionDropped, CaptionWorker
 from services.email_service import get_email_service
 from utils.frame_utils import draw_guidance_on_frame, load_font
+from utils.frame_views import FrameViews
 
 
 # Risk factor keywords for quick frame-level assessment
@@ -115,6 +115,7 @@ class SceneDescriptionService:
         self.current_session_log = {}
         self.log_filename = ""
         self.frame_description_buffer: List[Dict[str, Any]] = []  # Now stores {timestamp, description, risk_indicators}
+        self.pending_captions: List[Tuple[float, str, asyncio.Future]] = []  # Captions in flight, in frame order
         self.logs = {}
         
         # Constants - OPTIMIZED FOR 2 FPS
@@ -123,6 +124,17 @@ class SceneDescriptionService:
         self.SUMMARIZATION_BUFFER_SIZE = 5       # 5 frames = 2.5 seconds (faster summaries)
         self.RECORDINGS_DIR = "recordings"
         
+        # BLIP runs on its own thread; captioning a frame never blocks the event loop. Batches
+        # wait for the next analyzed frames, but not past the summary they feed into.
+        self.caption_worker = CaptionWorker(
+            model_service,
+            frame_interval_sec=self.FRAME_ANALYSIS_INTERVAL_SEC,
+            max_wait_ms=self.SUMMARIZATION_BUFFER_SIZE * self.FRAME_ANALYSIS_INTERVAL_SEC * 1000
+        )
+        
+        # With CAPTION_MODEL=auto, the captioner is the best measured one that keeps up with the analysis interval
+        self.model_service.set_caption_budget(self.FRAME_ANALYSIS_INTERVAL_SEC * 1000)
+        
         # Session stats
         self.descriptions_count = 0
         self.summaries_count = 0
@@ -370,6 +382,7 @@ Respond with JSON only."""
             "events": []
         }
         self.frame_description_buffer = []
+        self.pending_captions = []
         
         # Reset stats and state
         self.descriptions_count = 0
@@ -392,6 +405,13 @@ Respond with JSON only."""
         if not self.is_recording:
             return {"status": "error", "message": "No recording in progress"}
         
+        # Captions still in flight (e.g. a partial batch) get their risk and fall checks
+        # before the log is saved
+        descriptions = []
+        for frame_offset, timestamp, description in await self._collect_captions(wait=True):
+            await self._analyze_description(description, frame_offset, timestamp)
+            descriptions.append(description)
+        
         self.is_recording = False
         self.current_session_log["session_end"] = datetime.now().isoformat()
         
@@ -410,11 +430,13 @@ Respond with JSON only."""
             "status": "success",
             "message": "Recording stopped and saved",
             "log_filename": log_filename,
-            "log_id": log_id
+            "log_id": log_id,
+            "descriptions": descriptions
         }
     
-    async def process_frame(self, frame: np.ndarray) -> Dict[str, Any]:
-        """Process a frame for scene description with risk assessment"""
+    async def process_frame(self, frame: np.ndarray, views: Optional[FrameViews] = None) -> Dict[str, Any]:
+        """Process a frame for scene description with risk assessment.
+        `views` carries the frame's shared derived views (BLIP uses the 384x384 RGB view)."""
         annotated_frame = frame.copy()
         elapsed_seconds = 0
         
@@ -423,10 +445,11 @@ Respond with JSON only."""
             elapsed_seconds = time.time() - self.recording_start_time
             elapsed_minutes = elapsed_seconds / 60
             if elapsed_minutes >= self.RECORDING_SPAN_MINUTES:
-                await self.stop_recording()
+                stopped = await self.stop_recording()
                 return {
                     "annotated_frame": annotated_frame,
                     "description": None,
+                    "descriptions": stopped.get("descriptions", []),
                     "summary": None,
                     "safety_alert": False,
                     "risk_score": 0.0,
@@ -441,96 +464,29 @@ Respond with JSON only."""
             self.last_frame_analysis_time = current_time
             frame_offset = elapsed_seconds  # Time since recording started
             
-            # Get vision model
-            vision_processor, vision_model, device = await self.model_service.load_vision_model()
+            # Generate description (BLIP's processor would resize to 384x384 anyway)
+            if views is None:
+                views = FrameViews(frame)
+            self._submit_caption(views.square_384, frame_offset)
+        
+        if self.is_recording and self.pending_captions:
+            # Without batching this waits for the caption just submitted; with batching it takes
+            # the captions the worker has finished (the others are picked up on later frames)
+            descriptions = await self._collect_captions(wait=self.caption_worker.MAX_BATCH_SIZE <= 1)
             
-            if vision_processor and vision_model:
-                # Generate description
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                image = Image.fromarray(rgb_frame)
-                inputs = vision_processor(images=image, return_tensors="pt").to(device)
-                generated_ids = vision_model.generate(**inputs, max_length=50)
-                description = vision_processor.decode(generated_ids[0], skip_special_tokens=True).strip()
-                
-                # Quick risk assessment for this frame
-                frame_risk, risk_indicators = self._quick_risk_assessment(description)
-                
-                # Track if fall alert was sent this frame
+            if descriptions:
+                # Risk and fall checks for each new description (several when a batch completes)
+                frame_risk = 0.0
                 fall_alert_sent = False
-                
-                # === FALL DETECTION: STATIC-ONLY FRAME (IMMEDIATE TRIGGER) ===
-                is_static, static_reason = self._is_static_only_frame(description)
-                if is_static:
-                    print(f"🚨 STATIC-ONLY FRAME DETECTED - IMMEDIATE FALL ALERT!")
-                    print(f"   Reason: {static_reason}")
-                    
-                    # Send immediate fall alert (with cooldown check)
-                    email_sent = await self._send_fall_alert_email()
-                    if email_sent:
-                        self.alerts_count += 1
-                        fall_alert_sent = True
-                        
-                        # Log the event
-                        self.current_session_log["events"].append({
-                            "timestamp": datetime.now().isoformat(),
-                            "type": "FALL_ALERT",
-                            "summary": f"Possible fall or collision detected: {static_reason}",
-                            "risk_score": 0.95
-                        })
-                        
-                        # Track for daily/weekly summary
-                        self._track_fall_event()
-                    else:
-                        print("⚠️ Fall alert not sent (cooldown or email not configured)")
-                    
-                    # Reset fall detection state
-                    self.fall_confirmation_count = 0
-                
-                # === FALL DETECTION: TRANSITION-BASED (BACKUP) ===
-                elif self._check_fall_transition(self.previous_description, description):
-                    self.fall_confirmation_count += 1
-                    print(f"⚠️ Fall transition signal! Count: {self.fall_confirmation_count}/{self.FALL_CONFIRMATION_THRESHOLD}")
-                    
-                    if self.fall_confirmation_count >= self.FALL_CONFIRMATION_THRESHOLD:
-                        print("🚨 FALL CONFIRMED via transition - Sending alert!")
-                        
-                        # Send fall alert (with cooldown check)
-                        email_sent = await self._send_fall_alert_email()
-                        if email_sent:
-                            self.alerts_count += 1
-                            fall_alert_sent = True
-                            
-                            self.current_session_log["events"].append({
-                                "timestamp": datetime.now().isoformat(),
-                                "type": "FALL_ALERT",
-                                "summary": "Possible fall or collision detected (scene transition)",
-                                "risk_score": 0.95
-                            })
-                            
-                            self._track_fall_event()
-                        else:
-                            print("⚠️ Fall alert not sent (cooldown or email not configured)")
-                        
-                        self.fall_confirmation_count = 0
-                else:
-                    # No fall detected - reset counter
-                    self.fall_confirmation_count = 0
-                
-                self.previous_description = description
-                
-                # Add to buffer with metadata
-                self.frame_description_buffer.append({
-                    "timestamp": datetime.now().isoformat(),
-                    "offset": frame_offset,
-                        "description": description,
-                    "frame_risk": frame_risk,
-                    "risk_indicators": risk_indicators
-                })
-                self.descriptions_count += 1
+                for offset, timestamp, description in descriptions:
+                    risk, alert_sent = await self._analyze_description(description, offset, timestamp)
+                    frame_risk = max(frame_risk, risk)
+                    fall_alert_sent = fall_alert_sent or alert_sent
                 
                 # === SUMMARIZATION WITH RISK SCORING (every 20 frames = 10 sec) ===
                 if len(self.frame_description_buffer) >= self.SUMMARIZATION_BUFFER_SIZE:
                     result = await self._process_buffer(annotated_frame, elapsed_seconds, description)
+                    result["descriptions"] = [description for _, _, description in descriptions]
                     # Add fall_alert_sent flag and merge alert_sent
                     result["fall_alert_sent"] = fall_alert_sent
                     if fall_alert_sent:
@@ -549,6 +505,7 @@ Respond with JSON only."""
                     return {
                         "annotated_frame": annotated_frame,
                         "description": description,
+                        "descriptions": [description for _, _, description in descriptions],
                         "summary": None,
                         "safety_alert": fall_alert_sent,
                         "risk_score": 0.95 if fall_alert_sent else frame_risk,
@@ -560,6 +517,13 @@ Respond with JSON only."""
                     }
         
         # No analysis this frame - return current state
+        return self.render_status(frame)
+    
+    def render_status(self, frame: np.ndarray) -> Dict[str, Any]:
+        """The frame with the recording status drawn on it and the current state, without
+        analyzing it (also used for polls while the SceneMonitor does the analysis)"""
+        annotated_frame = frame.copy()
+        elapsed_seconds = time.time() - self.recording_start_time if self.is_recording else 0
         if self.is_recording:
             buffer_count = len(self.frame_description_buffer)
             status_text = f"🔴 REC {int(elapsed_seconds)}s | {buffer_count}/{self.SUMMARIZATION_BUFFER_SIZE}"
@@ -580,6 +544,120 @@ Respond with JSON only."""
             "alert_sent": False
         }
     
+    def _submit_caption(self, image: np.ndarray, frame_offset: float):
+        """Queue a frame for captioning without waiting for it. With CAPTION_MAX_BATCH_SIZE > 1
+        the worker batches it with the next analyzed frames (see CaptionWorker for the wait)."""
+        timestamp = datetime.now().isoformat()
+        caption = asyncio.ensure_future(self.caption_worker.caption(image))
+        self.pending_captions.append((frame_offset, timestamp, caption))
+    
+    async def _collect_captions(self, wait: bool = False) -> List[Tuple[float, str, str]]:
+        """The (offset, timestamp, description) of the captions that are ready, in frame order.
+        With `wait`, waits for every caption in flight."""
+        ready = []
+        while self.pending_captions:
+            frame_offset, timestamp, caption = self.pending_captions[0]
+            if not caption.done():
+                if not wait:
+                    break
+                await asyncio.wait([caption])
+                continue
+            self.pending_captions.pop(0)
+            try:
+                ready.append((frame_offset, timestamp, caption.result()))
+            except CaptionDropped:
+                continue  # A newer frame took its place in the caption queue
+        return ready
+    
+    async def wait_for_caption(self, timeout: float):
+        """Sleep up to `timeout` seconds, waking early when the oldest caption in flight is ready"""
+        if self.pending_captions:
+            await asyncio.wait([self.pending_captions[0][2]], timeout=timeout)
+        else:
+            await asyncio.sleep(timeout)
+    
+    async def _analyze_description(self, description: str, frame_offset: float,
+                                   timestamp: str) -> Tuple[float, bool]:
+        """Risk assessment and fall detection for one frame description, which is then added to
+        the summarization buffer. Returns (frame_risk, fall_alert_sent)."""
+        # Quick risk assessment for this frame
+        frame_risk, risk_indicators = self._quick_risk_assessment(description)
+        
+        # Track if fall alert was sent this frame
+        fall_alert_sent = False
+        
+        # === FALL DETECTION: STATIC-ONLY FRAME (IMMEDIATE TRIGGER) ===
+        is_static, static_reason = self._is_static_only_frame(description)
+        if is_static:
+            print(f"🚨 STATIC-ONLY FRAME DETECTED - IMMEDIATE FALL ALERT!")
+            print(f"   Reason: {static_reason}")
+            
+            # Send immediate fall alert (with cooldown check)
+            email_sent = await self._send_fall_alert_email()
+            if email_sent:
+                self.alerts_count += 1
+                fall_alert_sent = True
+                
+                # Log the event
+                self.current_session_log["events"].append({
+                    "timestamp": datetime.now().isoformat(),
+                    "type": "FALL_ALERT",
+                    "summary": f"Possible fall or collision detected: {static_reason}",
+                    "risk_score": 0.95
+                })
+                
+                # Track for daily/weekly summary
+                self._track_fall_event()
+            else:
+                print("⚠️ Fall alert not sent (cooldown or email not configured)")
+            
+            # Reset fall detection state
+            self.fall_confirmation_count = 0
+        
+        # === FALL DETECTION: TRANSITION-BASED (BACKUP) ===
+        elif self._check_fall_transition(self.previous_description, description):
+            self.fall_confirmation_count += 1
+            print(f"⚠️ Fall transition signal! Count: {self.fall_confirmation_count}/{self.FALL_CONFIRMATION_THRESHOLD}")
+            
+            if self.fall_confirmation_count >= self.FALL_CONFIRMATION_THRESHOLD:
+                print("🚨 FALL CONFIRMED via transition - Sending alert!")
+                
+                # Send fall alert (with cooldown check)
+                email_sent = await self._send_fall_alert_email()
+                if email_sent:
+                    self.alerts_count += 1
+                    fall_alert_sent = True
+                    
+                    self.current_session_log["events"].append({
+                        "timestamp": datetime.now().isoformat(),
+                        "type": "FALL_ALERT",
+                        "summary": "Possible fall or collision detected (scene transition)",
+                        "risk_score": 0.95
+                    })
+                    
+                    self._track_fall_event()
+                else:
+                    print("⚠️ Fall alert not sent (cooldown or email not configured)")
+                
+                self.fall_confirmation_count = 0
+        else:
+            # No fall detected - reset counter
+            self.fall_confirmation_count = 0
+        
+        self.previous_description = description
+        
+        # Add to buffer with metadata
+        self.frame_description_buffer.append({
+            "timestamp": timestamp,
+            "offset": frame_offset,
+            "description": description,
+            "frame_risk": frame_risk,
+            "risk_indicators": risk_indicators
+        })
+        self.descriptions_count += 1
+        
+        return frame_risk, fall_alert_sent
+    
     async def _process_buffer(self, annotated_frame: np.ndarray, elapsed_seconds: float, 
                               latest_description: str) -> Dict[str, Any]:
         """Process the full buffer with LLM for summary and risk assessment"""
@@ -0,0 +1,208 @@
+"""
+Scene Events - Event log and server-side monitoring loop for scene description
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+# Event types pushed to /scene-description/events
+EVENT_DESCRIPTION = "description"
+EVENT_SUMMARY = "summary"
+EVENT_RISK = "risk"
+EVENT_ALERT = "alert"
+EVENT_RECORDING = "recording"
+
+
+class SceneEventLog:
+    """Ring buffer of scene description events with increasing ids.
+    
+    Subscribers replay what they missed with `events_after(last_id)` (the SSE Last-Event-ID)
+    and then wait for new events. Only the newest `maxlen` events are kept.
+    """
+    
+    def __init__(self, maxlen: Optional[int] = None):
+        self.maxlen = maxlen or int(os.environ.get("SCENE_EVENT_BUFFER_SIZE", "500"))
+        self._events: deque = deque(maxlen=self.maxlen)
+        # Ids start from the boot time in ms so they keep increasing across restarts
+        # and a client's Last-Event-ID from before a restart reads as a gap
+        self._next_id = int(time.time() * 1000)
+        self._new_event = asyncio.Event()
+        
+        # Last published risk score, so risk events are only sent when it changes
+        self._last_risk: Optional[float] = None
+    
+    @property
+    def last_id(self) -> int:
+        return self._next_id - 1
+    
+    def publish(self, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Append an event and wake up waiting subscribers"""
+        event = {"id": self._next_id, "type": event_type, "time": time.time(), "data": data}
+        self._next_id += 1
+        self._events.append(event)
+        self._new_event.set()
+        self._new_event = asyncio.Event()
+        return event
+    
+    def publish_result(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Turn a SceneDescriptionService.process_frame result into events"""
+        events = []
+        # Several descriptions when a caption batch completed on this frame
+        descriptions = result.get("descriptions") or ([result["description"]] if result.get("description") else [])
+        for description in descriptions:
+            events.append(self.publish(EVENT_DESCRIPTION, {
+                "description": description,
+                "risk_score": result.get("risk_score", 0.0)
+            }))
+        if result.get("summary"):
+            events.append(self.publish(EVENT_SUMMARY, {
+                "summary": result["summary"],
+                "safety_alert": result.get("safety_alert", False),
+                "risk_score": result.get("risk_score", 0.0),
+                "risk_factors": result.get("risk_factors", []),
+                "confidence": result.get("confidence")
+            }))
+        
+        # Risk changes only count when the frame was actually analyzed
+        risk = round(float(result.get("risk_score") or 0.0), 2)
+        if (result.get("description") or result.get("summary")) and risk != self._last_risk:
+            self._last_risk = risk
+            events.append(self.publish(EVENT_RISK, {
+                "risk_score": risk,
+                "risk_factors": result.get("risk_factors", [])
+            }))
+        
+        if result.get("alert_sent"):
+            events.append(self.publish(EVENT_ALERT, {
+                "kind": "fall" if result.get("fall_alert_sent") else "risk",
+                "summary": result.get("summary") or result.get("description"),
+                "risk_score": result.get("risk_score", 0.0)
+            }))
+        
+        if result.get("message") and not result.get("is_recording"):
+            # Session ended on its own (e.g. the maximum recording span was reached)
+            events.append(self.publish(EVENT_RECORDING, {"is_recording": False, "message": result["message"]}))
+        return events
+    
+    def events_after(self, last_id: Optional[int]) -> List[Dict[str, Any]]:
+        """Events newer than `last_id` (none if it's None: the client only wants new events)"""
+        if last_id is None:
+            return []
+        if last_id > self.last_id:
+            last_id = 0  # From the future (clock changed); replay everything buffered
+        return [event for event in self._events if event["id"] > last_id]
+    
+    def missed(self, last_id: Optional[int]) -> bool:
+        """True if events after `last_id` have already been dropped from the buffer"""
+        if last_id is None or not self._events:
+            return False
+        return last_id < self._events[0]["id"] - 1
+    
+    async def wait(self, last_id: int, timeout: float) -> List[Dict[str, Any]]:
+        """Wait up to `timeout` seconds for events newer than `last_id`"""
+        if self.last_id <= last_id:
+            try:
+                await asyncio.wait_for(self._new_event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return []
+        return self.events_after(last_id)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "last_id": self.last_id,
+            "buffered": len(self._events),
+            "maxlen": self.maxlen
+        }
+
+
+class SceneMonitor:
+    """Runs the scene description pipeline server-side while a recording is active.
+    
+    Results go to the event log, so summaries and alerts are produced (and emailed)
+    even when no browser is polling /scene-description/process-frame.
+    """
+    
+    def __init__(self, scene_service, event_log: SceneEventLog, pipeline_lock: asyncio.Lock):
+        self.scene_service = scene_service
+        self.event_log = event_log
+        self.pipeline_lock = pipeline_lock
+        self.FRAME_WAIT_TIMEOUT_SEC = 1.0
+        self.STOP_TIMEOUT_SEC = float(os.environ.get("SCENE_MONITOR_STOP_TIMEOUT_SEC", "10"))
+        
+        self.camera_id: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._subscription = None
+        
+        # Stats
+        self.frames_processed = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    async def start(self, camera_service):
+        """Start monitoring a camera (restarts if it was monitoring another one)"""
+        if self.is_running and self.camera_id == camera_service.camera_id:
+            return
+        await self.stop()
+        self.camera_id = camera_service.camera_id
+        self._subscription = camera_service.subscribe(f"scene-monitor@{camera_service.camera_id}")
+        self._task = asyncio.create_task(self._run(self._subscription))
+        print(f"🛰️ Scene monitor started on camera '{self.camera_id}'")
+    
+    async def stop(self):
+        """Stop after the frame in progress, so its captions and results are published.
+        Only a frame still running after STOP_TIMEOUT_SEC is cancelled."""
+        task, self._task = self._task, None
+        if self._subscription is not None:
+            # Ends the loop once the current frame is done
+            self._subscription.close()
+            self._subscription = None
+        if task is None:
+            return
+        done, _ = await asyncio.wait({task}, timeout=self.STOP_TIMEOUT_SEC)
+        if not done:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        print("🛰️ Scene monitor stopped")
+    
+    async def _run(self, subscription):
+        service = self.scene_service
+        while service.is_recording and not subscription.closed:
+            # Only frames the service will analyze are worth decoding; sleep until the next one is due
+            # (or until a batched caption completes, so its checks aren't held back)
+            due_in = service.last_frame_analysis_time + service.FRAME_ANALYSIS_INTERVAL_SEC - time.time()
+            if due_in > 0:
+                await service.wait_for_caption(due_in)
+            if subscription.closed:
+                break
+            
+            captured = await subscription.next(timeout=self.FRAME_WAIT_TIMEOUT_SEC)
+            frame = captured.image if captured is not None else None
+            if frame is None:
+                continue  # Camera stopped or between frames; keep waiting while recording
+            try:
+                async with self.pipeline_lock:
+                    result = await service.process_frame(frame, views=captured.views)
+                self.frames_processed += 1
+                self.event_log.publish_result(result)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                print(f"Error in scene monitor: {e}")
+                await asyncio.sleep(self.FRAME_WAIT_TIMEOUT_SEC)
+        subscription.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "camera_id": self.camera_id,
+            "frames_processed": self.frames_processed,
+            "errors": self.errors,
+            "last_error": self.last_error
+        }
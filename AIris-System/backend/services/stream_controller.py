@@ -0,0 +1,184 @@
+"""
+Stream Controller - Per-connection adaptive frame rate, JPEG quality and resolution
+"""
+
+import os
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+# Resolution steps (fractions of the source size). Quantized so that clients in the same
+# state share encodes in the camera's encode cache.
+SCALE_STEPS = (1.0, 0.75, 0.5, 0.375, 0.25)
+QUALITY_STEP = 5
+
+
+def scaled_size(width: int, height: int, scale: float) -> Optional[Tuple[int, int]]:
+    """(width, height) scaled down, or None for full size"""
+    if scale >= 1.0 or not width or not height:
+        return None
+    # Even dimensions keep JPEG chroma subsampling clean
+    return max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
+
+
+class StreamController:
+    """Adapts one stream client's FPS, JPEG quality and resolution to how fast it absorbs frames.
+    
+    After every send the controller records how long the send took (a slow client or network
+    shows up as WebSocket backpressure, i.e. slow sends) and how many frames are waiting to be
+    sent. When sends eat into the frame budget it steps quality down first, then resolution,
+    then FPS; when there is plenty of headroom it restores them in the reverse order.
+    """
+    
+    def __init__(self, max_fps: float, max_quality: int, min_fps: Optional[float] = None,
+                 min_quality: Optional[int] = None, min_scale: Optional[float] = None,
+                 max_frame_age_sec: Optional[float] = None):
+        self.max_fps = max_fps
+        self.min_fps = min_fps or float(os.environ.get("STREAM_MIN_FPS", "3"))
+        self.max_quality = max_quality
+        self.min_quality = min_quality or int(os.environ.get("STREAM_MIN_QUALITY", "40"))
+        self.min_scale = min_scale or float(os.environ.get("STREAM_MIN_SCALE", "0.25"))
+        self.max_frame_age_sec = max_frame_age_sec or float(os.environ.get("STREAM_MAX_FRAME_AGE_SEC", "0.5"))
+        
+        # Current parameters
+        self.fps = max_fps
+        self.quality = max_quality
+        self.scale_index = 0
+        
+        # Congested when sends take more than this share of the frame interval,
+        # and relaxed when they take less than RELAX_RATIO of it for a while
+        self.CONGESTED_RATIO = 0.5
+        self.RELAX_RATIO = 0.15
+        self.ADJUST_COOLDOWN_SEC = 0.5
+        self.RELAX_HOLD_SEC = 2.0
+        
+        self._latency_ewma: Optional[float] = None
+        self._last_adjust = 0.0
+        self._relaxed_since: Optional[float] = None
+        self._recent_sends: deque = deque(maxlen=60)  # (time, bytes)
+        self._changed = True
+        
+        # Stats
+        self.sent = 0
+        self.dropped_stale = 0
+        self.adjustments = 0
+        self.queue_depth = 0
+        self.max_send_ms = 0.0
+    
+    @property
+    def scale(self) -> float:
+        return SCALE_STEPS[self.scale_index]
+    
+    @property
+    def frame_interval(self) -> float:
+        return 1.0 / self.fps
+    
+    def encode_size(self, width: int, height: int) -> Optional[Tuple[int, int]]:
+        """Target (width, height) for the current scale, or None for full size"""
+        return scaled_size(width, height, self.scale)
+    
+    @property
+    def variant(self) -> Tuple[Optional[int], float]:
+        """(quality, scale) frames are encoded with; quality None at full quality and size,
+        where the camera's own JPEG is forwarded. Clients in the same state share frames."""
+        if self.scale >= 1.0 and self.quality >= self.max_quality:
+            return None, 1.0
+        return self.quality, self.scale
+    
+    def is_stale(self, capture_timestamp: float) -> bool:
+        """True (and counted) if a frame is too old to be worth sending"""
+        if time.time() - capture_timestamp > self.max_frame_age_sec:
+            self.dropped_stale += 1
+            return True
+        return False
+    
+    def record_send(self, duration_sec: float, num_bytes: int, queue_depth: int = 0):
+        """Record one completed send and adapt the parameters"""
+        now = time.time()
+        self.sent += 1
+        self.queue_depth = queue_depth
+        self._recent_sends.append((now, num_bytes))
+        self.max_send_ms = max(self.max_send_ms, duration_sec * 1000)
+        if self._latency_ewma is None:
+            self._latency_ewma = duration_sec
+        else:
+            self._latency_ewma = 0.8 * self._latency_ewma + 0.2 * duration_sec
+        self._adapt(now)
+    
+    def _adapt(self, now: float):
+        if now - self._last_adjust < self.ADJUST_COOLDOWN_SEC:
+            return
+        budget = self.frame_interval
+        latency = self._latency_ewma or 0.0
+        
+        if latency > budget * self.CONGESTED_RATIO or self.queue_depth > 1:
+            self._relaxed_since = None
+            if self._degrade():
+                self._last_adjust = now
+            return
+        
+        if latency < budget * self.RELAX_RATIO and self.queue_depth == 0:
+            if self._relaxed_since is None:
+                self._relaxed_since = now
+            elif now - self._relaxed_since >= self.RELAX_HOLD_SEC:
+                if self._restore():
+                    self._last_adjust = now
+                self._relaxed_since = now
+        else:
+            self._relaxed_since = None
+    
+    def _degrade(self) -> bool:
+        """Step one parameter down: quality, then resolution, then FPS"""
+        if self.quality > self.min_quality:
+            self.quality = max(self.min_quality, self.quality - 2 * QUALITY_STEP)
+        elif self.scale_index + 1 < len(SCALE_STEPS) and SCALE_STEPS[self.scale_index + 1] >= self.min_scale:
+            self.scale_index += 1
+        elif self.fps > self.min_fps:
+            self.fps = max(self.min_fps, self.fps * 0.75)
+        else:
+            return False
+        self.adjustments += 1
+        self._changed = True
+        return True
+    
+    def _restore(self) -> bool:
+        """Step one parameter up: FPS, then resolution, then quality"""
+        if self.fps < self.max_fps:
+            self.fps = min(self.max_fps, self.fps + 2)
+        elif self.scale_index > 0:
+            self.scale_index -= 1
+        elif self.quality < self.max_quality:
+            self.quality = min(self.max_quality, self.quality + QUALITY_STEP)
+        else:
+            return False
+        self.adjustments += 1
+        self._changed = True
+        return True
+    
+    def pop_changed(self) -> bool:
+        """True once after the parameters changed (to notify the client)"""
+        changed, self._changed = self._changed, False
+        return changed
+    
+    def get_params(self) -> Dict[str, Any]:
+        return {
+            "fps": round(self.fps, 1),
+            "quality": self.quality,
+            "scale": self.scale
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        sends = list(self._recent_sends)
+        bytes_per_sec = 0.0
+        if len(sends) >= 2 and sends[-1][0] > sends[0][0]:
+            bytes_per_sec = sum(b for _, b in sends[1:]) / (sends[-1][0] - sends[0][0])
+        return {
+            **self.get_params(),
+            "send_latency_ms": round((self._latency_ewma or 0.0) * 1000, 1),
+            "max_send_ms": round(self.max_send_ms, 1),
+            "queue_depth": self.queue_depth,
+            "sent": self.sent,
+            "dropped_stale": self.dropped_stale,
+            "adjustments": self.adjustments,
+            "bytes_per_sec": int(bytes_per_sec)
+        }
@@ -0,0 +1,224 @@
+"""
+Stream Hub - Produces each outgoing frame once and fans it out to per-client mailboxes
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class Mailbox:
+    """Bounded queue of frames for one client. When the client falls behind the oldest
+    frame is dropped, so a slow client only ever loses frames; it never holds up the
+    producer or the other clients."""
+    
+    def __init__(self, name: str, maxsize: int = 2, fps: Optional[float] = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.fps = fps  # Rate this client wants (None: as fast as the channel produces)
+        self._items: deque = deque()  # (produced_at, payload)
+        self._event = asyncio.Event()
+        self._closed = False
+        
+        # Stats
+        self.created_at = time.time()
+        self.delivered = 0
+        self.dropped = 0
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+    
+    @property
+    def closed(self) -> bool:
+        return self._closed
+    
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+    
+    def offer(self, payload: Any, produced_at: float):
+        if self._closed:
+            return
+        if len(self._items) >= self.maxsize:
+            self._items.popleft()
+            self.dropped += 1
+        self._items.append((produced_at, payload))
+        self._event.set()
+    
+    async def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Wait for the next frame. Returns None on timeout or when closed."""
+        while not self._items:
+            if self._closed:
+                return None
+            self._event.clear()
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        
+        produced_at, payload = self._items.popleft()
+        lag_ms = (time.time() - produced_at) * 1000
+        self.lag_ms = lag_ms if self.delivered == 0 else 0.8 * self.lag_ms + 0.2 * lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        self.delivered += 1
+        return payload
+    
+    def close(self):
+        self._closed = True
+        self._items.clear()
+        self._event.set()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.delivered + self.dropped
+        return {
+            "name": self.name,
+            "depth": self.depth,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "drop_rate": round(self.dropped / total, 3) if total else 0.0,
+            "lag_ms": round(self.lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "connected_for_sec": round(time.time() - self.created_at, 1)
+        }
+
+
+class HubChannel:
+    """One producer for one view of a camera (e.g. raw frames at a given quality and size,
+    or MJPEG parts with the activity overlay). The producer reads the camera once, renders
+    each frame once and offers the result to every subscribed mailbox. It runs only while
+    the channel has subscribers, at the highest rate any of them wants."""
+    
+    def __init__(self, key: Hashable, name: str, camera_service,
+                 render: Callable[[Any], Awaitable[Optional[Any]]], max_fps: float):
+        self.key = key
+        self.name = name
+        self.camera_service = camera_service
+        self.render = render
+        self.max_fps = max_fps
+        self.FRAME_WAIT_TIMEOUT_SEC = 1.0
+        
+        self._mailboxes: List[Mailbox] = []
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        
+        # Stats
+        self.frames_produced = 0
+        self.render_errors = 0
+        self.last_error: Optional[str] = None
+    
+    @property
+    def closed(self) -> bool:
+        return self._closed
+    
+    @property
+    def camera_id(self) -> str:
+        return self.camera_service.camera_id
+    
+    @property
+    def idle(self) -> bool:
+        return not self._mailboxes
+    
+    def subscribe(self, name: str, maxsize: int = 2, fps: Optional[float] = None) -> Mailbox:
+        mailbox = Mailbox(name, maxsize=maxsize, fps=fps)
+        if self._closed:
+            mailbox.close()
+            return mailbox
+        self._mailboxes.append(mailbox)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._produce())
+            print(f"📡 Stream channel '{self.name}' started")
+        return mailbox
+    
+    def unsubscribe(self, mailbox: Mailbox):
+        mailbox.close()
+        if mailbox in self._mailboxes:
+            self._mailboxes.remove(mailbox)
+        if not self._mailboxes and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            print(f"📡 Stream channel '{self.name}' stopped")
+    
+    def close(self):
+        """Stop for good (the camera is going away); subscribers' mailboxes are closed"""
+        self._closed = True
+        for mailbox in self._mailboxes:
+            mailbox.close()
+        self._mailboxes = []
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+    
+    def _frame_interval(self) -> float:
+        wanted = [mailbox.fps or self.max_fps for mailbox in self._mailboxes]
+        return 1.0 / min(self.max_fps, max(wanted, default=self.max_fps))
+    
+    async def _produce(self):
+        subscription = self.camera_service.subscribe(f"hub-{self.name}")
+        last_frame_time = 0.0
+        try:
+            while True:
+                sleep_time = self._frame_interval() - (time.time() - last_frame_time)
+                if sleep_time > 0:
+                    await asyncio.sleep(sleep_time)
+                
+                captured = await subscription.next(timeout=self.FRAME_WAIT_TIMEOUT_SEC)
+                if captured is None:
+                    continue
+                last_frame_time = time.time()
+                try:
+                    payload = await self.render(captured)
+                except Exception as e:
+                    self.render_errors += 1
+                    self.last_error = str(e)
+                    print(f"Error rendering frame for stream channel '{self.name}': {e}")
+                    continue
+                if payload is None:
+                    continue
+                
+                self.frames_produced += 1
+                produced_at = time.time()
+                for mailbox in list(self._mailboxes):
+                    mailbox.offer(payload, produced_at)
+        finally:
+            subscription.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "running": self._task is not None and not self._task.done(),
+            "fps": round(1.0 / self._frame_interval(), 1),
+            "frames_produced": self.frames_produced,
+            "render_errors": self.render_errors,
+            "last_error": self.last_error,
+            "clients": [mailbox.get_stats() for mailbox in self._mailboxes]
+        }
+
+
+class StreamHub:
+    """Registry of stream channels, keyed by any hashable view description"""
+    
+    def __init__(self):
+        self._channels: Dict[Hashable, HubChannel] = {}
+    
+    def channel(self, key: Hashable, name: str, camera_service,
+                render: Callable[[Any], Awaitable[Optional[Any]]], max_fps: float) -> HubChannel:
+        """Get the channel for a view, creating it if needed (render and max_fps apply on creation)"""
+        channel = self._channels.get(key)
+        if channel is None or channel.closed:
+            # Forget channels nobody watches any more (e.g. a quality step no client uses now)
+            for idle_key in [k for k, c in self._channels.items() if c.idle]:
+                del self._channels[idle_key]
+            channel = HubChannel(key, name, camera_service, render, max_fps)
+            self._channels[key] = channel
+        return channel
+    
+    def close_camera(self, camera_id: str):
+        """Close every channel of a camera that is being removed"""
+        for key in [k for k, c in self._channels.items() if c.camera_id == camera_id]:
+            self._channels.pop(key).close()
+    
+    def get_stats(self, camera_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [
+            channel.get_stats() for channel in self._channels.values()
+            if camera_id is None or channel.camera_id == camera_id
+        ]
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the backend packages (services, utils) the way main.py does
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
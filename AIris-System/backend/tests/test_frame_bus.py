@@ -0,0 +1,152 @@
+"""
+FrameBus delivery policies: what each subscriber receives, what it drops, and has_room()
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from services.frame_bus import POLICY_EVERY_NTH, POLICY_LATEST, POLICY_QUEUE, FrameBus
+
+
+def frame(seq):
+    return SimpleNamespace(seq=seq)
+
+
+async def settle():
+    """Let the delivery callbacks scheduled by publish() run"""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_latest_keeps_only_the_newest_frame():
+    async def run():
+        bus = FrameBus()
+        subscription = bus.subscribe("viewer", policy=POLICY_LATEST)
+        for seq in range(1, 6):
+            bus.publish(frame(seq))
+        await settle()
+        
+        received = await subscription.next(timeout=0.1)
+        assert received.seq == 5
+        assert await subscription.next(timeout=0.01) is None
+        assert subscription.get_stats()["dropped"] == 4
+        assert subscription.delivered == 1
+    asyncio.run(run())
+
+
+def test_latest_schedules_one_callback_per_burst():
+    async def run():
+        bus = FrameBus()
+        subscription = bus.subscribe("viewer", policy=POLICY_LATEST)
+        callbacks = []
+        receive_slot = subscription._receive_slot
+        subscription._receive_slot = lambda: (callbacks.append(1), receive_slot())
+        
+        publisher = threading.Thread(target=lambda: [bus.publish(frame(seq)) for seq in range(1, 501)])
+        publisher.start()
+        publisher.join()
+        await settle()
+        
+        assert len(callbacks) == 1
+        assert (await subscription.next(timeout=0.1)).seq == 500
+    asyncio.run(run())
+
+
+def test_every_nth_skips_and_drops():
+    async def run():
+        bus = FrameBus()
+        subscription = bus.subscribe("sampler", policy=POLICY_EVERY_NTH, every_n=3)
+        received = []
+        for seq in range(1, 10):
+            bus.publish(frame(seq))
+            await settle()
+            item = await subscription.next(timeout=0.01)
+            if item is not None:
+                received.append(item.seq)
+        assert received == [3, 6, 9]
+        assert subscription.skipped == 6
+        assert subscription.get_stats()["dropped"] == 0
+        
+        # Unconsumed Nth frames replace each other
+        for seq in range(10, 19):
+            bus.publish(frame(seq))
+        await settle()
+        assert (await subscription.next(timeout=0.1)).seq == 18
+        assert subscription.get_stats()["dropped"] == 2
+    asyncio.run(run())
+
+
+def test_queue_drops_oldest_when_full():
+    async def run():
+        bus = FrameBus()
+        subscription = bus.subscribe("worker", policy=POLICY_QUEUE, maxsize=2)
+        for seq in range(1, 6):
+            bus.publish(frame(seq))
+        await settle()
+        
+        assert [(await subscription.next(timeout=0.1)).seq for _ in range(2)] == [4, 5]
+        assert subscription.dropped == 3
+    asyncio.run(run())
+
+
+def test_queue_has_room_counts_frames_in_flight():
+    async def run():
+        bus = FrameBus()
+        subscription = bus.subscribe("worker", policy=POLICY_QUEUE, maxsize=2)
+        assert subscription.has_room() and bus.has_room()
+        
+        bus.publish(frame(1))
+        bus.publish(frame(2))
+        # Scheduled but not yet received on the loop: still no room
+        assert not subscription.has_room() and not bus.has_room()
+        await settle()
+        assert not bus.has_room()
+        
+        await subscription.next(timeout=0.1)
+        assert bus.has_room()
+        await subscription.next(timeout=0.1)
+        assert subscription.dropped == 0
+        
+        subscription.close()
+        assert subscription.has_room()
+    asyncio.run(run())
+
+
+def test_has_room_ignores_latest_subscribers():
+    async def run():
+        bus = FrameBus()
+        bus.subscribe("viewer", policy=POLICY_LATEST)
+        assert not bus.has_queue_subscribers()
+        for seq in range(1, 10):
+            bus.publish(frame(seq))
+        assert bus.has_room()
+        
+        bus.subscribe("worker", policy=POLICY_QUEUE, maxsize=1)
+        assert bus.has_queue_subscribers()
+    asyncio.run(run())
+
+
+def test_duplicate_and_old_frames_are_skipped():
+    async def run():
+        bus = FrameBus()
+        subscription = bus.subscribe("worker", policy=POLICY_QUEUE, maxsize=4)
+        subscription.offer(frame(1))
+        subscription.offer(frame(1))
+        assert (await subscription.next(timeout=0.1)).seq == 1
+        subscription.offer(frame(1))
+        assert subscription.duplicates_skipped == 2
+        assert await subscription.next(timeout=0.01) is None
+    asyncio.run(run())
+
+
+def test_closed_subscription_stops_receiving():
+    async def run():
+        bus = FrameBus()
+        subscription = bus.subscribe("viewer")
+        subscription.close()
+        bus.publish(frame(1))
+        await settle()
+        assert await subscription.next(timeout=0.01) is None
+        assert bus.get_stats()["subscribers"] == []
+    asyncio.run(run())
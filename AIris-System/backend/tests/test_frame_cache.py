@@ -0,0 +1,74 @@
+"""
+EncodedFrameCache: encode-once hits and LRU eviction
+"""
+
+import cv2
+import numpy as np
+
+from utils.frame_cache import EncodedFrame, EncodedFrameCache
+
+
+def image(value=128, width=64, height=48):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def test_get_or_encode_encodes_once():
+    cache = EncodedFrameCache()
+    calls = []
+    
+    def produce():
+        calls.append(1)
+        return image()
+    
+    first = cache.get_or_encode(1, produce, quality=80)
+    second = cache.get_or_encode(1, produce, quality=80)
+    assert first is second
+    assert len(calls) == 1
+    assert cv2.imdecode(np.frombuffer(first.jpeg, np.uint8), cv2.IMREAD_COLOR).shape == (48, 64, 3)
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_key_includes_annotation_quality_and_size():
+    cache = EncodedFrameCache()
+    raw = cache.get_or_encode(1, image(), quality=80)
+    assert cache.get_or_encode(1, image(), quality=60) is not raw
+    assert cache.get_or_encode(1, image(), annotation=("activity", 1), quality=80) is not raw
+    
+    small = cache.get_or_encode(1, image(), quality=80, size=(32, 24))
+    assert (small.width, small.height) == (32, 24)
+    assert cache.get_or_encode(2, image(), quality=80) is not raw
+    assert cache.get_stats()["entries"] == 5
+
+
+def test_lru_evicts_least_recently_used():
+    cache = EncodedFrameCache(max_entries=2)
+    for seq in (1, 2):
+        cache.put(seq, EncodedFrame(b"jpeg-%d" % seq))
+    # Touch 1, so 2 is the least recently used when 3 arrives
+    assert cache.get(1) is not None
+    cache.put(3, EncodedFrame(b"jpeg-3"))
+    
+    assert cache.get(2) is None
+    assert cache.get(1).jpeg == b"jpeg-1"
+    assert cache.get(3).jpeg == b"jpeg-3"
+    assert cache.evictions == 1
+    assert cache.get_stats()["entries"] == 2
+
+
+def test_callable_is_not_called_on_hit_and_none_is_not_cached():
+    cache = EncodedFrameCache()
+    assert cache.get_or_encode(1, lambda: None) is None
+    assert cache.get_stats()["entries"] == 0
+    
+    cache.put(1, EncodedFrame(b"camera-jpeg"), quality="source")
+    
+    def fail():
+        raise AssertionError("should not encode on a hit")
+    assert cache.get_or_encode(1, fail, quality="source").jpeg == b"camera-jpeg"
+
+
+def test_base64_is_computed_on_demand():
+    encoded = EncodedFrame(b"\xff\xd8\xff\xd9")
+    assert encoded.base64 == "/9j/2Q=="
+    assert encoded.base64 is encoded.base64
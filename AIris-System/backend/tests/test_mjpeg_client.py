@@ -0,0 +1,93 @@
+"""
+MJPEGStreamClient against a local stand-in for the ESP32-CAM stream server
+"""
+
+import asyncio
+
+from aiohttp import web
+
+from services.mjpeg_client import MJPEGStreamClient
+
+BOUNDARY = "123456789000000000000987654321"
+
+# Minimal JPEG-shaped payloads: SOI, some bytes (including CRLFs and a stray 0xff), EOI
+JPEGS = [
+    b"\xff\xd8" + b"frame-one\r\n\xff\x00" + b"\xff\xd9",
+    b"\xff\xd8" + b"frame-two" * 50 + b"\xff\xd9",
+    b"\xff\xd8" + b"3" + b"\xff\xd9",
+]
+
+
+def multipart_body(jpegs, with_length=True):
+    body = b""
+    for jpeg in jpegs:
+        headers = b"Content-Type: image/jpeg\r\n"
+        if with_length:
+            headers += f"Content-Length: {len(jpeg)}\r\n".encode()
+        body += f"--{BOUNDARY}\r\n".encode() + headers + b"\r\n" + jpeg + b"\r\n"
+    # Closing delimiter so a part without Content-Length knows where it ends
+    return body + f"--{BOUNDARY}\r\n".encode()
+
+
+async def read_stream(body, content_type, server_chunk=None, client_chunk=16384):
+    """Serve `body` as one streamed response and collect the frames the client yields"""
+    async def handler(request):
+        response = web.StreamResponse(headers={"Content-Type": content_type})
+        await response.prepare(request)
+        step = server_chunk or len(body)
+        for i in range(0, len(body), step):
+            await response.write(body[i:i + step])
+            await asyncio.sleep(0)
+        await response.write_eof()
+        return response
+    
+    app = web.Application()
+    app.router.add_get("/stream", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        client = MJPEGStreamClient(f"http://127.0.0.1:{port}/stream", chunk_size=client_chunk)
+        frames = [jpeg async for jpeg in client.frames()]
+        return frames, client.bytes_received
+    finally:
+        await runner.cleanup()
+
+
+def test_parts_with_content_length():
+    body = multipart_body(JPEGS)
+    frames, received = asyncio.run(read_stream(body, f"multipart/x-mixed-replace; boundary={BOUNDARY}"))
+    assert frames == JPEGS
+    assert received == len(body)
+
+
+def test_parts_without_content_length():
+    body = multipart_body(JPEGS, with_length=False)
+    frames, _ = asyncio.run(read_stream(body, f"multipart/x-mixed-replace; boundary={BOUNDARY}"))
+    assert frames == JPEGS
+
+
+def test_boundary_split_across_chunks():
+    # 5-byte reads split every delimiter and header block across several chunks
+    for with_length in (True, False):
+        body = multipart_body(JPEGS, with_length=with_length)
+        frames, _ = asyncio.run(read_stream(
+            body, f"multipart/x-mixed-replace; boundary={BOUNDARY}", server_chunk=5, client_chunk=5
+        ))
+        assert frames == JPEGS
+
+
+def test_boundary_with_dashes_prefix():
+    # Older ESP32 firmware puts the "--" in the Content-Type boundary too
+    body = multipart_body(JPEGS)
+    frames, _ = asyncio.run(read_stream(body, f'multipart/x-mixed-replace; boundary="--{BOUNDARY}"'))
+    assert frames == JPEGS
+
+
+def test_soi_eoi_fallback_without_boundary():
+    # No multipart boundary: frames are cut on JPEG markers, ignoring the bytes between them
+    body = b"junk" + JPEGS[0] + b"\r\n--x\r\n" + JPEGS[1] + JPEGS[2] + b"trailing"
+    frames, _ = asyncio.run(read_stream(body, "image/jpeg", server_chunk=3, client_chunk=3))
+    assert frames == JPEGS
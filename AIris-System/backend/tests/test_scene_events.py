@@ -0,0 +1,99 @@
+"""
+SceneEventLog replay (Last-Event-ID) and gap detection, and stopping the SceneMonitor
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from services.frame_bus import FrameBus
+from services.scene_events import EVENT_DESCRIPTION, EVENT_RECORDING, EVENT_RISK, SceneEventLog, SceneMonitor
+
+
+def test_replay_after_last_event_id():
+    log = SceneEventLog(maxlen=10)
+    start_id = log.last_id
+    ids = [log.publish(EVENT_DESCRIPTION, {"description": f"frame {i}"})["id"] for i in range(3)]
+    
+    assert ids == [start_id + 1, start_id + 2, start_id + 3]
+    assert log.events_after(None) == []
+    assert [e["id"] for e in log.events_after(start_id)] == ids
+    assert [e["id"] for e in log.events_after(ids[0])] == ids[1:]
+    assert log.events_after(ids[-1]) == []
+    # An id from the future (e.g. the clock moved back) replays everything buffered
+    assert [e["id"] for e in log.events_after(ids[-1] + 100)] == ids
+
+
+def test_missed_detects_dropped_events():
+    log = SceneEventLog(maxlen=3)
+    start_id = log.last_id
+    ids = [log.publish(EVENT_DESCRIPTION, {"description": str(i)})["id"] for i in range(5)]
+    
+    # Only ids[2:] are still buffered
+    assert log.missed(start_id)
+    assert log.missed(ids[0])
+    assert not log.missed(ids[1])
+    assert not log.missed(ids[4])
+    assert not log.missed(None)
+    assert not SceneEventLog().missed(123)
+
+
+def test_wait_returns_new_events():
+    async def run():
+        log = SceneEventLog()
+        last_id = log.last_id
+        assert await log.wait(last_id, timeout=0.01) == []
+        
+        async def publish_later():
+            await asyncio.sleep(0.01)
+            log.publish(EVENT_RECORDING, {"is_recording": True})
+        asyncio.create_task(publish_later())
+        events = await log.wait(last_id, timeout=1)
+        assert [e["type"] for e in events] == [EVENT_RECORDING]
+    asyncio.run(run())
+
+
+def test_publish_result_only_sends_risk_changes():
+    log = SceneEventLog()
+    first = log.publish_result({"description": "b", "descriptions": ["a", "b"], "risk_score": 0.2})
+    assert [e["type"] for e in first] == [EVENT_DESCRIPTION, EVENT_DESCRIPTION, EVENT_RISK]
+    
+    same_risk = log.publish_result({"description": "c", "risk_score": 0.2})
+    assert [e["type"] for e in same_risk] == [EVENT_DESCRIPTION]
+    # Frames that weren't analyzed don't report risk
+    assert log.publish_result({"risk_score": 0.9}) == []
+
+
+class SlowSceneService:
+    """Stands in for SceneDescriptionService: analyzing a frame takes a while"""
+    is_recording = True
+    last_frame_analysis_time = 0.0
+    FRAME_ANALYSIS_INTERVAL_SEC = 0.0
+    
+    def __init__(self):
+        self.started = asyncio.Event()
+    
+    async def wait_for_caption(self, timeout):
+        await asyncio.sleep(timeout)
+    
+    async def process_frame(self, frame, views=None):
+        self.started.set()
+        await asyncio.sleep(0.1)
+        return {"descriptions": ["person walking"]}
+
+
+def test_monitor_stop_finishes_the_frame_in_progress():
+    async def run():
+        bus = FrameBus()
+        camera = SimpleNamespace(camera_id="default", subscribe=lambda name: bus.subscribe(name))
+        service = SlowSceneService()
+        log = SceneEventLog()
+        monitor = SceneMonitor(service, log, asyncio.Lock())
+        
+        await monitor.start(camera)
+        bus.publish(SimpleNamespace(seq=1, image=object(), views=None))
+        await asyncio.wait_for(service.started.wait(), timeout=1)
+        await monitor.stop()
+        
+        assert not monitor.is_running
+        assert [e["data"]["description"] for e in log.events_after(0)] == ["person walking"]
+    asyncio.run(run())
@@ -0,0 +1,101 @@
+"""
+SingleFlight: concurrent callers share one computation, and leaving doesn't cancel it
+"""
+
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    async def run():
+        flight = SingleFlight("test")
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+        
+        results = await asyncio.gather(*(flight.do("frame", compute) for _ in range(5)))
+        assert results == ["result"] * 5
+        assert len(calls) == 1
+        stats = flight.get_stats()
+        assert (stats["calls"], stats["executions"], stats["shared"], stats["in_flight"]) == (5, 1, 4, 0)
+        
+        # Once finished, the next call computes again
+        assert await flight.do("frame", compute) == "result"
+        assert len(calls) == 2
+    asyncio.run(run())
+
+
+def test_different_keys_run_separately():
+    async def run():
+        flight = SingleFlight("test")
+        
+        async def compute(value):
+            await asyncio.sleep(0.01)
+            return value
+        
+        results = await asyncio.gather(flight.do("a", lambda: compute("a")), flight.do("b", lambda: compute("b")))
+        assert results == ["a", "b"]
+        assert flight.executions == 2
+    asyncio.run(run())
+
+
+def test_exception_reaches_every_caller():
+    async def run():
+        flight = SingleFlight("test")
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("model error")
+        
+        results = await asyncio.gather(*(flight.do("frame", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert flight.executions == 1
+        assert flight.get_stats()["in_flight"] == 0
+    asyncio.run(run())
+
+
+def test_cancelled_caller_does_not_cancel_the_computation():
+    async def run():
+        flight = SingleFlight("test")
+        finished = []
+        
+        async def compute():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+            return "result"
+        
+        leaving = asyncio.create_task(flight.do("frame", compute))
+        staying = asyncio.create_task(flight.do("frame", compute))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        
+        assert await staying == "result"
+        assert finished == [1]
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+    asyncio.run(run())
+
+
+def test_computation_finishes_after_every_caller_left():
+    async def run():
+        flight = SingleFlight("test")
+        finished = asyncio.Event()
+        
+        async def compute():
+            await asyncio.sleep(0.01)
+            finished.set()
+            return "result"
+        
+        caller = asyncio.create_task(flight.do("frame", compute))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.wait_for(finished.wait(), timeout=1)
+        await asyncio.sleep(0)
+        assert flight.get_stats()["in_flight"] == 0
+    asyncio.run(run())
@@ -0,0 +1,98 @@
+"""
+StreamController: the order it degrades and restores FPS, quality and resolution
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import services.stream_controller as stream_controller
+from services.stream_controller import SCALE_STEPS, StreamController, scaled_size
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(stream_controller, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def make_controller():
+    return StreamController(max_fps=10, max_quality=80, min_fps=3, min_quality=40, min_scale=0.25,
+                            max_frame_age_sec=0.5)
+
+
+def drive(controller, clock, send_sec, queue_depth=0, steps=200):
+    """Record sends of `send_sec` every 0.6 s (past the cooldown); returns the parameter that
+    changed at each adjustment ("quality", "scale" or "fps") in order"""
+    changes = []
+    for _ in range(steps):
+        before = controller.get_params()
+        clock.value += 0.6
+        controller.record_send(send_sec, 10_000, queue_depth=queue_depth)
+        after = controller.get_params()
+        changes.extend(name for name in ("quality", "scale", "fps") if before[name] != after[name])
+    return changes
+
+
+def runs(changes):
+    """Collapse consecutive repeats: ["quality", "quality", "scale"] -> ["quality", "scale"]"""
+    return [name for i, name in enumerate(changes) if i == 0 or changes[i - 1] != name]
+
+
+def test_degrades_quality_then_resolution_then_fps(clock):
+    controller = make_controller()
+    changes = drive(controller, clock, send_sec=0.2)
+    
+    assert runs(changes) == ["quality", "scale", "fps"]
+    assert controller.get_params() == {"fps": 3.0, "quality": 40, "scale": 0.25}
+    assert changes.count("scale") == len(SCALE_STEPS) - 1
+
+
+def test_queue_backlog_alone_degrades(clock):
+    controller = make_controller()
+    changes = drive(controller, clock, send_sec=0.001, queue_depth=2, steps=1)
+    assert changes == ["quality"]
+
+
+def test_restores_fps_then_resolution_then_quality(clock):
+    controller = make_controller()
+    drive(controller, clock, send_sec=0.2)
+    
+    changes = drive(controller, clock, send_sec=0.0001, steps=400)
+    assert runs(changes) == ["fps", "scale", "quality"]
+    assert controller.get_params() == {"fps": 10.0, "quality": 80, "scale": 1.0}
+    assert controller.variant == (None, 1.0)
+
+
+def test_restore_waits_for_sustained_headroom(clock):
+    controller = make_controller()
+    drive(controller, clock, send_sec=0.2, steps=1)
+    assert controller.quality == 70
+    # Within the cooldown: the latency average settles without any adjustment
+    for _ in range(30):
+        controller.record_send(0.0, 10_000)
+    
+    # Fast sends: the first restore comes RELAX_HOLD_SEC after the latency became relaxed
+    relaxed_at = None
+    while controller.quality == 70:
+        clock.value += 0.1
+        controller.record_send(0.0, 10_000)
+        if controller._relaxed_since is not None and controller.quality == 70:
+            relaxed_at = controller._relaxed_since
+    assert controller.quality == 75
+    assert clock.value - relaxed_at >= controller.RELAX_HOLD_SEC
+
+
+def test_adjustments_respect_the_cooldown(clock):
+    controller = make_controller()
+    for _ in range(5):
+        clock.value += 0.1
+        controller.record_send(0.2, 10_000)
+    assert controller.adjustments == 1
+
+
+def test_scaled_size_is_even_and_none_at_full_size():
+    assert scaled_size(641, 481, 1.0) is None
+    assert scaled_size(641, 481, 0.5) == (320, 240)
+    assert scaled_size(0, 0, 0.5) is None
@@ -0,0 +1,93 @@
+"""
+StreamHub mailboxes (drop-oldest) and one shared producer per channel
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from services.frame_bus import FrameBus
+from services.stream_hub import Mailbox, StreamHub
+
+
+def test_mailbox_drops_oldest_when_full():
+    async def run():
+        mailbox = Mailbox("slow-client", maxsize=2)
+        for payload in ("a", "b", "c", "d"):
+            mailbox.offer(payload, time.time())
+        
+        assert mailbox.depth == 2
+        assert mailbox.dropped == 2
+        assert [await mailbox.get(timeout=0.1), await mailbox.get(timeout=0.1)] == ["c", "d"]
+        assert await mailbox.get(timeout=0.01) is None
+        assert mailbox.get_stats()["drop_rate"] == 0.5
+    asyncio.run(run())
+
+
+def test_mailbox_close_wakes_the_reader():
+    async def run():
+        mailbox = Mailbox("client")
+        reader = asyncio.create_task(mailbox.get(timeout=5))
+        await asyncio.sleep(0)
+        mailbox.close()
+        assert await asyncio.wait_for(reader, timeout=1) is None
+        
+        mailbox.offer("late", time.time())
+        assert mailbox.depth == 0
+    asyncio.run(run())
+
+
+def fake_camera():
+    bus = FrameBus()
+    return bus, SimpleNamespace(camera_id="default", subscribe=lambda name: bus.subscribe(name))
+
+
+def test_channel_renders_once_for_every_client():
+    async def run():
+        bus, camera = fake_camera()
+        renders = []
+        
+        async def render(captured):
+            renders.append(captured.seq)
+            return f"part-{captured.seq}"
+        
+        channel = StreamHub().channel("raw", "raw", camera, render, max_fps=1000)
+        fast = channel.subscribe("fast", maxsize=8)
+        slow = channel.subscribe("slow", maxsize=1)
+        await asyncio.sleep(0.01)
+        
+        for seq in range(1, 4):
+            bus.publish(SimpleNamespace(seq=seq))
+            await asyncio.sleep(0.01)
+        
+        assert renders == [1, 2, 3]
+        assert [await fast.get(timeout=0.1) for _ in range(3)] == ["part-1", "part-2", "part-3"]
+        # The slow client only lost frames; it didn't hold up the producer or the fast client
+        assert await slow.get(timeout=0.1) == "part-3"
+        assert slow.dropped == 2
+        assert fast.dropped == 0
+        
+        channel.unsubscribe(fast)
+        channel.unsubscribe(slow)
+        assert channel.idle
+        assert not channel.get_stats()["running"]
+    asyncio.run(run())
+
+
+def test_hub_reuses_channels_and_closes_a_cameras_channels():
+    async def run():
+        _, camera = fake_camera()
+        
+        async def render(captured):
+            return captured
+        
+        hub = StreamHub()
+        channel = hub.channel(("mjpeg", "default"), "mjpeg", camera, render, max_fps=10)
+        assert hub.channel(("mjpeg", "default"), "mjpeg", camera, render, max_fps=10) is channel
+        
+        mailbox = channel.subscribe("viewer")
+        hub.close_camera("default")
+        assert channel.closed
+        assert mailbox.closed
+        assert hub.get_stats() == []
+    asyncio.run(run())
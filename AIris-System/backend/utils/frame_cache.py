@@ -0,0 +1,108 @@
+"""
+Encoded frame cache - encode each (frame, annotation, quality, size) to JPEG only once
+"""
+
+import base64
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+class EncodedFrame:
+    """JPEG bytes for a frame, with the base64 form computed on first use"""
+    
+    __slots__ = ("jpeg", "width", "height", "_base64")
+    
+    def __init__(self, jpeg: bytes, width: int = 0, height: int = 0):
+        self.jpeg = jpeg
+        self.width = width
+        self.height = height
+        self._base64: Optional[str] = None
+    
+    @property
+    def base64(self) -> str:
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.jpeg).decode()
+        return self._base64
+
+
+class EncodedFrameCache:
+    """LRU cache of JPEG-encoded frames keyed by (frame seq, annotation version, quality, size).
+    
+    annotation is None for the raw camera frame, or any hashable version tag
+    (e.g. ("activity", 12)) for a frame rendered by a pipeline.
+    """
+    
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, EncodedFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, seq: int, annotation: Optional[Hashable] = None, quality: int = 90,
+            size: Optional[Tuple[int, int]] = None) -> Optional[EncodedFrame]:
+        """Look up an already encoded frame without encoding on a miss"""
+        key = (seq, annotation, quality, size)
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return encoded
+    
+    def put(self, seq: int, encoded: EncodedFrame, annotation: Optional[Hashable] = None,
+            quality: int = 90, size: Optional[Tuple[int, int]] = None):
+        """Store an encoded frame (e.g. JPEG bytes that came straight from the camera)"""
+        key = (seq, annotation, quality, size)
+        with self._lock:
+            self._entries[key] = encoded
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def get_or_encode(self, seq: int, image: Union[np.ndarray, Callable[[], np.ndarray]], annotation: Optional[Hashable] = None,
+                      quality: int = 90, size: Optional[Tuple[int, int]] = None) -> Optional[EncodedFrame]:
+        """Return the cached JPEG for this key, encoding (and resizing to `size`) on a miss.
+        `image` may be a callable so the frame is only produced on a miss."""
+        encoded = self.get(seq, annotation, quality, size)
+        if encoded is not None:
+            return encoded
+        
+        if callable(image):
+            image = image()
+        if image is None:
+            return None
+        if size is not None and (image.shape[1], image.shape[0]) != tuple(size):
+            image = cv2.resize(image, tuple(size), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+        if not ok:
+            return None
+        
+        encoded = EncodedFrame(buffer.tobytes(), width=image.shape[1], height=image.shape[0])
+        self.put(seq, encoded, annotation, quality, size)
+        return encoded
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
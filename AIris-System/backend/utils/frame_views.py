@@ -0,0 +1,122 @@
+"""
+Frame views - derived versions of a frame (RGB, gray, model input sizes, resized copies),
+each computed at most once and shared by every consumer
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+# Standard view sizes
+LETTERBOX_SIZE = 640   # YOLO input
+SQUARE_SIZE = 384      # BLIP input
+LETTERBOX_COLOR = (114, 114, 114)  # Same padding value ultralytics uses
+
+
+class FrameViews:
+    """Lazily computed, memoized views of a single BGR frame.
+    
+    Views:
+        bgr            - the original frame
+        rgb            - RGB copy (MediaPipe, PIL)
+        gray           - grayscale copy (motion gate)
+        letterbox_640  - 640x640 BGR letterbox, as ultralytics feeds exported models (INT8
+                         calibration); the scale and padding are in `letterbox_meta`
+        square_384     - 384x384 RGB resize (BLIP's input size)
+    
+    `resized(size)` gives BGR copies at other sizes (scaled stream encodes).
+    
+    The source may be a callable so JPEG frames are only decoded when a view is requested.
+    """
+    
+    def __init__(self, source: Union[np.ndarray, Callable[[], Optional[np.ndarray]]]):
+        self._source = source
+        self._views: Dict[Any, Optional[np.ndarray]] = {}
+        self._lock = threading.RLock()
+        self.letterbox_meta: Optional[Dict[str, Any]] = None
+    
+    def _memoized(self, key, compute: Callable[[], Optional[np.ndarray]]) -> Optional[np.ndarray]:
+        view = self._views.get(key)
+        if view is not None or key in self._views:
+            return view
+        with self._lock:
+            if key not in self._views:
+                self._views[key] = compute()
+            return self._views[key]
+    
+    @property
+    def bgr(self) -> Optional[np.ndarray]:
+        def load():
+            return self._source() if callable(self._source) else self._source
+        return self._memoized("bgr", load)
+    
+    @property
+    def rgb(self) -> Optional[np.ndarray]:
+        return self._memoized("rgb", lambda: self._convert(cv2.COLOR_BGR2RGB))
+    
+    @property
+    def gray(self) -> Optional[np.ndarray]:
+        return self._memoized("gray", lambda: self._convert(cv2.COLOR_BGR2GRAY))
+    
+    @property
+    def letterbox_640(self) -> Optional[np.ndarray]:
+        return self._memoized("letterbox_640", lambda: self._letterbox(LETTERBOX_SIZE))
+    
+    @property
+    def square_384(self) -> Optional[np.ndarray]:
+        def square():
+            rgb = self.rgb
+            if rgb is None:
+                return None
+            return self._resize(rgb, (SQUARE_SIZE, SQUARE_SIZE))
+        return self._memoized("square_384", square)
+    
+    def resized(self, size: Tuple[int, int]) -> Optional[np.ndarray]:
+        """BGR frame resized to (width, height)"""
+        size = (int(size[0]), int(size[1]))
+        
+        def resize():
+            bgr = self.bgr
+            return self._resize(bgr, size) if bgr is not None else None
+        return self._memoized(("resized", size), resize)
+    
+    def get(self, name: str) -> Optional[np.ndarray]:
+        """Get a view by name (e.g. "rgb", "square_384")"""
+        if name not in ("bgr", "rgb", "gray", "letterbox_640", "square_384"):
+            raise ValueError(f"Unknown frame view: {name}")
+        return getattr(self, name)
+    
+    @property
+    def computed(self) -> list:
+        """Names of the views computed so far"""
+        return [k if isinstance(k, str) else f"{k[0]}_{k[1][0]}x{k[1][1]}" for k in self._views]
+    
+    def _convert(self, code: int) -> Optional[np.ndarray]:
+        bgr = self.bgr
+        return cv2.cvtColor(bgr, code) if bgr is not None else None
+    
+    @staticmethod
+    def _resize(image: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+        if (image.shape[1], image.shape[0]) == size:
+            return image
+        shrinking = size[0] < image.shape[1]
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR)
+    
+    def _letterbox(self, target: int) -> Optional[np.ndarray]:
+        """Resize keeping aspect ratio and pad to target x target"""
+        bgr = self.bgr
+        if bgr is None:
+            return None
+        h, w = bgr.shape[:2]
+        scale = min(target / w, target / h)
+        new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+        resized = self._resize(bgr, (new_w, new_h))
+        pad_x, pad_y = (target - new_w) // 2, (target - new_h) // 2
+        boxed = cv2.copyMakeBorder(
+            resized, pad_y, target - new_h - pad_y, pad_x, target - new_w - pad_x,
+            cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR
+        )
+        self.letterbox_meta = {"scale": scale, "pad": (pad_x, pad_y), "size": target}
+        return boxed
@@ -0,0 +1,91 @@
+"""
+Motion gate - cheap change detection to skip inference on unchanged frames
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decides whether a frame differs enough from the last processed frame to re-run models.
+    
+    Frames are compared on a small blurred grayscale copy. A frame passes the gate when the
+    fraction of pixels that changed by more than `pixel_threshold` exceeds `change_threshold`,
+    or when `keyframe_interval` frames have been skipped in a row (so trackers and guidance
+    never go stale on a perfectly static scene).
+    """
+    
+    def __init__(self, change_threshold: float = 0.01, pixel_threshold: int = 25,
+                 keyframe_interval: int = 15, downscale_width: int = 160):
+        self.change_threshold = change_threshold
+        self.pixel_threshold = pixel_threshold
+        self.keyframe_interval = keyframe_interval
+        self.downscale_width = downscale_width
+        self.enabled = True
+        
+        self._reference: Optional[np.ndarray] = None
+        self._source_shape: Optional[tuple] = None
+        self._skipped_in_row = 0
+        
+        # Stats
+        self.processed = 0
+        self.skipped = 0
+        self.last_change_ratio = 0.0
+        self.last_check_ms = 0.0
+    
+    def _small_gray(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        scale = self.downscale_width / float(w) if w > self.downscale_width else 1.0
+        small = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        # Blur away sensor noise so it doesn't count as motion
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+    
+    def should_process(self, frame: np.ndarray, gray: Optional[np.ndarray] = None) -> bool:
+        """True if the models should run on this frame; False to reuse the previous results.
+        `gray` is the frame's grayscale view when it is already at hand (FrameViews.gray)."""
+        start = time.perf_counter()
+        gray = self._small_gray(gray if gray is not None else frame)
+        
+        changed = True
+        if self.enabled and self._reference is not None and self._source_shape == frame.shape:
+            diff = cv2.absdiff(gray, self._reference)
+            self.last_change_ratio = float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+            changed = (
+                self.last_change_ratio > self.change_threshold or
+                self._skipped_in_row + 1 >= self.keyframe_interval
+            )
+        
+        if changed:
+            # Compare against the last processed frame so slow drift still adds up
+            self._reference = gray
+            self._source_shape = frame.shape
+            self._skipped_in_row = 0
+            self.processed += 1
+        else:
+            self._skipped_in_row += 1
+            self.skipped += 1
+        
+        self.last_check_ms = (time.perf_counter() - start) * 1000
+        return changed
+    
+    def reset(self):
+        """Force the next frame through the gate"""
+        self._reference = None
+        self._source_shape = None
+        self._skipped_in_row = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.processed + self.skipped
+        return {
+            "enabled": self.enabled,
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "skip_rate": round(self.skipped / total, 3) if total else 0.0,
+            "last_change_ratio": round(self.last_change_ratio, 4),
+            "last_check_ms": round(self.last_check_ms, 2)
+        }
@@ -0,0 +1,90 @@
+"""
+Fast API responses - orjson JSON (numpy-aware) and msgpack, negotiated from the Accept header
+"""
+
+import base64
+import json
+from typing import Any, Optional
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def _to_builtin(obj: Any) -> Any:
+    """Fallback conversion for values the serializers don't handle natively"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "cpu") and hasattr(obj, "numpy"):
+        # torch tensors (e.g. YOLO boxes)
+        return obj.cpu().numpy().tolist()
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, (bytes, bytearray)):
+        return base64.b64encode(obj).decode()
+    return _to_builtin(obj)
+
+
+def dumps_json(content: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            content, default=_json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(content, default=_json_default, separators=(",", ":")).encode()
+
+
+def dumps_msgpack(content: Any) -> bytes:
+    return msgpack.packb(content, default=_to_builtin, use_bin_type=True)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (numpy arrays and scalars serialized natively);
+    falls back to the standard library when orjson isn't installed"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+class MsgpackResponse(Response):
+    media_type = "application/msgpack"
+    
+    def render(self, content: Any) -> bytes:
+        return dumps_msgpack(content)
+
+
+def wants_msgpack(request: Optional[Request]) -> bool:
+    """True if the client asked for msgpack (and it's installed)"""
+    if request is None or not MSGPACK_AVAILABLE:
+        return False
+    accept = request.headers.get("accept", "")
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def negotiated_response(request: Optional[Request], content: Any, status_code: int = 200) -> Response:
+    """msgpack if the Accept header asks for it, otherwise fast JSON"""
+    if wants_msgpack(request):
+        return MsgpackResponse(content, status_code=status_code)
+    return FastJSONResponse(content, status_code=status_code)
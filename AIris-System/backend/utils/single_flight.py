@@ -0,0 +1,52 @@
+"""
+Single-flight - Coalesces concurrent calls for the same key into one shared computation
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """While a computation for a key is in flight, later callers with the same key await
+    it instead of starting their own, and all of them receive its result (or exception).
+    
+    The computation runs as its own task, so a caller that goes away (e.g. a client
+    disconnecting) doesn't cancel it for the callers still waiting.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        
+        # Stats
+        self.calls = 0
+        self.executions = 0
+        self.shared = 0
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+    
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here so it isn't reported as unhandled when nobody waited
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "executions": self.executions,
+            "shared": self.shared,
+            "shared_rate": round(self.shared / self.calls, 3) if self.calls else 0.0
+        }
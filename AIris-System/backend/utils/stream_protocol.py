@@ -0,0 +1,116 @@
+"""
+Binary frame protocol for the camera WebSocket stream
+
+Each binary message is a fixed 24-byte big-endian header followed by the image bytes:
+
+    offset  size  field
+    0       1     version        (STREAM_PROTOCOL_VERSION)
+    1       1     content type   (CONTENT_TYPE_JPEG)
+    2       2     header length  (bytes before the payload, currently 24)
+    4       8     seq            (capture sequence number)
+    12      8     timestamp      (capture time, float64 seconds since the epoch)
+    20      2     width          (0 if unknown)
+    22      2     height         (0 if unknown)
+
+Control and error messages stay JSON text frames.
+
+/camera/mjpeg uses multipart/x-mixed-replace parts (see mjpeg_part).
+"""
+
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+STREAM_PROTOCOL_VERSION = 1
+
+# Payload content types
+CONTENT_TYPE_JPEG = 1
+
+CONTENT_TYPE_NAMES = {CONTENT_TYPE_JPEG: "image/jpeg"}
+
+# Stream formats negotiated with ?format=...
+FORMAT_JSON = "json"
+FORMAT_BINARY = "binary"
+
+STREAM_FORMATS = (FORMAT_JSON, FORMAT_BINARY)
+
+HEADER_STRUCT = struct.Struct("!BBHQdHH")
+HEADER_SIZE = HEADER_STRUCT.size
+
+MJPEG_BOUNDARY = "frame"
+
+
+def pack_frame(payload: bytes, seq: int, timestamp: float, width: int = 0, height: int = 0,
+               content_type: int = CONTENT_TYPE_JPEG) -> bytes:
+    """Build a binary frame message (header + payload)"""
+    header = HEADER_STRUCT.pack(
+        STREAM_PROTOCOL_VERSION, content_type, HEADER_SIZE, seq, timestamp,
+        min(int(width), 0xFFFF), min(int(height), 0xFFFF)
+    )
+    return header + payload
+
+
+def unpack_frame(message: bytes) -> Tuple[Dict[str, Any], bytes]:
+    """Split a binary frame message into (header fields, payload)"""
+    if len(message) < HEADER_SIZE:
+        raise ValueError("Message shorter than the frame header")
+    version, content_type, header_size, seq, timestamp, width, height = HEADER_STRUCT.unpack_from(message)
+    header = {
+        "version": version,
+        "content_type": CONTENT_TYPE_NAMES.get(content_type, content_type),
+        "seq": seq,
+        "timestamp": timestamp,
+        "width": width,
+        "height": height
+    }
+    return header, message[header_size:]
+
+
+def mjpeg_part(jpeg: bytes) -> bytes:
+    """One multipart/x-mixed-replace part holding a JPEG"""
+    header = (
+        f"--{MJPEG_BOUNDARY}\r\n"
+        f"Content-Type: image/jpeg\r\n"
+        f"Content-Length: {len(jpeg)}\r\n\r\n"
+    ).encode()
+    return header + jpeg + b"\r\n"
+
+
+def describe_protocol() -> Dict[str, Any]:
+    """Layout sent to binary clients in the stream's hello message"""
+    return {
+        "version": STREAM_PROTOCOL_VERSION,
+        "byte_order": "big",
+        "header_size": HEADER_SIZE,
+        "fields": [
+            ["version", "uint8"], ["content_type", "uint8"], ["header_size", "uint16"],
+            ["seq", "uint64"], ["timestamp", "float64"], ["width", "uint16"], ["height", "uint16"]
+        ],
+        "content_types": {str(k): v for k, v in CONTENT_TYPE_NAMES.items()}
+    }
+
+
+def jpeg_dimensions(jpeg: bytes) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a JPEG's SOF marker without decoding it"""
+    if len(jpeg) < 4 or jpeg[0] != 0xFF or jpeg[1] != 0xD8:
+        return None
+    i = 2
+    length = len(jpeg)
+    while i + 9 < length:
+        if jpeg[i] != 0xFF:
+            i += 1
+            continue
+        marker = jpeg[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        segment_length = (jpeg[i + 2] << 8) | jpeg[i + 3]
+        # SOF0-SOF15, excluding DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = (jpeg[i + 5] << 8) | jpeg[i + 6]
+            width = (jpeg[i + 7] << 8) | jpeg[i + 8]
+            return width, height
+        i += 2 + segment_length
+    return None
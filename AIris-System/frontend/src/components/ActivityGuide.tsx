@@ -8,7 +8,11 @@ import {
   MicOff,
   Trash2,
 } from "lucide-react";
-import { apiClient, type TaskRequest } from "../services/api";
+import {
+  apiClient,
+  type ActivityGuideMessage,
+  type TaskRequest,
+} from "../services/api";
 import { getVoiceControlService } from "../services/voiceControl";
 
 interface ActivityGuideProps {
@@ -118,7 +122,8 @@ export default function ActivityGuide({
   const [handDetected, setHandDetected] = useState(false);
   const [currentTaskTarget, setCurrentTaskTarget] = useState<string>("");
   const [cameraFacingTowardsUser, setCameraFacingTowardsUser] = useState<boolean>(true);
-  const frameIntervalRef = useRef<number | null>(null);
+  const frameSocketRef = useRef<WebSocket | null>(null);
+  const frameReconnectRef = useRef<number | null>(null);
   const audioRef = useRef<HTMLAudioElement | null>(null);
   const lastInstructionRef = useRef<string>("");
 
@@ -351,7 +356,7 @@ export default function ActivityGuide({
       setFrameUrl(null);
     }
     return () => stopFrameProcessing();
-  }, [cameraOn, stage]);
+  }, [cameraOn]);
 
   // Update camera orientation when toggle changes
   useEffect(() => {
@@ -363,126 +368,68 @@ export default function ActivityGuide({
   }, [cameraFacingTowardsUser, cameraOn]);
 
   const startFrameProcessing = () => {
-    if (frameIntervalRef.current) return;
-
-    let consecutiveErrors = 0;
-    let lastFrameTime = 0;
-    const FRAME_INTERVAL_MS = 100; // 10 FPS - smooth video feed
-    const MAX_CONSECUTIVE_ERRORS = 5;
-
-    const processFrame = async () => {
-      // Stop if camera is off
-      if (!cameraOn) {
-        if (frameIntervalRef.current) {
-          clearInterval(frameIntervalRef.current);
-          frameIntervalRef.current = null;
-        }
+    if (frameSocketRef.current) return;
+
+    // The backend runs the pipeline at the rate inference allows and pushes guidance
+    // whenever it changes plus annotated frames at the preview rate (no polling)
+    const RECONNECT_DELAY_MS = 5000;
+    const socket = apiClient.openActivityGuideSocket();
+    frameSocketRef.current = socket;
+
+    socket.onmessage = (event) => {
+      const message: ActivityGuideMessage = JSON.parse(event.data);
+
+      if (message.type === "frame") {
+        setFrameUrl(`data:image/jpeg;base64,${message.data}`);
         return;
       }
-
-      const now = Date.now();
-      // Throttle to prevent overwhelming the backend
-      if (now - lastFrameTime < FRAME_INTERVAL_MS) {
+      if (message.type !== "guidance") {
         return;
       }
-      lastFrameTime = now;
-
-      try {
-        // Always use process-frame endpoint to get annotated frames with YOLO boxes and hand tracking
-        const result = await apiClient.processActivityFrame();
 
-        // Reset error counter on success
-        consecutiveErrors = 0;
-
-        setFrameUrl(`data:image/jpeg;base64,${result.frame}`);
-        setCurrentInstruction(result.instruction);
-        setStage(result.stage);
-        setDetectedObjects(result.detected_objects || []);
-        setHandDetected(result.hand_detected || false);
-
-        // Only add to log if instruction is meaningfully different from the last one
-        if (
-          result.instruction &&
-          result.instruction !== lastInstructionRef.current
-        ) {
-          lastInstructionRef.current = result.instruction;
-          addLogEntry(result.instruction, result.stage, "instruction");
-        }
+      setCurrentInstruction(message.instruction);
+      setStage(message.stage);
+      setDetectedObjects(message.detected_objects || []);
+      setHandDetected(message.hand_detected || false);
+
+      // Only add to log if instruction is meaningfully different from the last one
+      if (
+        message.instruction &&
+        message.instruction !== lastInstructionRef.current
+      ) {
+        lastInstructionRef.current = message.instruction;
+        addLogEntry(message.instruction, message.stage, "instruction");
+      }
 
-        if (result.stage === "AWAITING_FEEDBACK") {
-          setAwaitingFeedback(true);
-        }
-      } catch (error: any) {
-        consecutiveErrors++;
-
-        // Check for specific error types (Axios errors have error.code, error.response, etc.)
-        const errorCode = error?.code || error?.response?.status || "";
-        const errorMessage = error?.message || String(error) || "";
-        const isResourceError =
-          errorCode === "ERR_EMPTY_RESPONSE" ||
-          errorCode === "ERR_INSUFFICIENT_RESOURCES" ||
-          errorCode === 503 ||
-          errorCode === 500 ||
-          errorMessage.includes("ERR_EMPTY_RESPONSE") ||
-          errorMessage.includes("ERR_INSUFFICIENT_RESOURCES") ||
-          errorMessage.includes("Network Error") ||
-          (error?.response?.status >= 500 && error?.response?.status < 600);
-
-        if (isResourceError) {
-          // Backend is overwhelmed or crashed - back off
-          console.warn(
-            `[ActivityGuide] Backend resource error (${consecutiveErrors}/${MAX_CONSECUTIVE_ERRORS}):`,
-            {
-              code: errorCode,
-              message: errorMessage,
-              status: error?.response?.status,
-            }
-          );
-
-          if (consecutiveErrors >= MAX_CONSECUTIVE_ERRORS) {
-            // Too many errors - stop processing and wait
-            console.error(
-              "[ActivityGuide] Too many consecutive errors, stopping frame processing"
-            );
-            if (frameIntervalRef.current) {
-              clearInterval(frameIntervalRef.current);
-              frameIntervalRef.current = null;
-            }
-            // Restart after delay
-            setTimeout(() => {
-              if (cameraOn && frameIntervalRef.current === null) {
-                console.log(
-                  "[ActivityGuide] Retrying frame processing after backoff"
-                );
-                consecutiveErrors = 0;
-                startFrameProcessing();
-              }
-            }, 5000); // Wait 5 seconds before retrying
-            return;
-          }
-        } else {
-          // Other errors - log but continue (reset counter after a few non-resource errors)
-          if (consecutiveErrors > 3) {
-            console.error("Error processing frame:", {
-              error,
-              code: errorCode,
-              message: errorMessage,
-              status: error?.response?.status,
-            });
-            consecutiveErrors = 0; // Reset after logging to prevent false positives
-          }
-        }
+      if (message.stage === "AWAITING_FEEDBACK") {
+        setAwaitingFeedback(true);
       }
     };
 
-    processFrame();
-    frameIntervalRef.current = window.setInterval(processFrame, 100); // Update every 100ms for smooth video (~10 FPS)
+    socket.onclose = () => {
+      if (frameSocketRef.current !== socket) {
+        return; // Closed on purpose by stopFrameProcessing
+      }
+      frameSocketRef.current = null;
+      console.warn("[ActivityGuide] Guidance stream closed, reconnecting");
+      frameReconnectRef.current = window.setTimeout(() => {
+        frameReconnectRef.current = null;
+        if (cameraOn && frameSocketRef.current === null) {
+          startFrameProcessing();
+        }
+      }, RECONNECT_DELAY_MS);
+    };
   };
 
   const stopFrameProcessing = () => {
-    if (frameIntervalRef.current) {
-      clearInterval(frameIntervalRef.current);
-      frameIntervalRef.current = null;
+    if (frameReconnectRef.current) {
+      clearTimeout(frameReconnectRef.current);
+      frameReconnectRef.current = null;
+    }
+    const socket = frameSocketRef.current;
+    if (socket) {
+      frameSocketRef.current = null;
+      socket.close();
     }
   };
 
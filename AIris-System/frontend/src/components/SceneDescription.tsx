@@ -87,6 +87,7 @@ export default function SceneDescription({
   const frameCountRef = useRef(0);
   const voiceControlRef = useRef(getVoiceControlService());
   const startRecordingButtonRef = useRef<HTMLButtonElement>(null);
+  const recordingEventIdRef = useRef<number | null>(null);
   const stopRecordingButtonRef = useRef<HTMLButtonElement>(null);
   const lastSpokenSummaryRef = useRef<string>("");
   const lastSpokenDescriptionRef = useRef<string>("");
@@ -298,6 +299,41 @@ export default function SceneDescription({
     };
   }, [isRecording]);
 
+  // Descriptions, summaries, risk changes and alerts pushed by the server while recording
+  useEffect(() => {
+    if (!isRecording) {
+      return;
+    }
+    // Replay from just before the recording started, so nothing published meanwhile is missed
+    const events = apiClient.openSceneEvents(recordingEventIdRef.current ?? undefined);
+    recordingEventIdRef.current = null;
+    const parse = (event: Event) => JSON.parse((event as MessageEvent).data);
+
+    events.addEventListener("description", (event) => {
+      handleDescription(parse(event).description);
+    });
+    events.addEventListener("summary", (event) => {
+      const data = parse(event);
+      handleSummary(data.summary, data.safety_alert || false, data.risk_score || 0);
+    });
+    events.addEventListener("risk", (event) => {
+      setRiskScore(parse(event).risk_score || 0);
+    });
+    events.addEventListener("alert", (event) => {
+      const data = parse(event);
+      setSafetyAlert(true);
+      showAlertNotification(data.kind === "fall");
+    });
+    events.addEventListener("recording", (event) => {
+      if (parse(event).is_recording === false) {
+        setIsRecording(false);
+        loadLogs();
+      }
+    });
+
+    return () => events.close();
+  }, [isRecording]);
+
   const loadLogs = async () => {
     try {
       const logs = await apiClient.getRecordingLogs();
@@ -351,6 +387,69 @@ export default function SceneDescription({
     frameIntervalRef.current = window.setInterval(updateFrame, FRAME_INTERVAL_MS);
   };
 
+  const handleDescription = (description: string) => {
+    setCurrentDescription(description);
+    // Add a filled frame indicator
+    frameCountRef.current += 1;
+    const frameIndex = (frameCountRef.current - 1) % BUFFER_MAX;
+    setFilledFrames((prev) => {
+      const newFrames = [...prev];
+      if (!newFrames.includes(frameIndex)) {
+        newFrames.push(frameIndex);
+      }
+      return newFrames;
+    });
+  };
+
+  const showAlertNotification = (isFallAlert: boolean) => {
+    // Show notification on the FAB
+    const alertType = isFallAlert ? "Fall Alert" : "Safety Alert";
+    const notificationTimestamp = Date.now();
+    setAlertNotification({
+      show: true,
+      message: `${alertType} sent to guardian`,
+      timestamp: notificationTimestamp,
+    });
+
+    // Auto-hide notification after 5 seconds
+    setTimeout(() => {
+      setAlertNotification((prev) => {
+        // Only hide if it's the same notification (timestamp matches)
+        if (prev && prev.timestamp === notificationTimestamp) {
+          return { ...prev, show: false };
+        }
+        return prev;
+      });
+    }, 5000);
+  };
+
+  const handleSummary = (summary: string, isAlert: boolean, summaryRiskScore: number) => {
+    // Check if we got a new summary
+    if (summary === lastSummaryRef.current) {
+      return;
+    }
+    lastSummaryRef.current = summary;
+    setIsGeneratingSummary(true);
+
+    setTimeout(() => {
+      setCurrentSummary(summary);
+
+      // Add to current session events
+      const newEvent: SummaryEvent = {
+        timestamp: new Date().toISOString(),
+        summary: summary,
+        isAlert: isAlert,
+        riskScore: summaryRiskScore,
+      };
+      setCurrentSessionEvents((prev) => [newEvent, ...prev]);
+
+      // Reset frame buffer visualization
+      setFilledFrames([]);
+      frameCountRef.current = 0;
+      setIsGeneratingSummary(false);
+    }, 500);
+  };
+
   const startAnalysisInterval = () => {
     if (analysisIntervalRef.current) clearInterval(analysisIntervalRef.current);
 
@@ -359,77 +458,12 @@ export default function SceneDescription({
         setIsProcessing(true);
         const result = await apiClient.processSceneFrame();
 
-        if (result.description) {
-          setCurrentDescription(result.description);
-          // Add a filled frame indicator
-          frameCountRef.current += 1;
-          const frameIndex = (frameCountRef.current - 1) % BUFFER_MAX;
-          setFilledFrames((prev) => {
-            const newFrames = [...prev];
-            if (!newFrames.includes(frameIndex)) {
-              newFrames.push(frameIndex);
-            }
-            return newFrames;
-          });
-        }
-
+        // Descriptions, summaries and alerts arrive on the event stream (see useEffect above),
+        // whether the server-side monitor or this poll produced them; polls keep the status fresh
         if (result.stats) {
           setStats(result.stats);
         }
 
-        // Check if an alert was sent (fall alert or risk-based alert)
-        const alertWasSent =
-          result.alert_sent || result.fall_alert_sent || false;
-        if (alertWasSent) {
-          // Show notification on the FAB
-          const alertType = result.fall_alert_sent
-            ? "Fall Alert"
-            : "Safety Alert";
-          const notificationTimestamp = Date.now();
-          setAlertNotification({
-            show: true,
-            message: `${alertType} sent to guardian`,
-            timestamp: notificationTimestamp,
-          });
-
-          // Auto-hide notification after 5 seconds
-          setTimeout(() => {
-            setAlertNotification((prev) => {
-              // Only hide if it's the same notification (timestamp matches)
-              if (prev && prev.timestamp === notificationTimestamp) {
-                return { ...prev, show: false };
-              }
-              return prev;
-            });
-          }, 5000);
-        }
-
-        // Check if we got a new summary
-        if (result.summary && result.summary !== lastSummaryRef.current) {
-          setIsGeneratingSummary(true);
-          const newSummary = result.summary;
-          const isAlert = result.safety_alert || false;
-
-          setTimeout(() => {
-            setCurrentSummary(newSummary);
-            lastSummaryRef.current = newSummary;
-
-            // Add to current session events
-            const newEvent: SummaryEvent = {
-              timestamp: new Date().toISOString(),
-              summary: newSummary,
-              isAlert: isAlert,
-              riskScore: result.risk_score || 0,
-            };
-            setCurrentSessionEvents((prev) => [newEvent, ...prev]);
-
-            // Reset frame buffer visualization
-            setFilledFrames([]);
-            frameCountRef.current = 0;
-            setIsGeneratingSummary(false);
-          }, 500);
-        }
-
         setSafetyAlert(result.safety_alert || false);
         setRiskScore(result.risk_score || 0);
         setIsRecording(result.is_recording);
@@ -521,6 +555,7 @@ export default function SceneDescription({
     try {
       const response = await apiClient.startRecording();
       if (response.status === "success") {
+        recordingEventIdRef.current = response.last_event_id ?? null;
         setIsRecording(true);
         setCurrentDescription("");
         setCurrentSummary("");
@@ -50,6 +50,34 @@ export type ProcessFrameResponse = {
   hand_location?: number[];
 };
 
+export type ActivityGuideGuidance = Omit<ProcessFrameResponse, 'frame'> & {
+  type: 'guidance';
+  seq: number;
+  timestamp: number;
+};
+
+export type ActivityGuideDetections = {
+  type: 'detections';
+  seq: number;
+  timestamp: number;
+  frame_size: [number, number];
+  detections: Array<{
+    name: string;
+    class_id: number;
+    confidence: number;
+    box: number[];
+    track_id: number | null;
+  }>;
+  hands: Array<{ box: number[]; landmarks: number[][] }>;
+  inference_skipped: boolean;
+};
+
+export type ActivityGuideMessage =
+  | ActivityGuideGuidance
+  | ActivityGuideDetections
+  | { type: 'frame'; data: string; seq: number; timestamp: number }
+  | { type: 'error'; error: string };
+
 export type SceneDescriptionResponse = {
   frame: string;
   description?: string;
@@ -129,6 +157,15 @@ export const apiClient = {
     return response.data;
   },
 
+  // Server-push alternative to polling processActivityFrame (see /activity-guide/ws).
+  // 'metadata' mode sends detections and hand landmarks instead of annotated frames.
+  openActivityGuideSocket(mode: 'frame' | 'metadata' = 'frame'): WebSocket {
+    const url = new URL('/api/v1/activity-guide/ws', API_BASE_URL);
+    url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:';
+    url.searchParams.set('mode', mode);
+    return new WebSocket(url.toString());
+  },
+
   async submitFeedback(request: FeedbackRequest): Promise<any> {
     const response = await client.post('/api/v1/activity-guide/feedback', request);
     return response.data;
@@ -166,6 +203,14 @@ export const apiClient = {
     return response.data;
   },
 
+  // Pushed descriptions, summaries, risk changes and alerts (see /scene-description/events).
+  // EventSource resends Last-Event-ID on reconnect, so missed events are replayed.
+  // Pass the last_event_id from start-recording to also get the events published since then
+  openSceneEvents(lastEventId?: number): EventSource {
+    const query = lastEventId !== undefined ? `?last_event_id=${lastEventId}` : '';
+    return new EventSource(`${API_BASE_URL}/api/v1/scene-description/events${query}`);
+  },
+
   async getRecordingLogs(): Promise<any[]> {
     const response = await client.get('/api/v1/scene-description/logs');
     return response.data.logs || [];